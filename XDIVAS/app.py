@@ -1,24 +1,43 @@
 from flask import Flask, render_template, jsonify, request, session, redirect, url_for, Response, send_from_directory
 from flask_socketio import SocketIO, emit
 import json
-import requests
-from datetime import datetime, timedelta
-import asyncio
-import websockets
+from datetime import datetime
 import threading
 import time
 import random
-from collections import defaultdict, deque, Counter
+from collections import defaultdict, deque, Counter, namedtuple, OrderedDict
 import logging
-from bs4 import BeautifulSoup
+import importlib.util
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
 import re
-import cloudscraper
 import gzip
-import brotli
 from io import BytesIO
 import os
-from urllib.parse import unquote
+import sys
+from urllib.parse import unquote, urlparse
 import hashlib
+import bisect
+import math
+import heapq
+import itertools
+import uuid
+import queue
+import concurrent.futures
+import sqlite3
+import atexit
+import socket
+import struct
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 # Configure logging
 logging.basicConfig(
@@ -31,13 +50,96 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Heavy modules load on first use: pandas/numpy (analytics queries), cloudscraper
+# (scraper session), bs4 (login pages, fallback parser) and brotli
+np = pd = union_categoricals = None
+DATAFRAME_AVAILABLE = all(importlib.util.find_spec(name) for name in ('numpy', 'pandas'))
+
+def load_dataframe_libraries():
+    """Import numpy and pandas if needed; False when they are not installed"""
+    global np, pd, union_categoricals
+    if pd is None and DATAFRAME_AVAILABLE:
+        import numpy
+        import pandas
+        from pandas.api.types import union_categoricals as union
+        np, pd, union_categoricals = numpy, pandas, union
+    return pd is not None
+
+def make_soup(html_content):
+    """BeautifulSoup tree of a page"""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html_content, 'html.parser')
+
+# JSON encoding shared by REST, Socket.IO and SSE
+def _stdlib_dumps(obj):
+    # allow_nan=False: Infinity and NaN are not JSON, fail here rather than in the browser
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, allow_nan=False).encode('utf-8')
+
+
+JSON_ENCODERS = {'json': _stdlib_dumps}
+if orjson is not None:
+    JSON_ENCODERS['orjson'] = orjson.dumps
+
+
+def create_json_encoder(name=None):
+    """Pick the function turning objects into JSON bytes, falling back to the stdlib"""
+    name = name or os.environ.get('IVAS_JSON_ENCODER', 'orjson')
+    if name == 'orjson' and orjson is None:
+        logger.warning("orjson is not installed, using json encoder")
+        name = 'json'
+    return JSON_ENCODERS.get(name, _stdlib_dumps)
+
+
+encode_json = create_json_encoder()
+
+
+def encode_payload(payload):
+    """JSON bytes for a dict, splicing in the cached encoding of any list of SMSRecords"""
+    plain = {}
+    spliced = []
+    for key, value in payload.items():
+        if isinstance(value, (list, tuple)) and value and isinstance(value[0], SMSRecord):
+            spliced.append(encode_json(key) + b':[' + b','.join(record.to_json() for record in value) + b']')
+        else:
+            plain[key] = value
+    body = encode_json(plain)
+    if not spliced:
+        return body
+    return b'{' + b','.join(spliced) + (b',' + body[1:] if len(body) > 2 else b'}')
+
+
+class SocketJSON:
+    """json module for python-socketio; event payloads reuse the cached SMS encodings"""
+    @staticmethod
+    def dumps(obj, **kwargs):
+        if isinstance(obj, list):
+            # Socket.IO event packets are [event name, *arguments]
+            parts = [encode_payload(item) if isinstance(item, dict) else encode_json(item) for item in obj]
+            return (b'[' + b','.join(parts) + b']').decode('utf-8')
+        if isinstance(obj, dict):
+            return encode_payload(obj).decode('utf-8')
+        return encode_json(obj).decode('utf-8')
+
+    @staticmethod
+    def loads(s, **kwargs):
+        return json.loads(s)
+
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-change-in-production'
+# Long-polling spreads one session over many requests; across workers that needs a sticky proxy
+STICKY_SESSIONS = os.environ.get('IVAS_STICKY_SESSIONS', '0').lower() not in ('0', 'false', 'no')
+WEBSOCKET_ONLY = bool(os.environ.get('IVAS_CLUSTER_DIR')) and not STICKY_SESSIONS
+if WEBSOCKET_ONLY:
+    logger.warning("Cluster mode without IVAS_STICKY_SESSIONS: serving Socket.IO over WebSocket only, "
+                   "long-polling fallback disabled")
 socketio = SocketIO(app, 
                    cors_allowed_origins="*", 
                    async_mode='threading',
                    ping_timeout=60,
-                   ping_interval=25)
+                   ping_interval=25,
+                   json=SocketJSON,
+                   transports=['websocket'] if WEBSOCKET_ONLY else ['polling', 'websocket'])
 
 # Color themes
 COLOR_THEMES = {
@@ -97,6 +199,8 @@ PLATFORM_COLORS = {
     'whatsapp': '#25d366',
     'instagram': '#e4405f'
 }
+# Platforms added through IVAS_PLATFORM_RULES
+DEFAULT_PLATFORM_COLOR = '#8888aa'
 
 # Platform gradient colors
 PLATFORM_GRADIENTS = {
@@ -198,117 +302,1437 @@ def load_cookies():
 # Initialize cookies
 COOKIES = load_cookies()
 
+# Incremental analytics helpers
+class TopK:
+    """Top-K ranking of counters that only grow, by any amount per update"""
+    def __init__(self, k):
+        self.k = k
+        self.entries = []  # [key, count] pairs, highest count first
+        self.positions = {}
+
+    def update(self, key, count):
+        """Record the new count of key, keeping the ranking sorted"""
+        pos = self.positions.get(key)
+        if pos is None:
+            if len(self.entries) < self.k:
+                self.entries.append([key, count])
+                pos = len(self.entries) - 1
+            elif count > self.entries[-1][1]:
+                del self.positions[self.entries[-1][0]]
+                self.entries[-1] = [key, count]
+                pos = len(self.entries) - 1
+            else:
+                return
+            self.positions[key] = pos
+        else:
+            self.entries[pos][1] = count
+
+        # Bubble towards the front past every entry the new count overtook
+        entries = self.entries
+        while pos > 0 and entries[pos - 1][1] < entries[pos][1]:
+            entries[pos - 1], entries[pos] = entries[pos], entries[pos - 1]
+            self.positions[entries[pos][0]] = pos
+            self.positions[entries[pos - 1][0]] = pos - 1
+            pos -= 1
+
+    def items(self):
+        """Return (key, count) tuples, highest count first"""
+        return [(key, count) for key, count in self.entries]
+
+    def clear(self):
+        self.entries = []
+        self.positions = {}
+
+
+class SpaceSaving:
+    """Space-Saving heavy-hitter sketch: at most `capacity` counters, each overestimating by <= total / capacity"""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counters = {}  # key -> [count, error]
+        self.heap = []      # (count, key) with stale entries skipped lazily
+        self.total = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def add(self, key, amount=1):
+        with self.lock:
+            self.total += amount
+            counter = self.counters.get(key)
+            if counter is not None:
+                counter[0] += amount
+            elif len(self.counters) < self.capacity:
+                counter = self.counters[key] = [amount, 0]
+            else:
+                # Take over the smallest counter; its count becomes our error bound
+                floor, victim = self._pop_min()
+                del self.counters[victim]
+                counter = self.counters[key] = [floor + amount, floor]
+                self.evictions += 1
+            heapq.heappush(self.heap, (counter[0], key))
+            if len(self.heap) > 4 * self.capacity:
+                self.heap = [(count, k) for k, (count, _) in self.counters.items()]
+                heapq.heapify(self.heap)
+
+    def _pop_min(self):
+        while True:
+            count, key = heapq.heappop(self.heap)
+            counter = self.counters.get(key)
+            if counter is not None and counter[0] == count:
+                return count, key
+
+    def __getitem__(self, key):
+        """Estimated count; 0 for keys that are not monitored"""
+        counter = self.counters.get(key)
+        return counter[0] if counter else 0
+
+    def __len__(self):
+        return len(self.counters)
+
+    def top(self, k=10):
+        """(key, estimated count, max overestimate) for the k heaviest keys"""
+        with self.lock:
+            ranked = heapq.nlargest(k, self.counters.items(), key=lambda item: item[1][0])
+        return [(key, count, error) for key, (count, error) in ranked]
+
+    def counts(self):
+        """Snapshot of every monitored estimate"""
+        with self.lock:
+            return {key: counter[0] for key, counter in self.counters.items()}
+
+    def error_bound(self):
+        return self.total / self.capacity if self.evictions else 0
+
+    def stats(self):
+        return {
+            'capacity': self.capacity,
+            'monitored': len(self.counters),
+            'total': self.total,
+            'evictions': self.evictions,
+            'error_bound': round(self.error_bound(), 2)
+        }
+
+    def clear(self):
+        with self.lock:
+            self.counters = {}
+            self.heap = []
+            self.total = 0
+            self.evictions = 0
+
+
+class RingCounter:
+    """Fixed-size ring of time buckets with a running window total"""
+    def __init__(self, slots, resolution):
+        self.slots = slots
+        self.resolution = resolution
+        self.counts = [0] * slots
+        self.epochs = [-1] * slots
+        self.total = 0
+        self.head = -1
+
+    def _advance(self, epoch):
+        """Expire buckets that fell out of the window"""
+        if self.head >= 0 and epoch - self.head >= self.slots:
+            self.counts = [0] * self.slots
+            self.epochs = [-1] * self.slots
+            self.total = 0
+        elif epoch > self.head >= 0:
+            for stale in range(self.head + 1, epoch + 1):
+                slot = stale % self.slots
+                self.total -= self.counts[slot]
+                self.counts[slot] = 0
+                self.epochs[slot] = stale
+        if epoch > self.head:
+            self.head = epoch
+
+    def add(self, ts, amount=1):
+        epoch = int(ts // self.resolution)
+        self._advance(epoch)
+        if epoch <= self.head - self.slots:
+            return
+        slot = epoch % self.slots
+        if self.epochs[slot] != epoch:
+            self.epochs[slot] = epoch
+            self.counts[slot] = 0
+        self.counts[slot] += amount
+        self.total += amount
+
+    def window_total(self, now):
+        self._advance(int(now // self.resolution))
+        return self.total
+
+    def clear(self):
+        self.counts = [0] * self.slots
+        self.epochs = [-1] * self.slots
+        self.total = 0
+        self.head = -1
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram in seconds"""
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+    # For per-record hot paths that run in microseconds
+    FAST_BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01, 0.1)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bucket bound containing the q-th quantile, None when it lies past the last bucket"""
+        if not self.count:
+            return 0
+        rank = q * self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return bound
+        return None
+
+    def snapshot(self):
+        """JSON-friendly view with cumulative bucket counts"""
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        buckets['+Inf'] = self.count
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'avg': round(self.sum / self.count, 6) if self.count else 0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'buckets': buckets
+        }
+
+    def clear(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+
+class MetricsRegistry:
+    """Prometheus text exposition over histograms and values read at scrape time"""
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self.families = []  # (name, type, help, source)
+
+    def histogram(self, name, help_text, histogram, label=None):
+        """histogram is a LatencyHistogram, or {label value: LatencyHistogram} when label is given"""
+        self.families.append((name, 'histogram', help_text, (histogram, label)))
+        return histogram
+
+    def counter(self, name, help_text, read, label=None):
+        """read() returns a number, or {label value: number} when label is given"""
+        self.families.append((name, 'counter', help_text, (read, label)))
+
+    def gauge(self, name, help_text, read, label=None):
+        self.families.append((name, 'gauge', help_text, (read, label)))
+
+    def render(self):
+        lines = []
+        for name, kind, help_text, source in self.families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'histogram':
+                histogram, label = source
+                series = histogram.items() if label else ((None, histogram),)
+                for key, item in series:
+                    lines.extend(self._histogram_lines(name, item, f'{label}="{key}",' if label else ''))
+                continue
+            read, label = source
+            try:
+                value = read()
+            except Exception as e:
+                logger.warning(f"Metric {name} unavailable: {e}")
+                continue
+            if label is None:
+                lines.append(f"{name} {self._format_value(value)}")
+            else:
+                for key, item in value.items():
+                    lines.append(f'{name}{{{label}="{key}"}} {self._format_value(item)}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _format_value(value):
+        """Sample value in exposition syntax, which spells infinities +Inf / -Inf"""
+        if isinstance(value, float) and math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        return value
+
+    @staticmethod
+    def _histogram_lines(name, histogram, labels=''):
+        # Copy first so buckets and count agree even while observe() runs
+        counts = list(histogram.counts)
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(histogram.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{labels}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}le="+Inf"}} {sum(counts)}')
+        selector = f'{{{labels.rstrip(",")}}}' if labels else ''
+        lines.append(f"{name}_sum{selector} {histogram.sum}")
+        lines.append(f"{name}_count{selector} {sum(counts)}")
+        return lines
+
+
+class IncrementalAnalytics:
+    """Sliding-window analytics updated in O(1) per ingested SMS"""
+    def __init__(self, peak_limit=3, peak_window_hours=7 * 24):
+        self.per_second = RingCounter(60, 1)    # last minute
+        self.per_minute = RingCounter(60, 60)   # last hour
+        self.peak_hours = TopK(peak_limit)
+        self.peak_window_hours = peak_window_hours
+        self.hour_totals = Counter()  # epoch second starting the hour -> SMS in it
+        self.latest_hour = None
+
+    def record(self, ts):
+        """Account for one stored SMS"""
+        self.per_second.add(ts)
+        self.per_minute.add(ts)
+        self.add_hour(ts)
+
+    def add_hour(self, ts, amount=1):
+        """Count SMS into the hour containing ts; the same clock hour on different days stays apart"""
+        hour = int(ts) - int(ts) % 3600
+        if self.latest_hour is None or hour > self.latest_hour:
+            self.latest_hour = hour
+            self._expire_hours()
+        elif hour <= self.latest_hour - self.peak_window_hours * 3600:
+            return
+        self.hour_totals[hour] += amount
+        self.peak_hours.update(hour, self.hour_totals[hour])
+
+    def _expire_hours(self):
+        """Forget hours that left the window; runs at most once per new hour"""
+        cutoff = self.latest_hour - self.peak_window_hours * 3600
+        stale = [hour for hour in self.hour_totals if hour <= cutoff]
+        if stale:
+            for hour in stale:
+                del self.hour_totals[hour]
+            self.peak_hours.clear()
+            for hour, count in self.hour_totals.items():
+                self.peak_hours.update(hour, count)
+
+    def top_hours(self):
+        """Busiest hours in the window as ('YYYY-MM-DD HH:00', count), highest first"""
+        return [
+            (datetime.fromtimestamp(hour).strftime("%Y-%m-%d %H:00"), count)
+            for hour, count in self.peak_hours.items()
+        ]
+
+    def sms_rate(self, now=None):
+        """Average SMS per minute over the last hour"""
+        now = time.time() if now is None else now
+        return self.per_minute.window_total(now) / 60
+
+    def burst_rate(self, now=None):
+        """SMS per minute extrapolated from the last 60 seconds"""
+        now = time.time() if now is None else now
+        return self.per_second.window_total(now)
+
+    def clear(self):
+        self.per_second.clear()
+        self.per_minute.clear()
+        self.peak_hours.clear()
+        self.hour_totals.clear()
+        self.latest_hour = None
+
+
+class DedupIndex:
+    """Bounded dedup index keyed on a compact message fingerprint"""
+    def __init__(self, capacity, ttl=None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.entries = {}      # fingerprint -> insertion time
+        self.order = deque()   # (fingerprint, insertion time), oldest first
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(sms_data):
+        """64-bit fingerprint of (sid, phone_number, message)"""
+        key = '\x1f'.join((
+            sms_data.get('sid', ''),
+            sms_data.get('phone_number', ''),
+            sms_data.get('message', '')
+        ))
+        return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+    def _expire(self, now):
+        """Drop entries older than the TTL"""
+        if self.ttl is None:
+            return
+        cutoff = now - self.ttl
+        while self.order and self.order[0][1] < cutoff:
+            self._pop_oldest()
+
+    def _pop_oldest(self):
+        fp, inserted = self.order.popleft()
+        if self.entries.get(fp) == inserted:
+            del self.entries[fp]
+
+    def add(self, fp):
+        """Insert fingerprint, returning False if it is already present"""
+        now = time.monotonic()
+        self._expire(now)
+        if fp in self.entries:
+            self.hits += 1
+            return False
+        # Evict in step with the bounded SMS deque
+        while len(self.order) >= self.capacity:
+            self._pop_oldest()
+        self.entries[fp] = now
+        self.order.append((fp, now))
+        self.misses += 1
+        return True
+
+    def __contains__(self, fp):
+        return fp in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def memory_usage(self):
+        """Approximate bytes held by the index"""
+        size = sys.getsizeof(self.entries) + sys.getsizeof(self.order)
+        if self.order:
+            fp, inserted = self.order[0]
+            per_entry = sys.getsizeof((fp, inserted)) + sys.getsizeof(fp) + sys.getsizeof(inserted)
+            size += per_entry * len(self.order)
+        return size
+
+    def stats(self):
+        """Summary for status endpoints"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'capacity': self.capacity,
+            'ttl': self.ttl,
+            'memory_bytes': self.memory_usage(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.order.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class CodeTable:
+    """Interns repeated string values as small integer codes"""
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+    def decode(self, code):
+        return self.values[code]
+
+
+PLATFORM_TABLE = CodeTable()
+COUNTRY_TABLE = CodeTable()
+COUNTRY_CODE_TABLE = CodeTable()
+
+
+class SMSRecord:
+    """Compact stored SMS; the dict form is only built for serialization"""
+    __slots__ = ('platform_idx', 'country_idx', 'country_code_idx', 'sid',
+                 'phone_number', 'message', 'raw_text', 'id', 'epoch', 'seq')
+
+    FIELDS = ('platform', 'country', 'country_code', 'sid', 'phone_number',
+              'message', 'time', 'timestamp', 'raw_text', 'id', 'seq')
+
+    def __init__(self, platform, country, country_code, sid, phone_number,
+                 message, raw_text, id, epoch, seq=0):
+        self.platform_idx = PLATFORM_TABLE.encode(platform)
+        self.country_idx = COUNTRY_TABLE.encode(country)
+        self.country_code_idx = COUNTRY_CODE_TABLE.encode(country_code)
+        self.sid = sys.intern(sid)
+        self.phone_number = phone_number
+        self.message = message
+        self.raw_text = raw_text
+        self.id = id
+        self.epoch = epoch
+        self.seq = seq
+
+    @classmethod
+    def from_dict(cls, sms_data):
+        """Build a record from the scraper's dict format"""
+        timestamp = sms_data.get('timestamp')
+        try:
+            epoch = int(datetime.fromisoformat(timestamp).timestamp())
+        except (TypeError, ValueError):
+            epoch = int(time.time())
+        return cls(
+            sms_data.get('platform', 'unknown'),
+            sms_data.get('country', 'Unknown'),
+            sms_data.get('country_code', ''),
+            sms_data.get('sid', ''),
+            sms_data.get('phone_number', ''),
+            sms_data.get('message', ''),
+            sms_data.get('raw_text', ''),
+            sms_data.get('id', ''),
+            epoch,
+            sms_data.get('seq', 0)
+        )
+
+    @property
+    def platform(self):
+        return PLATFORM_TABLE.decode(self.platform_idx)
+
+    @property
+    def country(self):
+        return COUNTRY_TABLE.decode(self.country_idx)
+
+    @property
+    def country_code(self):
+        return COUNTRY_CODE_TABLE.decode(self.country_code_idx)
+
+    @property
+    def time(self):
+        return datetime.fromtimestamp(self.epoch).strftime("%H:%M:%S")
+
+    @property
+    def timestamp(self):
+        return datetime.fromtimestamp(self.epoch).isoformat()
+
+    def to_dict(self):
+        """Materialize the public dict representation"""
+        moment = datetime.fromtimestamp(self.epoch)
+        return {
+            'platform': self.platform,
+            'country': self.country,
+            'country_code': self.country_code,
+            'sid': self.sid,
+            'phone_number': self.phone_number,
+            'message': self.message,
+            'time': moment.strftime("%H:%M:%S"),
+            'timestamp': moment.isoformat(),
+            'raw_text': self.raw_text,
+            'id': self.id,
+            'seq': self.seq
+        }
+
+    def to_json(self):
+        """JSON bytes of to_dict(), shared by every output path while the record stays hot"""
+        return encoded_records.get(self)
+
+    # Mapping-style access so records can stand in for the old dicts
+    def keys(self):
+        return self.FIELDS
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        if key not in self.FIELDS:
+            return default
+        return getattr(self, key)
+
+
+class EncodedRecordCache:
+    """Bounded LRU of SMSRecord JSON encodings
+
+    Only recently served records (new batches, the newest page of the table)
+    keep their bytes, instead of every stored record carrying its own copy.
+    """
+    def __init__(self, capacity=512):
+        self.capacity = capacity
+        self.entries = OrderedDict()  # record -> JSON bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, record):
+        with self.lock:
+            body = self.entries.get(record)
+            if body is not None:
+                self.entries.move_to_end(record)
+                self.hits += 1
+                return body
+        body = encode_json(record.to_dict())
+        with self.lock:
+            self.misses += 1
+            self.entries[record] = body
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        return body
+
+    def stats(self):
+        return {
+            'capacity': self.capacity,
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+encoded_records = EncodedRecordCache(int(os.environ.get('IVAS_ENCODED_CACHE_SIZE', 512)))
+
+
+class RollupRing:
+    """Ring of fixed-width time buckets, each counting SMS per (platform, country) code pair"""
+    def __init__(self, name, seconds, slots):
+        self.name = name
+        self.seconds = seconds
+        self.slots = slots
+        self.buckets = [-1] * slots
+        self.counts = [None] * slots
+        self.head = -1
+        self.dirty = set()  # slots written since the last freeze
+
+    @property
+    def retention(self):
+        return self.seconds * self.slots
+
+    def add_bucket(self, bucket, key, amount=1):
+        """Count into an absolute bucket number; buckets older than the ring are dropped"""
+        if bucket <= self.head - self.slots:
+            return
+        slot = bucket % self.slots
+        if self.buckets[slot] != bucket:
+            self.buckets[slot] = bucket
+            self.counts[slot] = Counter()
+        self.counts[slot][key] += amount
+        self.dirty.add(slot)
+        if bucket > self.head:
+            self.head = bucket
+
+    def add(self, ts, key, amount=1):
+        self.add_bucket(int(ts) // self.seconds, key, amount)
+
+    def range(self, first, last):
+        """(bucket, Counter) for live buckets in [first, last]"""
+        first = max(first, last - self.slots + 1)
+        for bucket in range(first, last + 1):
+            slot = bucket % self.slots
+            if self.buckets[slot] == bucket:
+                yield bucket, self.counts[slot]
+
+    def freeze(self, previous=None):
+        """Read-only copy, reusing the previous copy's counts for slots not written since"""
+        frozen = RollupRing(self.name, self.seconds, 0)
+        frozen.slots = self.slots
+        frozen.head = self.head
+        frozen.buckets = list(self.buckets)
+        if previous is None:
+            frozen.counts = [dict(counts) if counts is not None else None for counts in self.counts]
+        else:
+            frozen.counts = list(previous.counts)
+            for slot in self.dirty:
+                frozen.counts[slot] = dict(self.counts[slot])
+        self.dirty = set()
+        return frozen
+
+    def clear(self):
+        self.buckets = [-1] * self.slots
+        self.counts = [None] * self.slots
+        self.head = -1
+        self.dirty = set()
+
+
+class TimeSeriesRollup:
+    """Minute, hour and day rollups by platform and country with fixed memory and O(1) insert"""
+    RESOLUTIONS = (('minute', 60, 24 * 60), ('hour', 3600, 14 * 24), ('day', 86400, 400))
+    MAX_POINTS = 10000
+    GROUPS = {'platform': (0, PLATFORM_TABLE), 'country': (1, COUNTRY_TABLE)}
+
+    def __init__(self, resolutions=RESOLUTIONS):
+        self.rings = [RollupRing(name, seconds, slots) for name, seconds, slots in resolutions]
+        self.lock = threading.Lock()
+        self.frozen = None  # last copy handed out by freeze()
+
+    def add(self, ts, platform_idx, country_idx, amount=1):
+        key = (platform_idx, country_idx)
+        with self.lock:
+            for ring in self.rings:
+                ring.add(ts, key, amount)
+
+    def pick_ring(self, step, span):
+        """Coarsest ring that divides the step and still covers the span"""
+        usable = [ring for ring in self.rings if ring.seconds <= step and step % ring.seconds == 0]
+        covering = [ring for ring in usable if ring.retention >= span]
+        if covering:
+            return covering[-1]
+        return max(usable or self.rings[:1], key=lambda ring: ring.retention)
+
+    def freeze(self):
+        """Immutable copy for a published snapshot; readers query it without taking the lock"""
+        with self.lock:
+            previous = self.frozen.rings if self.frozen is not None else [None] * len(self.rings)
+            frozen = TimeSeriesRollup(resolutions=())
+            frozen.rings = [ring.freeze(before) for ring, before in zip(self.rings, previous)]
+            self.frozen = frozen
+            return frozen
+
+    def series(self, step=300, span=6 * 3600, platform=None, country=None, group_by=None, now=None):
+        """Counts per step-wide bucket over the last span seconds, oldest first
+
+        Only the writer may call this on the live rollup; other threads use a frozen copy.
+        """
+        step = max(int(step), self.rings[0].seconds)
+        step -= step % self.rings[0].seconds
+        span = max(int(span), step)
+        ring = self.pick_ring(step, span)
+        now = int(time.time() if now is None else now)
+        last_start = now - now % step
+        points = -(-span // step)
+        if points > self.MAX_POINTS:
+            raise ValueError(f"span / step gives {points} points, at most {self.MAX_POINTS} allowed")
+        first_start = last_start - (points - 1) * step
+        
+        platform_idx = PLATFORM_TABLE.codes.get(platform) if platform else None
+        country_idx = COUNTRY_TABLE.codes.get(country) if country else None
+        if (platform and platform_idx is None) or (country and country_idx is None):
+            buckets = ()
+        else:
+            buckets = ring.range(first_start // ring.seconds, now // ring.seconds)
+        group_pos, group_table = self.GROUPS.get(group_by, (None, None))
+        totals = [0 if group_table is None else Counter() for _ in range(points)]
+        
+        for bucket, counts in buckets:
+            point = (bucket * ring.seconds - first_start) // step
+            for key, count in counts.items():
+                if platform_idx is not None and key[0] != platform_idx:
+                    continue
+                if country_idx is not None and key[1] != country_idx:
+                    continue
+                if group_table is None:
+                    totals[point] += count
+                else:
+                    totals[point][group_table.decode(key[group_pos])] += count
+                    
+        if group_table is None:
+            series = [{'timestamp': first_start + i * step, 'count': total} for i, total in enumerate(totals)]
+        else:
+            series = [{'timestamp': first_start + i * step, 'counts': dict(total)} for i, total in enumerate(totals)]
+        return {'resolution': ring.name, 'step': step, 'span': points * step, 'points': series}
+
+    def clear(self):
+        with self.lock:
+            for ring in self.rings:
+                ring.clear()
+            self.frozen = None
+
+
+class IndexLookup:
+    """Filter lookups shared by the live and frozen secondary indexes"""
+    def lookup(self, platform=None, country=None):
+        """Bucket matching the filters, or an empty tuple"""
+        platform_idx = PLATFORM_TABLE.codes.get(platform) if platform else None
+        country_idx = COUNTRY_TABLE.codes.get(country) if country else None
+        if (platform and platform_idx is None) or (country and country_idx is None):
+            return ()
+        if platform and country:
+            return self.by_pair.get((platform_idx, country_idx), ())
+        if platform:
+            return self.by_platform.get(platform_idx, ())
+        return self.by_country.get(country_idx, ())
+
+
+class SecondaryIndex(IndexLookup):
+    """Newest-first record deques per platform, country and platform/country pair"""
+    def __init__(self):
+        self.by_platform = defaultdict(deque)
+        self.by_country = defaultdict(deque)
+        self.by_pair = defaultdict(deque)
+        self.dirty = set()  # (index name, key) touched since the last freeze
+
+    def _buckets(self, record):
+        return (
+            ('by_platform', self.by_platform, record.platform_idx),
+            ('by_country', self.by_country, record.country_idx),
+            ('by_pair', self.by_pair, (record.platform_idx, record.country_idx))
+        )
+
+    def add(self, record):
+        for name, index, key in self._buckets(record):
+            index[key].appendleft(record)
+            self.dirty.add((name, key))
+
+    def evict(self, record):
+        """Drop a record leaving the store; it is always the oldest in its buckets"""
+        for name, index, key in self._buckets(record):
+            bucket = index.get(key)
+            if bucket and bucket[-1] is record:
+                bucket.pop()
+                self.dirty.add((name, key))
+                if not bucket:
+                    del index[key]
+
+    def freeze(self, previous=None):
+        """Immutable copy, reusing the previous copy's tuples for untouched buckets"""
+        if previous is None:
+            frozen = FrozenIndex(
+                {key: tuple(bucket) for key, bucket in self.by_platform.items()},
+                {key: tuple(bucket) for key, bucket in self.by_country.items()},
+                {key: tuple(bucket) for key, bucket in self.by_pair.items()}
+            )
+        else:
+            frozen = FrozenIndex(dict(previous.by_platform), dict(previous.by_country), dict(previous.by_pair))
+            for name, key in self.dirty:
+                target = getattr(frozen, name)
+                bucket = getattr(self, name).get(key)
+                if bucket:
+                    target[key] = tuple(bucket)
+                else:
+                    target.pop(key, None)
+        self.dirty.clear()
+        return frozen
+
+    def clear(self):
+        self.by_platform.clear()
+        self.by_country.clear()
+        self.by_pair.clear()
+        self.dirty.clear()
+
+
+class FrozenIndex(IndexLookup):
+    """Read-only secondary index holding tuples"""
+    __slots__ = ('by_platform', 'by_country', 'by_pair')
+
+    def __init__(self, by_platform, by_country, by_pair):
+        self.by_platform = by_platform
+        self.by_country = by_country
+        self.by_pair = by_pair
+
+
+class StorageSnapshot:
+    """Immutable, versioned view of the store, published once per ingested batch"""
+    __slots__ = ('version', 'records', 'index', 'rollup', 'platform_counts', 'country_counts',
+                 'hourly_stats', 'analytics', 'last_update_time', 'last_seq', 'stream_id')
+
+    def __init__(self, version, records, index, rollup, platform_counts, country_counts,
+                 hourly_stats, analytics, last_update_time, last_seq, stream_id):
+        self.version = version
+        self.records = records  # tuple, newest first
+        self.index = index
+        self.rollup = rollup  # frozen TimeSeriesRollup
+        self.platform_counts = platform_counts
+        self.country_counts = country_counts
+        self.hourly_stats = hourly_stats  # list of per-platform hours, newest first
+        self.analytics = analytics
+        self.last_update_time = last_update_time
+        self.last_seq = last_seq
+        self.stream_id = stream_id
+
+    @property
+    def total(self):
+        return len(self.records)
+
+    def query(self, platform='all', country='all', limit=50):
+        """Newest records matching the filters"""
+        platform = None if platform == 'all' else platform
+        country = None if country == 'all' else country
+        limit = max(limit, 0)  # a negative slice bound would count from the oldest end
+        if platform or country:
+            return list(self.index.lookup(platform, country)[:limit])
+        return list(self.records[:limit])
+
+    def query_before(self, before_seq=None, platform='all', country='all', limit=50):
+        """Newest records older than before_seq matching the filters, without copying whole buckets"""
+        platform = None if platform == 'all' else platform
+        country = None if country == 'all' else country
+        bucket = self.index.lookup(platform, country) if platform or country else self.records
+        start = 0
+        if before_seq is not None:
+            # Buckets are newest first, so seq descends along them
+            high = len(bucket)
+            while start < high:
+                middle = (start + high) // 2
+                if bucket[middle].seq < before_seq:
+                    high = middle
+                else:
+                    start = middle + 1
+        return list(bucket[start:start + max(limit, 0)])
+
+    def records_since(self, last_seq, max_gap=500):
+        """Records newer than last_seq (newest first), or None if a full reload is needed"""
+        missed = self.last_seq - last_seq
+        if missed < 0 or missed > max_gap or missed > len(self.records):
+            return None
+        # Sequence numbers are contiguous across the retained records
+        return list(self.records[:missed])
+
+    def top_countries(self, limit=10):
+        return dict(heapq.nlargest(limit, self.country_counts.items(), key=lambda item: item[1]))
+
+    def hourly(self, hours=6):
+        """Per-platform counts for the most recent hours, newest first"""
+        return self.hourly_stats[:hours]
+
+    def platform_percentages(self):
+        total = sum(self.platform_counts.values())
+        if total == 0:
+            return {}
+        return {
+            platform: (count / total * 100)
+            for platform, count in self.platform_counts.items()
+        }
+
+
+class SQLiteSMSStore:
+    """Append-only SMS history in SQLite (WAL mode), written in batches by a background thread"""
+    COLUMNS = ('seq', 'platform', 'country', 'country_code', 'sid', 'phone_number',
+               'message', 'raw_text', 'id', 'epoch')
+    INSERT_SQL = f"INSERT OR REPLACE INTO sms ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+    def __init__(self, path, flush_interval=1.0, checkpoint_every=1000, retention=30 * 86400):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.checkpoint_every = checkpoint_every
+        self.retention = retention  # seconds of history kept on disk; None keeps everything
+        self.queue = queue.Queue()
+        self.conn = self._connect()
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS sms ("
+            " seq INTEGER PRIMARY KEY, platform TEXT, country TEXT, country_code TEXT,"
+            " sid TEXT, phone_number TEXT, message TEXT, raw_text TEXT, id TEXT, epoch INTEGER);"
+            "CREATE INDEX IF NOT EXISTS sms_epoch ON sms (epoch);"
+            "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT);"
+        )
+        self.read_conn = self._connect()
+        self.read_lock = threading.Lock()
+        self.rows_written = 0
+        self.rows_pruned = 0
+        self.batches_written = 0
+        self.checkpoints = 0
+        self.since_checkpoint = 0
+        self.latest_snapshot = None
+        # Highest seq committed to disk; newer stored records are still queued
+        self.flushed_seq = self.conn.execute("SELECT MAX(seq) FROM sms").fetchone()[0] or 0
+        self.writer = None
+        self.read_only = False  # cluster followers leave writing to the leader
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        # Only takes effect on a new file, before anything is written; lets pruning shrink it
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _row(record):
+        return (record.seq, record.platform, record.country, record.country_code, record.sid,
+                record.phone_number, record.message, record.raw_text, record.id, record.epoch)
+
+    @staticmethod
+    def _record(row):
+        seq, platform, country, country_code, sid, phone_number, message, raw_text, id, epoch = row
+        return SMSRecord(platform, country, country_code, sid, phone_number,
+                         message, raw_text, id, epoch, seq)
+
+    def start(self):
+        """Start the background writer"""
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._writer_loop, name='sms-store-writer', daemon=True)
+            self.writer.start()
+
+    def append(self, records, snapshot):
+        """Queue stored records; snapshot is the state right after them, used for checkpoints"""
+        if not self.read_only:
+            self.queue.put(('append', records, snapshot))
+
+    def clear(self):
+        if not self.read_only:
+            self.queue.put(('clear', None, None))
+
+    def close(self):
+        """Flush everything queued, write a final checkpoint and stop the writer"""
+        if self.writer is not None:
+            self.queue.put(None)
+            self.writer.join(timeout=10)
+            self.writer = None
+
+    def _writer_loop(self):
+        while True:
+            items = [self.queue.get()]
+            # Let a short burst of batches pile up so they share one transaction
+            time.sleep(self.flush_interval)
+            while True:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = None in items
+            try:
+                self._write([item for item in items if item is not None])
+                if stopping or self.since_checkpoint >= self.checkpoint_every:
+                    self._checkpoint()
+            except sqlite3.Error as e:
+                logger.error(f"Error writing SMS history: {e}")
+            if stopping:
+                return
+
+    def _write(self, items):
+        rows = []
+        with self.conn:
+            for kind, records, snapshot in items:
+                if kind == 'clear':
+                    if rows:
+                        self.conn.executemany(self.INSERT_SQL, rows)
+                        rows = []
+                    self.conn.execute("DELETE FROM sms")
+                    self.conn.execute("DELETE FROM state")
+                    self.latest_snapshot = None
+                    self.since_checkpoint = 0
+                    self.flushed_seq = 0
+                    continue
+                rows.extend(self._row(record) for record in records)
+                self.latest_snapshot = snapshot
+            if rows:
+                self.conn.executemany(self.INSERT_SQL, rows)
+        if rows:
+            self.rows_written += len(rows)
+            self.batches_written += 1
+            self.since_checkpoint += len(rows)
+            self.flushed_seq = max(self.flushed_seq, max(row[0] for row in rows))
+
+    def _checkpoint(self):
+        """Persist the counters of the latest written snapshot"""
+        snap = self.latest_snapshot
+        if snap is None:
+            return
+        state = {
+            'last_seq': snap.last_seq,
+            'stream_id': snap.stream_id,
+            'platform_counts': snap.platform_counts,
+            'country_counts': snap.country_counts
+        }
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO state (key, value) VALUES ('checkpoint', ?)",
+                              (json.dumps(state),))
+        self.checkpoints += 1
+        self.since_checkpoint = 0
+        self._prune()
+
+    def _prune(self):
+        """Drop rows older than the retention window and release the freed pages"""
+        if not self.retention or self.read_only:
+            return
+        with self.conn:
+            pruned = self.conn.execute("DELETE FROM sms WHERE epoch < ?",
+                                       (int(time.time() - self.retention),)).rowcount
+        if pruned:
+            self.rows_pruned += pruned
+            self.conn.execute("PRAGMA incremental_vacuum")
+            logger.info(f"Pruned {pruned} SMS older than {self.retention / 86400:g} days from {self.path}")
+
+    def load(self, recent_limit):
+        """Return (checkpoint state or None, records after the checkpoint, newest records first)"""
+        with self.read_lock:
+            row = self.read_conn.execute("SELECT value FROM state WHERE key = 'checkpoint'").fetchone()
+            state = json.loads(row[0]) if row else None
+            after = state['last_seq'] if state else 0
+            tail = self.read_conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM sms WHERE seq > ? ORDER BY seq", (after,)
+            ).fetchall()
+            recent = self.read_conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM sms ORDER BY seq DESC LIMIT ?", (recent_limit,)
+            ).fetchall()
+            last = self.read_conn.execute("SELECT MAX(seq) FROM sms").fetchone()[0]
+        return state, [self._record(row) for row in tail], [self._record(row) for row in recent], last or 0
+
+    def bucket_counts(self, seconds, since):
+        """(platform, country, bucket, count) aggregated in SQL, for rebuilding rollups"""
+        with self.read_lock:
+            return self.read_conn.execute(
+                "SELECT platform, country, epoch / ? AS bucket, COUNT(*) FROM sms"
+                " WHERE epoch >= ? GROUP BY platform, country, bucket",
+                (seconds, int(since))
+            ).fetchall()
+
+    def history_frame(self, after_seq=0):
+        """Rows with seq > after_seq as a columnar frame for HistoryAnalytics"""
+        with self.read_lock:
+            frame = pd.read_sql_query(
+                "SELECT seq, platform, country, phone_number, epoch FROM sms WHERE seq > ? ORDER BY seq",
+                self.read_conn, params=(after_seq,)
+            )
+        for column, table in (('platform', PLATFORM_TABLE), ('country', COUNTRY_TABLE)):
+            codes = {value: table.encode(value) for value in frame[column].unique()}
+            frame[column] = frame[column].map(codes).astype(np.int32)
+        return with_ranges(frame)
+
+    def history(self, before_seq=None, platform=None, country=None, limit=100):
+        """Older records straight from disk, newest first"""
+        clauses, params = [], []
+        if before_seq is not None:
+            clauses.append("seq < ?")
+            params.append(before_seq)
+        if platform:
+            clauses.append("platform = ?")
+            params.append(platform)
+        if country:
+            clauses.append("country = ?")
+            params.append(country)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+        with self.read_lock:
+            rows = self.read_conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM sms{where} ORDER BY seq DESC LIMIT ?", params
+            ).fetchall()
+        return [self._record(row) for row in rows]
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'rows_written': self.rows_written,
+            'rows_pruned': self.rows_pruned,
+            'flushed_seq': self.flushed_seq,
+            'retention_days': self.retention / 86400 if self.retention else None,
+            'batches_written': self.batches_written,
+            'checkpoints': self.checkpoints,
+            'pending_batches': self.queue.qsize(),
+            'read_only': self.read_only
+        }
+
+
+def create_sms_store():
+    """SQLite history store, opt-in through IVAS_DB_PATH; unset keeps everything in memory
+
+    IVAS_DB_RETENTION_DAYS (default 30, 0 for no limit) bounds how much history the file keeps.
+    """
+    path = os.environ.get('IVAS_DB_PATH', '')
+    if not path:
+        return None
+    retention_days = float(os.environ.get('IVAS_DB_RETENTION_DAYS', 30))
+    try:
+        return SQLiteSMSStore(
+            path,
+            flush_interval=float(os.environ.get('IVAS_DB_FLUSH_INTERVAL', 1.0)),
+            checkpoint_every=int(os.environ.get('IVAS_DB_CHECKPOINT_EVERY', 1000)),
+            retention=retention_days * 86400 or None
+        )
+    except sqlite3.Error as e:
+        logger.error(f"Could not open SMS history at {path}: {e}")
+        return None
+
+
+# Hours of per-platform history carried in every snapshot
+HOURLY_WINDOW = 24
+TRENDING_LIMIT = 5
+
 # Enhanced data storage with themes
 class EnhancedDataStorage:
-    def __init__(self, max_sms=2000, max_history=200):
+    def __init__(self, max_sms=2000, max_history=200, dedup_ttl=None, store=None,
+                 country_capacity=256, range_capacity=512, platforms=None):
         self.live_sms_data = deque(maxlen=max_sms)
-        self.platform_counts = Counter({'facebook': 0, 'whatsapp': 0, 'instagram': 0})
-        self.country_counts = Counter()
-        self.range_counts = Counter()
-        self.hourly_stats = defaultdict(lambda: Counter({'facebook': 0, 'whatsapp': 0, 'instagram': 0}))
-        self.sid_tracker = set()
+        # Platforms the classifier can emit, reported even before their first SMS
+        self.platforms = list(platforms or [platform for platform, _ in DEFAULT_PLATFORM_RULES])
+        self.platform_counts = Counter(dict.fromkeys(self.platforms, 0))
+        # Bounded heavy-hitter sketches; exact until more distinct keys than capacity show up
+        self.country_counts = SpaceSaving(country_capacity)
+        self.range_counts = SpaceSaving(range_capacity)
+        self.rollup = TimeSeriesRollup()
+        self.dedup_index = DedupIndex(max_sms, ttl=dedup_ttl)
+        self.add_latency = LatencyHistogram(LatencyHistogram.FAST_BUCKETS)
+        self.index = SecondaryIndex()
         self.last_update_time = None
         self.connection_status = False
         self.history = deque(maxlen=max_history)
+        self.analytics_engine = IncrementalAnalytics()
         self.analytics = {
             'peak_hours': [],
             'trending_countries': [],
             'sms_rate': 0,
+            'burst_rate': 0,
             'avg_response_time': 0
         }
         self.theme = 'neon'  # Default theme
+        # Monotonic sequence numbers let reconnecting clients resume
+        self.stream_id = uuid.uuid4().hex[:12]
+        self.next_seq = 1
+        self.batch_listeners = []
+        self.reset_listeners = []
+        self.generation = 0  # bumped by clear()
+        # Single writer; readers only ever touch the published snapshot
+        self.write_lock = threading.RLock()
+        self.version = 0
+        self.snapshot = None
+        self.frozen_index = None  # last published index; untouched buckets are shared
+        # Optional durable history; the deque above is then a hot cache over it
+        self.store = store
+        if store is not None:
+            self._restore()
+            store.start()
+        self._publish()
         
-    def add_sms(self, sms_data):
-        """Add SMS to storage"""
-        sid = sms_data.get('sid', '')
-        
-        if sid in self.sid_tracker:
-            return False
+    def _restore(self):
+        """Rebuild counters and the hot cache from the last checkpoint plus the log tail"""
+        started = time.monotonic()
+        state, tail, recent, last_seq = self.store.load(self.live_sms_data.maxlen)
+        if state:
+            self.stream_id = state['stream_id']
+            self.platform_counts.update(state['platform_counts'])
+            for country, count in state['country_counts'].items():
+                self.country_counts.add(country, count)
+        for record in tail:
+            self.platform_counts[record.platform] += 1
+            self.country_counts.add(record.country)
+        now = time.time()
+        for ring in self.rollup.rings:
+            for platform, country, bucket, count in self.store.bucket_counts(ring.seconds, now - ring.retention):
+                ring.add_bucket(bucket, (PLATFORM_TABLE.encode(platform), COUNTRY_TABLE.encode(country)), count)
+            
+        for record in reversed(recent):
+            self.dedup_index.add(DedupIndex.fingerprint(record))
+            self.live_sms_data.appendleft(record)
+            self.index.add(record)
+            self.analytics_engine.per_second.add(record.epoch)
+            self.analytics_engine.per_minute.add(record.epoch)
+        engine = self.analytics_engine
+        for point in self.rollup.series(step=3600, span=engine.peak_window_hours * 3600, now=now)['points']:
+            if point['count']:
+                engine.add_hour(point['timestamp'], point['count'])
             
-        self.live_sms_data.appendleft(sms_data)
-        self.sid_tracker.add(sid)
+        self.next_seq = max(last_seq, state['last_seq'] if state else 0) + 1
+        if recent:
+            self.last_update_time = datetime.fromtimestamp(recent[0].epoch)
+        self._update_analytics()
+        logger.info(f"Restored {len(recent)} SMS (+{len(tail)} replayed) from {self.store.path} "
+                    f"in {time.monotonic() - started:.2f}s")
+        
+    def _hourly_series(self, hours):
+        """Per-platform hourly counts from the rollups, newest first"""
+        points = self.rollup.series(step=3600, span=hours * 3600, group_by='platform')['points']
+        return [
+            {
+                'hour': datetime.fromtimestamp(point['timestamp']).strftime("%H:00"),
+                'timestamp': point['timestamp'],
+                **{platform: point['counts'].get(platform, 0) for platform in self.platforms}
+            }
+            for point in reversed(points)
+        ]
         
-        platform = sms_data.get('platform', 'unknown')
-        country = sms_data.get('country', 'Unknown')
+    def query_history(self, before_seq=None, platform='all', country='all', limit=100):
+        """Records older than before_seq, newest first, from disk when a store is attached"""
+        platform = None if platform == 'all' else platform
+        country = None if country == 'all' else country
+        records = self.snapshot.query_before(before_seq, platform or 'all', country or 'all', limit)
+        if self.store is not None:
+            # Records still queued for the writer are only in memory; merge them in
+            flushed = self.store.flushed_seq
+            merged = {record.seq: record for record in self.store.history(before_seq, platform, country, limit)}
+            for record in itertools.takewhile(lambda record: record.seq > flushed, records):
+                merged[record.seq] = record
+            records = sorted(merged.values(), key=lambda record: record.seq, reverse=True)
+        return records[:limit]
         
-        self.platform_counts[platform] += 1
-        self.country_counts[country] += 1
+    @property
+    def last_seq(self):
+        return self.next_seq - 1
         
-        hour = datetime.now().strftime("%H:00")
-        self.hourly_stats[hour][platform] += 1
+    def _publish(self):
+        """Publish a new immutable snapshot for lock-free readers"""
+        self.version += 1
+        self.frozen_index = self.index.freeze(self.frozen_index)
+        self.snapshot = StorageSnapshot(
+            version=self.version,
+            records=tuple(self.live_sms_data),
+            index=self.frozen_index,
+            rollup=self.rollup.freeze(),
+            platform_counts=dict(self.platform_counts),
+            country_counts=self.country_counts.counts(),
+            hourly_stats=self._hourly_series(HOURLY_WINDOW),
+            analytics=dict(self.analytics),
+            last_update_time=self.last_update_time,
+            last_seq=self.last_seq,
+            stream_id=self.stream_id
+        )
         
-        # Update analytics
-        self._update_analytics()
+    def add_sms(self, sms_data, update_analytics=True, keep_seq=False):
+        """Add SMS to storage"""
+        started = time.perf_counter()
+        try:
+            return self._add_sms(sms_data, update_analytics, keep_seq)
+        finally:
+            self.add_latency.observe(time.perf_counter() - started)
+            
+    def _add_sms(self, sms_data, update_analytics, keep_seq):
+        with self.write_lock:
+            if not self.dedup_index.add(DedupIndex.fingerprint(sms_data)):
+                return False
+                
+            record = sms_data if isinstance(sms_data, SMSRecord) else SMSRecord.from_dict(sms_data)
+            if keep_seq:
+                # Replicated from the cluster leader; stay on its numbering
+                self.next_seq = record.seq
+            record.seq = self.next_seq
+            self.next_seq += 1
+            if len(self.live_sms_data) == self.live_sms_data.maxlen:
+                self.index.evict(self.live_sms_data[-1])
+            self.live_sms_data.appendleft(record)
+            self.index.add(record)
+            
+            platform = record.platform
+            country = record.country
+            
+            self.platform_counts[platform] += 1
+            self.country_counts.add(country)
+            
+            now = datetime.now()
+            self.rollup.add(record.epoch, record.platform_idx, record.country_idx)
+            self.analytics_engine.record(now.timestamp())
+            
+            self.history.append({
+                'time': now.isoformat(),
+                'action': 'new_sms',
+                'data': record
+            })
+            
+            self.last_update_time = now
+            
+            # Update analytics and publish
+            if update_analytics:
+                self._update_analytics()
+                self._publish()
+                if self.store is not None:
+                    self.store.append([record], self.snapshot)
+            return record
         
-        self.history.append({
-            'time': datetime.now().isoformat(),
-            'action': 'new_sms',
-            'data': sms_data
-        })
+    def add_sms_batch(self, sms_list, keep_seq=False):
+        """Add a fetched batch of SMS, refreshing analytics and the snapshot once"""
+        added = []
+        with self.write_lock:
+            for sms in sms_list:
+                record = self.add_sms(sms, update_analytics=False, keep_seq=keep_seq)
+                if record:
+                    added.append(record)
+            if added:
+                self._update_analytics()
+                self._publish()
+                if self.store is not None:
+                    self.store.append(added, self.snapshot)
+        if added:
+            for listener in self.batch_listeners:
+                listener(added)
+        return added
         
-        self.last_update_time = datetime.now()
-        return True
+    def subscribe(self, listener):
+        """Call listener(records) after every batch that stored new SMS"""
+        self.batch_listeners.append(listener)
+        
+    def subscribe_reset(self, listener):
+        """Call listener() after load_replica replaced the stream wholesale"""
+        self.reset_listeners.append(listener)
         
     def _update_analytics(self):
         """Update analytics data"""
-        # Calculate peak hours
-        hourly_data = self.hourly_stats
-        if hourly_data:
-            peak_hours = sorted(
-                [(h, sum(stats.values())) for h, stats in hourly_data.items()],
-                key=lambda x: x[1],
-                reverse=True
-            )[:3]
-            self.analytics['peak_hours'] = peak_hours
-            
-        # Trending countries
-        if self.country_counts:
-            trending = self.country_counts.most_common(5)
-            self.analytics['trending_countries'] = trending
-            
-        # SMS rate (last hour)
-        if self.last_update_time:
-            hour_ago = datetime.now() - timedelta(hours=1)
-            recent_sms = [sms for sms in self.live_sms_data 
-                         if datetime.fromisoformat(sms['timestamp']) > hour_ago]
-            self.analytics['sms_rate'] = len(recent_sms) / 60  # per minute
+        engine = self.analytics_engine
+        self.analytics['peak_hours'] = engine.top_hours()
+        self.analytics['trending_countries'] = [
+            (country, count) for country, count, _ in self.country_counts.top(TRENDING_LIMIT)
+        ]
+        self.analytics['sms_rate'] = engine.sms_rate()
+        self.analytics['burst_rate'] = engine.burst_rate()
+        
+    # Read helpers; each reads one consistent snapshot
+    def query_sms(self, platform='all', country='all', limit=50):
+        """Newest records matching the filters"""
+        return self.snapshot.query(platform, country, limit)
+        
+    def records_since(self, last_seq, max_gap=500):
+        """Records newer than last_seq (newest first), or None if a full reload is needed"""
+        return self.snapshot.records_since(last_seq, max_gap)
         
     def get_top_countries(self, limit=10):
         """Get top countries"""
-        return dict(self.country_counts.most_common(limit))
+        return self.snapshot.top_countries(limit)
+        
+    def timeseries(self, step=300, span=6 * 3600, platform='all', country='all', group_by=None):
+        """Counts per step over the last span seconds, from the rollups rather than raw records"""
+        return self.snapshot.rollup.series(
+            step, span,
+            platform=None if platform == 'all' else platform,
+            country=None if country == 'all' else country,
+            group_by=group_by
+        )
         
     def get_hourly_stats(self, hours=6):
         """Get hourly statistics"""
-        hours_list = sorted(self.hourly_stats.keys(), reverse=True)[:hours]
-        stats = []
-        for hour in hours_list:
-            stats.append({
-                'hour': hour,
-                'facebook': self.hourly_stats[hour]['facebook'],
-                'whatsapp': self.hourly_stats[hour]['whatsapp'],
-                'instagram': self.hourly_stats[hour]['instagram']
-            })
-        return stats
+        return self.snapshot.hourly(hours)
         
     def get_platform_percentages(self):
         """Get platform percentages"""
-        total = sum(self.platform_counts.values())
-        if total == 0:
-            return {}
-        return {
-            platform: (count / total * 100)
-            for platform, count in self.platform_counts.items()
-        }
+        return self.snapshot.platform_percentages()
         
     def clear(self):
         """Clear all data"""
+        with self.write_lock:
+            self._reset()
+            self._update_analytics()
+            self._publish()
+            
+    def _reset(self):
+        """Drop all state without publishing; callers hold write_lock"""
         self.live_sms_data.clear()
         self.platform_counts.clear()
+        self.platform_counts.update(dict.fromkeys(self.platforms, 0))
         self.country_counts.clear()
         self.range_counts.clear()
-        self.hourly_stats.clear()
-        self.sid_tracker.clear()
+        self.rollup.clear()
+        self.dedup_index.clear()
+        self.index.clear()
         self.history.clear()
+        self.analytics_engine.clear()
+        if self.store is not None:
+            self.store.clear()
+        self.generation += 1
+        self.frozen_index = None
+        
+    def load_replica(self, stream_id, records, platform_counts, country_counts):
+        """Replace local state with the cluster leader's; records oldest first"""
+        with self.write_lock:
+            # Readers keep the old snapshot until the whole replica is in place
+            self._reset()
+            self.stream_id = stream_id
+            added = []
+            for sms in records:
+                record = self.add_sms(sms, update_analytics=False, keep_seq=True)
+                if record:
+                    added.append(record)
+            # The leader's counters also cover history beyond its hot cache
+            self.platform_counts.clear()
+            self.platform_counts.update(dict.fromkeys(self.platforms, 0))
+            self.platform_counts.update(platform_counts)
+            self.country_counts.clear()
+            for country, count in country_counts.items():
+                self.country_counts.add(country, count)
+            self._update_analytics()
+            self._publish()
+            if self.store is not None and added:
+                self.store.append(added, self.snapshot)
+        for listener in self.reset_listeners:
+            listener()
+        return added
         
     def set_theme(self, theme):
         """Set color theme"""
@@ -317,13 +1741,258 @@ class EnhancedDataStorage:
             return True
         return False
 
+# Platform classification rules, highest priority first
+DEFAULT_PLATFORM_RULES = [
+    ('facebook', [
+        r'facebook', r'fb\.com', r'fb\.me', r'meta', r'face',
+        r'verify facebook', r'facebook code', r'fb code',
+        r'facebook login', r'fb login'
+    ]),
+    ('whatsapp', [
+        r'whatsapp', r'wa\.me', r'whats app', r'whats',
+        r'verify whatsapp', r'whatsapp code', r'wa code',
+        r'whatsapp login'
+    ]),
+    ('instagram', [
+        r'instagram', r'ig', r'insta',
+        r'verify instagram', r'instagram code', r'ig code',
+        r'instagram login'
+    ])
+]
+
+COUNTRY_CODE_PATTERN = re.compile(r'([A-Z]{2})')
+PHONE_PATTERN = re.compile(r'(\+\d{1,3}[\s\d\-\(\)]+|\d{10,})')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+class PlatformClassifier:
+    """Platform classifier compiled once from a priority-ordered rule table"""
+    def __init__(self, rules=None, default='facebook'):
+        self.rules = [(platform, list(patterns)) for platform, patterns in (rules or DEFAULT_PLATFORM_RULES)]
+        self.default = default
+        self.platforms = [platform for platform, _ in self.rules]
+        self.priority = {platform: rank for rank, (platform, _) in enumerate(self.rules)}
+        # Input is lowercased, so case folding is only needed for mixed-case rules
+        self.compiled = []
+        for platform, patterns in self.rules:
+            flags = re.IGNORECASE if any(p != p.lower() for p in patterns) else 0
+            self.compiled.append((platform, re.compile('|'.join(patterns), flags)))
+
+    @classmethod
+    def from_file(cls, path):
+        """Load rules from JSON: {"rules": [{"platform": ..., "patterns": [...]}], "default": ...}"""
+        with open(path, 'r') as f:
+            config = json.load(f)
+        rules = [(rule['platform'], rule['patterns']) for rule in config['rules']]
+        return cls(rules, default=config.get('default', rules[0][0]))
+
+    def classify_text(self, text):
+        """Return the platform for already-lowercased text"""
+        for platform, pattern in self.compiled:
+            if pattern.search(text):
+                return platform
+        return self.default
+
+    def classify(self, sid, message, raw_text=""):
+        return self.classify_text((sid + " " + message + " " + raw_text).lower())
+
+    def classify_batch(self, rows):
+        """Classify extracted (first_col, sid, message) table rows"""
+        classify_text = self.classify_text
+        return [
+            classify_text((sid + " " + message + " " + first_col).lower())
+            for first_col, sid, message in rows
+        ]
+
+
+def create_platform_classifier():
+    """Build the classifier, honouring an optional IVAS_PLATFORM_RULES file"""
+    path = os.environ.get('IVAS_PLATFORM_RULES')
+    if path:
+        try:
+            classifier = PlatformClassifier.from_file(path)
+            logger.info(f"Loaded platform rules from {path}: {classifier.platforms}")
+            return classifier
+        except Exception as e:
+            logger.error(f"Error loading platform rules from {path}: {e}")
+    return PlatformClassifier()
+
+
+platform_classifier = create_platform_classifier()
+
 # Initialize data storage
-data_storage = EnhancedDataStorage()
+data_storage = EnhancedDataStorage(
+    max_sms=int(os.environ.get('IVAS_MAX_SMS', 2000)),
+    platforms=platform_classifier.platforms,
+    # Seconds a fingerprint blocks re-delivery of the same SMS; unset keeps it until evicted
+    dedup_ttl=float(os.environ['IVAS_DEDUP_TTL']) if os.environ.get('IVAS_DEDUP_TTL') else None,
+    store=create_sms_store(),
+    country_capacity=int(os.environ.get('IVAS_COUNTRY_SKETCH_CAPACITY', 256)),
+    range_capacity=int(os.environ.get('IVAS_RANGE_SKETCH_CAPACITY', 512))
+)
+if data_storage.store is not None:
+    atexit.register(data_storage.store.close)
+RESUME_MAX_GAP = int(os.environ.get('IVAS_RESUME_MAX_GAP', 500))
+
+
+class FetchError(Exception):
+    """The live test SMS page could not be downloaded"""
+
+
+# Portal page parser backends
+ParsedPage = namedtuple('ParsedPage', ['rows', 'ranges', 'table_rows', 'early_exit'])
+PageTicket = namedtuple('PageTicket', ['parsed', 'stored'])  # futures for a page submitted to the pipeline
+# Validators and hashes of a response; the scraper only remembers them once the page is stored
+FetchedPage = namedtuple('FetchedPage', ['html_content', 'response_at', 'full_scan',
+                                         'etag', 'last_modified', 'body_hash', 'table_hash'],
+                         defaults=(None, None, None, None))
+
+RANGE_TEXT_PATTERN = re.compile(r'\+\d+|range|number')
+
+
+class SoupPageParser:
+    """BeautifulSoup extractor, kept as the tolerant fallback"""
+    name = 'soup'
+
+    def parse(self, html_content, seen_rows=()):
+        """Extract (first_col, sid, message) rows and range texts
+
+        Row extraction stops at the first row found in seen_rows.
+        """
+        soup = make_soup(html_content)
+        rows = []
+        table_rows = None
+        early_exit = False
+        sms_table = soup.find('table', {'id': 'LiveTestSMS'})
+        if sms_table:
+            table_rows = 0
+            for row in sms_table.find_all('tr'):
+                table_rows += 1
+                cols = row.find_all('td')
+                if len(cols) >= 3:
+                    row_data = tuple(col.get_text(strip=True) for col in cols[:3])
+                    if row_data in seen_rows:
+                        early_exit = True
+                        break
+                    rows.append(row_data)
+
+        ranges = []
+        range_section = soup.find('div', {'class': 'card-body'})
+        if range_section:
+            for element in range_section.find_all(['div', 'span', 'p']):
+                text = element.get_text(strip=True)
+                if RANGE_TEXT_PATTERN.search(text.lower()):
+                    ranges.append(text)
+
+        return ParsedPage(rows, ranges, table_rows, early_exit)
+
+
+class LxmlPageParser:
+    """Targeted lxml/XPath extractor for the LiveTestSMS table and ranges card"""
+    name = 'lxml'
 
-class IVASRealTimeScraper:
     def __init__(self):
-        self.scraper = cloudscraper.create_scraper()
-        self.base_url = "https://www.ivasms.com"
+        from lxml import etree
+        self.table_xpath = etree.XPath('//table[@id="LiveTestSMS"]')
+        self.range_section_xpath = etree.XPath(
+            '(//div[contains(concat(" ", normalize-space(@class), " "), " card-body ")])[1]'
+        )
+        self.range_elements_xpath = etree.XPath('.//*[self::div or self::span or self::p]')
+
+    @staticmethod
+    def _text(element):
+        """Equivalent of BeautifulSoup's get_text(strip=True)"""
+        return ''.join(part.strip() for part in element.itertext())
+
+    def parse(self, html_content, seen_rows=()):
+        """Extract (first_col, sid, message) rows and range texts
+
+        Row extraction stops at the first row found in seen_rows.
+        """
+        document = lxml_html.fromstring(html_content)
+        rows = []
+        table_rows = None
+        early_exit = False
+        tables = self.table_xpath(document) if 'LiveTestSMS' in html_content else []
+        if tables:
+            table_rows = 0
+            for row in tables[0].iter('tr'):
+                table_rows += 1
+                cols = list(row.iter('td'))
+                if len(cols) >= 3:
+                    row_data = tuple(self._text(col) for col in cols[:3])
+                    if row_data in seen_rows:
+                        early_exit = True
+                        break
+                    rows.append(row_data)
+
+        ranges = []
+        for range_section in self.range_section_xpath(document):
+            for element in self.range_elements_xpath(range_section):
+                text = self._text(element)
+                if RANGE_TEXT_PATTERN.search(text.lower()):
+                    ranges.append(text)
+
+        return ParsedPage(rows, ranges, table_rows, early_exit)
+
+
+PAGE_PARSERS = {
+    'lxml': LxmlPageParser,
+    'soup': SoupPageParser
+}
+
+
+def create_page_parser(name=None):
+    """Instantiate a parser backend, falling back to BeautifulSoup"""
+    name = name or os.environ.get('IVAS_PARSER', 'lxml')
+    if name == 'lxml' and lxml_html is None:
+        logger.warning("lxml is not installed, using BeautifulSoup parser")
+        name = 'soup'
+    return PAGE_PARSERS.get(name, SoupPageParser)()
+
+
+class AdaptivePollScheduler:
+    """Picks the next poll interval from recent traffic within fixed bounds"""
+    def __init__(self, base_interval=30, min_interval=5, max_interval=120,
+                 target_rows=10, tighten_factor=0.5, backoff_factor=1.5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_rows = target_rows
+        self.tighten_factor = tighten_factor
+        self.backoff_factor = backoff_factor
+        self.interval = self._clamp(base_interval)
+        self.lock = threading.Lock()  # fed by the fetcher and by parse workers
+
+    def _clamp(self, interval):
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def next_interval(self, new_rows, sms_rate=0):
+        """Tighten while new rows arrive, back off while the table is quiet"""
+        with self.lock:
+            if new_rows > 0:
+                interval = self.interval * self.tighten_factor
+                if sms_rate > 0:
+                    # Aim for roughly target_rows new rows per poll at the current rate
+                    interval = min(interval, 60 * self.target_rows / sms_rate)
+                self.interval = self._clamp(interval)
+            else:
+                self.interval = self._clamp(self.interval * self.backoff_factor)
+            return self.interval
+
+    def stats(self):
+        return {
+            'interval': round(self.interval, 3),
+            'min_interval': self.min_interval,
+            'max_interval': self.max_interval
+        }
+
+
+class IVASRealTimeScraper:
+    def __init__(self, classifier=None):
+        self._scraper = None  # built on first request, see the scraper property
+        self.session_lock = threading.Lock()
+        # Point at a local portal stand-in (benchmarks.replay_server) for load tests
+        self.base_url = os.environ.get('IVAS_BASE_URL', "https://www.ivasms.com").rstrip('/')
         self.logged_in = False
         self.csrf_token = None
         self.session_id = None
@@ -333,8 +2002,45 @@ class IVASRealTimeScraper:
         self.retry_delay = 5
         self.active = False
         self.fetch_count = 0
+        self.scheduler = AdaptivePollScheduler(
+            base_interval=self.fetch_interval,
+            min_interval=float(os.environ.get('IVAS_POLL_MIN_INTERVAL', 5)),
+            max_interval=float(os.environ.get('IVAS_POLL_MAX_INTERVAL', 120))
+        )
+        self.last_response_at = None
+        self.emit_latency = LatencyHistogram()
+        self.fetch_latency = LatencyHistogram()
+        self.decompress_latency = LatencyHistogram(LatencyHistogram.FAST_BUCKETS)
+        self.parse_row_latency = LatencyHistogram(LatencyHistogram.FAST_BUCKETS)
+        self.parser = create_page_parser()
+        self.classifier = classifier or create_platform_classifier()
+        # Newest table rows already ingested; the table is newest-first
+        self.high_water_mark = []
+        self.high_water_depth = 5
+        # Unchanged-page detection between polls
+        self.etag = None
+        self.last_modified = None
+        self.last_body_hash = None
+        self.last_table_hash = None
+        self.last_ranges = []
+        self.pipeline = None  # MonitoringPipeline, attached once the broadcaster exists
+        self.poll_stats = Counter({'parsed': 0, 'not_modified': 0, 'unchanged_body': 0, 'unchanged_table': 0, 'failed': 0})
+        self.stats_lock = threading.Lock()  # fetcher, parser and ingester threads all count polls
+        self.fallback_parser = SoupPageParser()
         
-        self.scraper.headers.update({
+    @property
+    def scraper(self):
+        """cloudscraper session, created on first use since building one is slow"""
+        if self._scraper is None:
+            with self.session_lock:
+                if self._scraper is None:
+                    self._scraper = self._create_scraper()
+        return self._scraper
+        
+    def _create_scraper(self):
+        import cloudscraper
+        scraper = cloudscraper.create_scraper()
+        scraper.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
             'Accept-Language': 'en-US,en;q=0.9',
@@ -348,13 +2054,17 @@ class IVASRealTimeScraper:
             'Cache-Control': 'max-age=0',
         })
         
-        self.set_cookies()
+        self.set_cookies(scraper)
+        return scraper
         
-    def set_cookies(self):
+    def set_cookies(self, scraper=None):
         """Set cookies for the scraper"""
+        scraper = scraper or self.scraper
         try:
+            host = urlparse(self.base_url).hostname or ''
+            domain = '.ivasms.com' if host.endswith('ivasms.com') else host
             for name, value in COOKIES.items():
-                self.scraper.cookies.set(name, value, domain='.ivasms.com')
+                scraper.cookies.set(name, value, domain=domain)
             logger.info("Cookies set successfully")
         except Exception as e:
             logger.error(f"Error setting cookies: {e}")
@@ -363,16 +2073,24 @@ class IVASRealTimeScraper:
         """Decompress response content if encoded"""
         encoding = response.headers.get('Content-Encoding', '').lower()
         content = response.content
+        started = time.perf_counter()
         
         try:
-            if encoding == 'gzip':
+            # urllib3 already decodes gzip (and br when brotli is installed); only undo what is left
+            if encoding == 'gzip' and content[:2] == b'\x1f\x8b':
                 content = gzip.decompress(content)
             elif encoding == 'br':
-                content = brotli.decompress(content)
+                import brotli
+                try:
+                    content = brotli.decompress(content)
+                except brotli.error:
+                    pass
             return content.decode('utf-8', errors='replace')
         except Exception as e:
             logger.error(f"Error decompressing response: {e}")
             return response.text
+        finally:
+            self.decompress_latency.observe(time.perf_counter() - started)
             
     def login_with_cookies(self):
         """Login to IVAS using cookies"""
@@ -387,7 +2105,7 @@ class IVASRealTimeScraper:
                 if 'logout' in html_content.lower() or 'Riyad Mahfuz' in html_content:
                     logger.info("Already logged in with cookies")
                     
-                    soup = BeautifulSoup(html_content, 'html.parser')
+                    soup = make_soup(html_content)
                     csrf_input = soup.find('input', {'name': '_token'})
                     if csrf_input:
                         self.csrf_token = csrf_input.get('value')
@@ -404,7 +2122,7 @@ class IVASRealTimeScraper:
             response = self.scraper.get(f"{self.base_url}/login", timeout=10)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(self.decompress_response(response), 'html.parser')
+                soup = make_soup(self.decompress_response(response))
                 csrf_input = soup.find('input', {'name': '_token'})
                 
                 if csrf_input:
@@ -424,157 +2142,242 @@ class IVASRealTimeScraper:
         data_storage.connection_status = False
         return False
         
-    def fetch_live_test_sms(self):
-        """Fetch live test SMS from IVAS portal"""
+    def fetch_live_test_sms(self, full_scan=False, animation='slideInRight', timeout=60):
+        """Fetch live test SMS from IVAS portal outside the poll schedule; returns the SMSRecords stored
+
+        The page goes through the monitoring pipeline like any poll, so the
+        ingester stays the only writer of storage and of the page state.
+        """
+        try:
+            fetched = self.fetch_page(full_scan)
+        except FetchError:
+            return []
+        if fetched is None:
+            return []
+        self.pipeline.start()
+        ticket = self.pipeline.submit(fetched, animation)
+        if ticket is None:
+            return []
+        return ticket.stored.result(timeout=timeout)
+        
+    def fetch_page(self, full_scan=False):
+        """Download the live test SMS page; None when it has not changed, FetchError when it failed"""
         if not self.logged_in:
             logger.warning("Not logged in, attempting to login...")
             if not self.login_with_cookies():
                 logger.error("Login failed, cannot fetch SMS")
-                return []
+                raise FetchError("Login failed")
                 
         try:
             logger.info(f"Fetch #{self.fetch_count + 1}: Live test SMS from IVAS...")
             
+            headers = {}
+            if not full_scan:
+                if self.etag:
+                    headers['If-None-Match'] = self.etag
+                if self.last_modified:
+                    headers['If-Modified-Since'] = self.last_modified
+                    
+            started = time.perf_counter()
             response = self.scraper.get(
                 f"{self.base_url}/portal/live/test_sms",
                 timeout=15,
-                allow_redirects=True
+                allow_redirects=True,
+                headers=headers or None
             )
+            self.fetch_latency.observe(time.perf_counter() - started)
             
+            self.last_response_at = time.monotonic()
+            if response.status_code == 304:
+                return self._skip_unchanged_poll('not_modified')
+                
             if response.status_code != 200:
                 logger.error(f"Failed to fetch SMS page: {response.status_code}")
-                return []
+                self.count_poll('failed')
+                raise FetchError(f"HTTP {response.status_code}")
                 
-            html_content = self.decompress_response(response)
-            soup = BeautifulSoup(html_content, 'html.parser')
-            sms_table = soup.find('table', {'id': 'LiveTestSMS'})
-            sms_list = []
-            
-            if sms_table:
-                rows = sms_table.find_all('tr')
-                logger.info(f"Found {len(rows)} rows in SMS table")
+            body_hash = hashlib.blake2b(response.content, digest_size=16).digest()
+            if not full_scan and body_hash == self.last_body_hash:
+                return self._skip_unchanged_poll('unchanged_body')
                 
-                for row in rows:
-                    cols = row.find_all('td')
-                    if len(cols) >= 3:
-                        first_col = cols[0].get_text(strip=True)
-                        sid = cols[1].get_text(strip=True) if len(cols) > 1 else "N/A"
-                        message = cols[2].get_text(strip=True) if len(cols) > 2 else ""
-                        
-                        country_match = re.search(r'([A-Z]{2})', first_col)
-                        country_code = country_match.group(1) if country_match else 'US'
-                        country = COUNTRIES.get(country_code, 'Unknown')
-                        
-                        phone_match = re.search(r'(\+\d{1,3}[\s\d\-\(\)]+|\d{10,})', first_col)
-                        phone_number = phone_match.group(1) if phone_match else ""
-                        
-                        if phone_number:
-                            phone_number = re.sub(r'\s+', '', phone_number)
-                        
-                        platform = self.detect_platform(sid, message, first_col)
-                        
-                        if platform in ['facebook', 'whatsapp', 'instagram']:
-                            sms_data = {
-                                'platform': platform,
-                                'country': country,
-                                'country_code': country_code,
-                                'sid': sid,
-                                'phone_number': phone_number,
-                                'message': message,
-                                'time': datetime.now().strftime("%H:%M:%S"),
-                                'timestamp': datetime.now().isoformat(),
-                                'raw_text': first_col,
-                                'id': hashlib.md5(f"{sid}{message}{datetime.now().timestamp()}".encode()).hexdigest()[:8]
-                            }
-                            sms_list.append(sms_data)
-                            
-                logger.info(f"Successfully parsed {len(sms_list)} SMS records")
-                
-            self.fetch_top_ranges(soup)
-            self.last_successful_fetch = datetime.now()
-            self.fetch_count += 1
+            html_content = self.decompress_response(response)
+            table_hash = self.table_region_hash(html_content)
+            if not full_scan and table_hash == self.last_table_hash:
+                return self._skip_unchanged_poll('unchanged_table')
             
-            return sms_list
+            return FetchedPage(html_content, self.last_response_at, full_scan,
+                               etag=response.headers.get('ETag'),
+                               last_modified=response.headers.get('Last-Modified'),
+                               body_hash=body_hash, table_hash=table_hash)
             
+        except FetchError:
+            raise
         except Exception as e:
             logger.error(f"Error fetching SMS: {e}")
-            return []
+            self.count_poll('failed')
+            raise FetchError(str(e)) from e
             
-    def fetch_top_ranges(self, soup=None):
-        """Fetch top ranges from the page"""
-        try:
-            if not soup:
-                response = self.scraper.get(f"{self.base_url}/portal/live/test_sms", timeout=10)
-                soup = BeautifulSoup(self.decompress_response(response), 'html.parser')
-                
-            range_section = soup.find('div', {'class': 'card-body'})
-            if range_section:
-                ranges = []
-                range_elements = range_section.find_all(['div', 'span', 'p'])
-                
-                for element in range_elements:
-                    text = element.get_text(strip=True)
-                    if re.search(r'\+\d+|range|number', text.lower()):
-                        ranges.append(text)
-                        
-                if ranges:
-                    logger.info(f"Found {len(ranges)} ranges")
-                    for range_text in ranges:
-                        data_storage.range_counts[range_text] += 1
-                        
-        except Exception as e:
-            logger.error(f"Error fetching ranges: {e}")
-            
-    def detect_platform(self, sid, message, raw_text=""):
-        """Detect platform from SMS data"""
-        combined_text = (sid + " " + message + " " + raw_text).lower()
+    def parse_fetched(self, fetched):
+        """Parse a fetched page into (sms_list oldest first, page); safe to run on several threads"""
+        seen_rows = () if fetched.full_scan else frozenset(self.high_water_mark)
+        started = time.perf_counter()
+        page = self.parse_page(fetched.html_content, seen_rows)
+        sms_list = []
         
-        facebook_patterns = [
-            r'facebook', r'fb\.com', r'fb\.me', r'meta', r'face',
-            r'verify facebook', r'facebook code', r'fb code',
-            r'facebook login', r'fb login'
-        ]
+        if page.table_rows is not None:
+            if page.early_exit:
+                logger.info(f"Scanned {page.table_rows} rows in SMS table, stopped at last seen row")
+            else:
+                logger.info(f"Found {page.table_rows} rows in SMS table")
+            # The table is newest-first; store oldest-first so seq grows with arrival order
+            sms_list = self.parse_rows(page.rows)[::-1]
+            if page.table_rows:
+                self.parse_row_latency.observe((time.perf_counter() - started) / page.table_rows)
+            logger.info(f"Successfully parsed {len(sms_list)} SMS records")
+        return sms_list, page
         
-        whatsapp_patterns = [
-            r'whatsapp', r'wa\.me', r'whats app', r'whats',
-            r'verify whatsapp', r'whatsapp code', r'wa code',
-            r'whatsapp login'
-        ]
+    def commit_page(self, page, fetched):
+        """Account for a parsed page once its rows are stored, in fetch order"""
+        # Until now a failed parse or ingest leaves the page to be fetched and parsed again
+        self.etag = fetched.etag
+        self.last_modified = fetched.last_modified
+        self.last_body_hash = fetched.body_hash
+        self.last_table_hash = fetched.table_hash
+        if page.table_rows is not None:
+            self.advance_high_water_mark(page.rows)
+        self.record_ranges(page.ranges)
+        self.last_ranges = page.ranges
+        self.count_poll('parsed')
+        self.last_successful_fetch = datetime.now()
         
-        instagram_patterns = [
-            r'instagram', r'ig', r'insta',
-            r'verify instagram', r'instagram code', r'ig code',
-            r'instagram login'
-        ]
+    def _skip_unchanged_poll(self, reason):
+        """Account for a poll whose page did not change since the last parse"""
+        logger.info(f"SMS page unchanged ({reason}), skipping parse")
+        self.count_poll(reason)
+        self.record_ranges(self.last_ranges)
+        self.last_successful_fetch = datetime.now()
+        return None
         
-        for pattern in facebook_patterns:
-            if re.search(pattern, combined_text, re.IGNORECASE):
-                return 'facebook'
-                
-        for pattern in whatsapp_patterns:
-            if re.search(pattern, combined_text, re.IGNORECASE):
-                return 'whatsapp'
+    def count_poll(self, outcome):
+        """Count one poll by outcome; every outcome but a failure is a completed fetch"""
+        with self.stats_lock:
+            self.poll_stats[outcome] += 1
+            if outcome != 'failed':
+                self.fetch_count += 1
                 
-        for pattern in instagram_patterns:
-            if re.search(pattern, combined_text, re.IGNORECASE):
-                return 'instagram'
+    def poll_counts(self):
+        """Consistent copy of the per-outcome poll counters"""
+        with self.stats_lock:
+            return dict(self.poll_stats)
+        
+    @staticmethod
+    def table_region_hash(html_content):
+        """Hash just the LiveTestSMS table markup, or the whole page without it"""
+        region = html_content
+        start = html_content.find('LiveTestSMS')
+        if start != -1:
+            end = html_content.find('</table>', start)
+            if end != -1:
+                region = html_content[start:end]
+        return hashlib.blake2b(region.encode('utf-8', errors='replace'), digest_size=16).digest()
+            
+    def parse_page(self, html_content, seen_rows=()):
+        """Parse a portal page with the configured backend"""
+        try:
+            return self.parser.parse(html_content, seen_rows)
+        except Exception as e:
+            if self.parser is self.fallback_parser:
+                raise
+            logger.warning(f"{self.parser.name} parser failed ({e}), falling back to BeautifulSoup")
+            return self.fallback_parser.parse(html_content, seen_rows)
+            
+    def advance_high_water_mark(self, new_rows):
+        """Remember the newest rows so the next poll can stop at them"""
+        if new_rows:
+            self.high_water_mark = (list(new_rows[:self.high_water_depth]) + self.high_water_mark)[:self.high_water_depth]
+            
+    def reset_high_water_mark(self):
+        """Force the next poll to re-scan the whole table"""
+        self.high_water_mark = []
+        self.etag = None
+        self.last_modified = None
+        self.last_body_hash = None
+        self.last_table_hash = None
+            
+    def parse_rows(self, rows):
+        """Turn extracted (first_col, sid, message) rows into SMS dicts"""
+        sms_list = []
+        now = datetime.now()
+        time_str = now.strftime("%H:%M:%S")
+        timestamp = now.isoformat()
+        platforms = self.classifier.classify_batch(rows)
+        
+        for (first_col, sid, message), platform in zip(rows, platforms):
+            if platform not in self.classifier.priority:
+                continue
                 
-        return 'facebook'
+            country_match = COUNTRY_CODE_PATTERN.search(first_col)
+            country_code = country_match.group(1) if country_match else 'US'
+            country = COUNTRIES.get(country_code, 'Unknown')
+            
+            phone_match = PHONE_PATTERN.search(first_col)
+            phone_number = phone_match.group(1) if phone_match else ""
+            
+            if phone_number:
+                phone_number = WHITESPACE_PATTERN.sub('', phone_number)
+            
+            sms_list.append({
+                'platform': platform,
+                'country': country,
+                'country_code': country_code,
+                'sid': sid,
+                'phone_number': phone_number,
+                'message': message,
+                'time': time_str,
+                'timestamp': timestamp,
+                'raw_text': first_col,
+                'id': hashlib.md5(f"{sid}{message}{phone_number}{timestamp}".encode()).hexdigest()[:8]
+            })
+        return sms_list
+            
+    def fetch_top_ranges(self, html_content=None):
+        """Fetch top ranges from the page"""
+        try:
+            if html_content is None:
+                response = self.scraper.get(f"{self.base_url}/portal/live/test_sms", timeout=10)
+                html_content = self.decompress_response(response)
+            self.record_ranges(self.parse_page(html_content).ranges)
+                        
+        except Exception as e:
+            logger.error(f"Error fetching ranges: {e}")
+            
+    def record_ranges(self, ranges):
+        """Count range texts found on the page"""
+        if ranges:
+            logger.info(f"Found {len(ranges)} ranges")
+            for range_text in ranges:
+                data_storage.range_counts.add(range_text)
+            
+    def detect_platform(self, sid, message, raw_text=""):
+        """Detect platform from SMS data"""
+        return self.classifier.classify(sid, message, raw_text)
         
     def start_monitoring(self):
         """Start monitoring IVAS for real-time updates"""
         self.active = True
-        monitoring_thread = threading.Thread(target=self._monitoring_loop, daemon=True)
+        self.pipeline.start()
+        monitoring_thread = threading.Thread(target=self._monitoring_loop, name='ivas-fetcher', daemon=True)
         monitoring_thread.start()
         logger.info("Started IVAS monitoring with enhanced animations")
         
     def stop_monitoring(self):
         """Stop monitoring"""
         self.active = False
+        self.pipeline.stop()
         logger.info("Stopped IVAS monitoring")
         
     def _monitoring_loop(self):
-        """Main monitoring loop"""
+        """Fetcher stage: poll the portal and hand changed pages to the parser pool"""
         retry_count = 0
         
         while self.active:
@@ -583,44 +2386,16 @@ class IVASRealTimeScraper:
                     self.login_with_cookies()
                     
                 if self.logged_in:
-                    new_sms = self.fetch_live_test_sms()
+                    fetched = self.fetch_page()
                     
-                    if new_sms:
-                        processed_count = 0
-                        animation_data = {
-                            'facebook': 0,
-                            'whatsapp': 0,
-                            'instagram': 0
-                        }
-                        
-                        for sms in new_sms:
-                            if data_storage.add_sms(sms):
-                                processed_count += 1
-                                animation_data[sms['platform']] += 1
-                                
-                                # Enhanced socket emit with animation data
-                                socketio.emit('new_sms', {
-                                    **sms,
-                                    'animation': f"slideInRight-{sms['platform']}"
-                                })
-                                
-                        logger.info(f"Processed {processed_count} new SMS")
-                        
-                        # Emit batch update with animation info
-                        socketio.emit('data_update', {
-                            'total_sms': len(data_storage.live_sms_data),
-                            'platform_counts': dict(data_storage.platform_counts),
-                            'last_update': datetime.now().isoformat(),
-                            'animations': animation_data,
-                            'theme': data_storage.theme
-                        })
-                        
-                        # Special animation for batch
-                        if processed_count > 0:
-                            socketio.emit('batch_animation', {
-                                'count': processed_count,
-                                'platform_breakdown': animation_data
-                            })
+                    if fetched is None:
+                        self._schedule_next(0)
+                    else:
+                        # Blocks only while the parser queue is full. The page is parsed while
+                        # this thread sleeps, and its row count paces the poll after next.
+                        ticket = self.pipeline.submit(fetched)
+                        if ticket is not None:
+                            ticket.parsed.add_done_callback(lambda parsed: self._schedule_next(parsed.result()))
                         
                     retry_count = 0
                     
@@ -628,6 +2403,9 @@ class IVASRealTimeScraper:
                     logger.warning("Not logged in, retrying login...")
                     retry_count += 1
                     
+            except FetchError:
+                # Already logged and counted by fetch_page
+                retry_count += 1
             except Exception as e:
                 logger.error(f"Monitoring error: {e}")
                 retry_count += 1
@@ -637,10 +2415,994 @@ class IVASRealTimeScraper:
                 logger.info(f"Retrying in {delay} seconds...")
                 time.sleep(delay)
             else:
+                # Whatever the last parsed page asked for; the current one may still be parsing
+                self.fetch_interval = self.scheduler.interval
+                logger.info(f"Next poll in {self.fetch_interval:.1f} seconds")
                 time.sleep(self.fetch_interval)
+                
+    def _schedule_next(self, new_rows):
+        """Feed a poll's new row count to the scheduler; runs on the fetcher or a parse worker"""
+        self.scheduler.next_interval(new_rows, data_storage.snapshot.analytics.get('sms_rate', 0))
 
 # Initialize scraper
-ivas_scraper = IVASRealTimeScraper()
+ivas_scraper = IVASRealTimeScraper(platform_classifier)
+
+class SocketBroadcaster:
+    """Coalesces stored SMS into one sms_batch event per flush window
+
+    Like /api/live-sms and resume_data, an sms_batch lists its records newest
+    first (highest seq first).
+    """
+    def __init__(self, socketio, flush_window=0.5, latency_histogram=None):
+        self.socketio = socketio
+        self.flush_window = flush_window
+        self.latency_histogram = latency_histogram
+        self.emit_duration = LatencyHistogram()
+        self.lock = threading.Lock()
+        self.pending = {}  # animation -> [(record, seen_at)]
+        self.timer = None
+        self.batches_sent = 0
+        self.records_sent = 0
+        self.clients = 0
+
+    def client_connected(self):
+        with self.lock:
+            self.clients += 1
+
+    def client_disconnected(self):
+        with self.lock:
+            self.clients = max(0, self.clients - 1)
+
+    def publish(self, records, animation='slideInRight', seen_at=None):
+        """Queue stored records for the next sms_batch frame"""
+        if not records:
+            return
+        with self.lock:
+            self.pending.setdefault(animation, []).extend((record, seen_at) for record in records)
+            if self.flush_window <= 0:
+                flush_now = True
+            else:
+                flush_now = False
+                if self.timer is None:
+                    self.timer = threading.Timer(self.flush_window, self.flush)
+                    self.timer.daemon = True
+                    self.timer.start()
+        if flush_now:
+            self.flush()
+
+    def flush(self):
+        """Emit everything queued so far, one broadcast per animation kind"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.timer = None
+        snap = data_storage.snapshot
+        for animation, entries in pending.items():
+            entries.sort(key=lambda entry: entry[0].seq, reverse=True)
+            delta = Counter(record.platform for record, _ in entries)
+            started = time.perf_counter()
+            # One payload per frame: python-socketio encodes broadcasts once for all clients
+            self.socketio.emit('sms_batch', {
+                'sms_list': [record for record, _ in entries],
+                'animation': animation,
+                'counters': {
+                    'count': len(entries),
+                    'delta': dict(delta),
+                    'total_sms': snap.total,
+                    'platform_counts': snap.platform_counts
+                },
+                'last_update': datetime.now().isoformat(),
+                'last_seq': entries[0][0].seq,
+                'stream_id': snap.stream_id,
+                'theme': data_storage.theme
+            })
+            self.emit_duration.observe(time.perf_counter() - started)
+            self.batches_sent += 1
+            self.records_sent += len(entries)
+            if self.latency_histogram is not None:
+                emitted_at = time.monotonic()
+                for _, seen_at in entries:
+                    if seen_at is not None:
+                        self.latency_histogram.observe(emitted_at - seen_at)
+
+    def stats(self):
+        return {
+            'flush_window': self.flush_window,
+            'batches_sent': self.batches_sent,
+            'records_sent': self.records_sent,
+            'clients': self.clients
+        }
+
+class SSEHub:
+    """Event-driven Server-Sent Events fan-out; idle streams block instead of polling"""
+    def __init__(self, storage, heartbeat_interval=15, initial_backlog=10):
+        self.storage = storage
+        self.heartbeat_interval = heartbeat_interval
+        self.initial_backlog = initial_backlog
+        self.condition = threading.Condition()
+        self.clients = 0
+        self.events_sent = 0
+        storage.subscribe(self.notify)
+        storage.subscribe_reset(self.notify)
+
+    def notify(self, records=None):
+        """Wake every waiting stream"""
+        with self.condition:
+            self.condition.notify_all()
+
+    def _parse_event_id(self, last_event_id):
+        """Return the sequence number from '<stream_id>-<seq>' if it belongs to this stream"""
+        if not last_event_id:
+            return None
+        stream_id, _, seq = last_event_id.rpartition('-')
+        if stream_id != self.storage.stream_id:
+            return -1
+        try:
+            return int(seq)
+        except ValueError:
+            return -1
+
+    @staticmethod
+    def _reset_event(reason, snap):
+        return f"event: reset\ndata: {json.dumps({'reason': reason, 'last_seq': snap.last_seq})}\n\n"
+
+    def _event(self, record):
+        self.events_sent += 1
+        return f"id: {self.storage.stream_id}-{record.seq}\ndata: ".encode('utf-8') + record.to_json() + b"\n\n"
+
+    def stream(self, last_event_id=None):
+        """Generator yielding each stored SMS exactly once, oldest first"""
+        storage = self.storage
+        cursor = self._parse_event_id(last_event_id)
+        with self.condition:
+            self.clients += 1
+        try:
+            yield f"retry: 3000\n\n"
+            snap = storage.snapshot
+            stream_id = snap.stream_id
+            if cursor is None:
+                backlog = snap.query(limit=self.initial_backlog)
+                cursor = backlog[0].seq if backlog else snap.last_seq
+                for record in reversed(backlog):
+                    yield self._event(record)
+            else:
+                missed = snap.records_since(cursor, RESUME_MAX_GAP)
+                if missed is None:
+                    yield self._reset_event('gap too large, full reload', snap)
+                    cursor = snap.last_seq
+
+            while True:
+                snap = storage.snapshot
+                if snap.stream_id != stream_id:
+                    # A follower resynced onto a new leader stream; its seq may even be lower
+                    yield self._reset_event('stream restarted', snap)
+                    stream_id = snap.stream_id
+                    cursor = snap.last_seq
+                    continue
+                if snap.last_seq > cursor:
+                    records = snap.records_since(cursor, len(snap.records))
+                    if records is None:
+                        yield self._reset_event('stream restarted', snap)
+                        cursor = snap.last_seq
+                        continue
+                    for record in reversed(records):
+                        yield self._event(record)
+                    if records:
+                        cursor = records[0].seq
+                    continue
+
+                with self.condition:
+                    woke = self.condition.wait_for(
+                        lambda: storage.snapshot.last_seq > cursor or storage.snapshot.stream_id != stream_id,
+                        self.heartbeat_interval
+                    )
+                if not woke:
+                    yield ": heartbeat\n\n"
+        finally:
+            with self.condition:
+                self.clients -= 1
+
+    def stats(self):
+        return {
+            'clients': self.clients,
+            'events_sent': self.events_sent,
+            'heartbeat_interval': self.heartbeat_interval
+        }
+
+sse_hub = SSEHub(data_storage, heartbeat_interval=float(os.environ.get('IVAS_SSE_HEARTBEAT', 15)))
+
+sms_broadcaster = SocketBroadcaster(
+    socketio,
+    flush_window=float(os.environ.get('IVAS_BROADCAST_WINDOW', 0.5)),
+    latency_histogram=ivas_scraper.emit_latency
+)
+
+class PipelineStage:
+    """Worker threads draining a bounded queue; a full queue blocks the producer"""
+    def __init__(self, name, handler, workers=1, maxsize=4):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.maxsize = maxsize
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stopped = threading.Event()
+        self.threads = []
+        self.wait_latency = LatencyHistogram()     # time spent queued
+        self.handler_latency = LatencyHistogram()  # time spent in handler
+        self.processed = 0
+        self.errors = 0
+
+    def start(self):
+        """Start fresh workers on a fresh queue; leftovers from a previous run are dropped"""
+        self.queue = queue.Queue(maxsize=self.maxsize)
+        self.stopped = threading.Event()
+        self.threads = [
+            threading.Thread(target=self._work, args=(self.queue, self.stopped),
+                             name=f'ivas-{self.name}-{i}', daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self, timeout=2):
+        """Let the workers drain what is queued, then exit"""
+        self.stopped.set()
+        deadline = time.monotonic() + timeout
+        for thread in self.threads:
+            thread.join(max(0, deadline - time.monotonic()))
+
+    def put(self, item):
+        """Queue item, blocking while the stage is full; False if it stopped meanwhile"""
+        entry = (time.monotonic(), item)
+        while True:
+            try:
+                self.queue.put(entry, timeout=0.5)
+                return True
+            except queue.Full:
+                if self.stopped.is_set():
+                    return False
+
+    def _work(self, work_queue, stopped):
+        while True:
+            try:
+                queued_at, item = work_queue.get(timeout=0.5)
+            except queue.Empty:
+                if stopped.is_set():
+                    return
+                continue
+            started = time.monotonic()
+            self.wait_latency.observe(started - queued_at)
+            try:
+                self.handler(item)
+                self.processed += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Pipeline stage {self.name} failed: {e}")
+            self.handler_latency.observe(time.monotonic() - started)
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'depth': self.queue.qsize(),
+            'capacity': self.maxsize,
+            'processed': self.processed,
+            'errors': self.errors,
+            'wait': self.wait_latency.snapshot(),
+            'latency': self.handler_latency.snapshot()
+        }
+
+class MonitoringPipeline:
+    """fetch -> parse pool -> single-writer ingest -> broadcast, over bounded queues
+
+    The scraper's monitoring loop is the fetch stage. Parsers may finish out of
+    order, so the ingester reorders pages by fetch sequence before storing them
+    and advancing the high-water mark.
+    """
+    def __init__(self, scraper, storage, broadcaster, parse_workers=2, queue_size=4):
+        self.scraper = scraper
+        self.storage = storage
+        self.broadcaster = broadcaster
+        self.parse = PipelineStage('parse', self._parse, workers=parse_workers, maxsize=queue_size)
+        self.ingest = PipelineStage('ingest', self._ingest, maxsize=queue_size)
+        self.broadcast = PipelineStage('broadcast', self._broadcast, maxsize=queue_size)
+        self.stages = (self.parse, self.ingest, self.broadcast)
+        self.next_fetch = 0
+        self.next_ingest = 0
+        self.reorder = {}  # fetch sequence -> parsed page waiting for its predecessors
+        self.running = False
+        self.lock = threading.Lock()  # the fetcher and manual refreshes both submit pages
+
+    def start(self):
+        """Start the stages unless they already run"""
+        with self.lock:
+            if self.running:
+                return
+            self.next_fetch = 0
+            self.next_ingest = 0
+            self.reorder = {}
+            for stage in self.stages:
+                stage.start()
+            self.running = True
+
+    def stop(self):
+        with self.lock:
+            self.running = False
+            # Upstream first so each stage drains into a still-running successor
+            for stage in self.stages:
+                stage.stop()
+
+    def submit(self, fetched, animation='slideInRight'):
+        """Queue a fetched page for parsing; blocks while the parser queue is full
+
+        Returns a PageTicket whose `parsed` future resolves to the number of
+        rows above the high-water mark the page parsed to, and whose `stored`
+        future resolves to the SMSRecords the ingester stored from it. None if
+        the pipeline is stopped.
+        """
+        ticket = PageTicket(concurrent.futures.Future(), concurrent.futures.Future())
+        with self.lock:
+            if not self.running:
+                return None
+            seq = self.next_fetch
+            self.next_fetch += 1
+        if not self.parse.put((seq, fetched, ticket, animation)):
+            return None
+        return ticket
+
+    def _parse(self, item):
+        seq, fetched, ticket, animation = item
+        try:
+            sms_list, page = self.scraper.parse_fetched(fetched)
+        except Exception as e:
+            # Still pass the slot on, or the ingester would wait for it forever
+            logger.error(f"Error parsing SMS page: {e}")
+            self.scraper.count_poll('failed')
+            sms_list, page = [], None
+        ticket.parsed.set_result(len(page.rows) if page is not None else 0)
+        self.ingest.put((seq, sms_list, page, fetched, ticket, animation))
+
+    def _ingest(self, item):
+        self.reorder[item[0]] = item
+        while self.next_ingest in self.reorder:
+            _, sms_list, page, fetched, ticket, animation = self.reorder.pop(self.next_ingest)
+            self.next_ingest += 1
+            if page is None:
+                ticket.stored.set_result([])
+                continue
+            try:
+                added = self.storage.add_sms_batch(sms_list) if sms_list else []
+            except Exception as e:
+                # Nothing committed: the next poll fetches and parses this page again
+                logger.error(f"Error storing SMS page: {e}")
+                self.ingest.errors += 1
+                ticket.stored.set_exception(e)
+                continue
+            self.scraper.commit_page(page, fetched)
+            ticket.stored.set_result(added)
+            if added:
+                logger.info(f"Processed {len(added)} new SMS")
+                self.broadcast.put((added, fetched.response_at, animation))
+
+    def _broadcast(self, item):
+        added, response_at, animation = item
+        # Coalesced broadcast carries records and counters in one frame
+        self.broadcaster.publish(added, animation, seen_at=response_at)
+
+    def stats(self):
+        return {
+            'reorder_pending': len(self.reorder),
+            'stages': {stage.name: stage.stats() for stage in self.stages}
+        }
+
+ivas_scraper.pipeline = MonitoringPipeline(
+    ivas_scraper, data_storage, sms_broadcaster,
+    parse_workers=int(os.environ.get('IVAS_PARSE_WORKERS', 2)),
+    queue_size=int(os.environ.get('IVAS_PIPELINE_QUEUE_SIZE', 4))
+)
+
+class ClusterCoordinator:
+    """Multi-process mode: the worker holding a file lock scrapes, the others follow it
+
+    The leader serves a Unix socket in the cluster directory and pushes every
+    stored batch to each follower as a length-prefixed JSON frame. Followers
+    mirror its storage, keeping its sequence numbers and stream id, and serve
+    their own HTTP/Socket.IO clients from that. Followers forward control actions
+    (clear, refresh, monitoring, theme) to the leader. One of them takes over
+    when the leader's lock is released.
+    """
+    FRAME_HEADER = struct.Struct('>I')
+
+    def __init__(self, directory, storage, scraper, broadcaster, sync_interval=2.0, follower_queue=256):
+        self.directory = directory
+        self.storage = storage
+        self.scraper = scraper
+        self.broadcaster = broadcaster
+        self.sync_interval = sync_interval
+        self.follower_queue = follower_queue
+        self.role = 'standalone'
+        self.actions = {}  # control action name -> callable, run on the leader
+        self.on_leader = None
+        self.lock_file = None
+        self.server = None
+        self.followers = {}  # connection -> outgoing frame queue
+        self.followers_lock = threading.Lock()
+        self.leader_conn = None
+        self.send_lock = threading.Lock()
+        self.frames_sent = 0
+        self.frames_received = 0
+        self.followers_dropped = 0
+        storage.subscribe(self._on_batch)
+
+    @property
+    def enabled(self):
+        return self.directory is not None
+
+    @property
+    def is_follower(self):
+        return self.role == 'follower'
+
+    @property
+    def socket_path(self):
+        return os.path.join(self.directory, 'bus.sock')
+
+    def start(self, on_leader):
+        """Join the cluster; on_leader() runs once this worker wins the leader lock"""
+        if fcntl is None:
+            raise RuntimeError("Cluster mode needs fcntl file locks (Unix only)")
+        os.makedirs(self.directory, exist_ok=True)
+        self.on_leader = on_leader
+        self.lock_file = open(os.path.join(self.directory, 'leader.lock'), 'a+')
+        try:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self.role = 'follower'
+            if self.storage.store is not None:
+                self.storage.store.read_only = True
+            threading.Thread(target=self._follow, name='ivas-cluster-follow', daemon=True).start()
+            threading.Thread(target=self._await_leadership, name='ivas-cluster-lock', daemon=True).start()
+            logger.info(f"Cluster follower (pid {os.getpid()}), leader socket {self.socket_path}")
+            return
+        self._lead()
+
+    # Leader side
+    def _await_leadership(self):
+        fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+        logger.info(f"Leader lock acquired by pid {os.getpid()}, taking over scraping")
+        self._lead()
+
+    def _lead(self):
+        self.role = 'leader'
+        if self.leader_conn is not None:
+            self._close(self.leader_conn)
+        if self.storage.store is not None:
+            self.storage.store.read_only = False
+        # Status mirrored from the old leader; this worker starts from scratch
+        self.scraper.logged_in = False
+        self.scraper.active = False
+        # We hold the lock, so any socket file left behind is stale
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socket_path)
+        self.server.listen(64)
+        threading.Thread(target=self._accept_loop, name='ivas-cluster-accept', daemon=True).start()
+        threading.Thread(target=self._state_loop, name='ivas-cluster-state', daemon=True).start()
+        logger.info(f"Cluster leader (pid {os.getpid()}) on {self.socket_path}")
+        self.on_leader()
+
+    def _accept_loop(self):
+        while True:
+            conn, _ = self.server.accept()
+            outgoing = queue.Queue(maxsize=self.follower_queue)
+            # Register and snapshot together so no batch falls between sync and stream
+            with self.storage.write_lock:
+                outgoing.put(self._encode(self._sync_message()))
+                with self.followers_lock:
+                    self.followers[conn] = outgoing
+            threading.Thread(target=self._send_loop, args=(conn, outgoing), daemon=True).start()
+            threading.Thread(target=self._command_loop, args=(conn,), daemon=True).start()
+
+    def _send_loop(self, conn, outgoing):
+        while True:
+            frame = outgoing.get()
+            if frame is None:
+                break
+            try:
+                conn.sendall(frame)
+                self.frames_sent += 1
+            except OSError:
+                break
+        self._drop(conn)
+
+    def _command_loop(self, conn):
+        for message in self._frames(conn):
+            if message.get('type') == 'command':
+                try:
+                    self.control(message['name'], **message.get('params', {}))
+                except Exception as e:
+                    logger.error(f"Cluster command {message.get('name')} failed: {e}")
+        self._drop(conn)
+
+    def _drop(self, conn):
+        with self.followers_lock:
+            outgoing = self.followers.pop(conn, None)
+        if outgoing is not None:
+            try:
+                outgoing.put_nowait(None)
+            except queue.Full:
+                pass  # the sender fails on the closed socket instead
+            self._close(conn)
+
+    def _state_loop(self):
+        while True:
+            time.sleep(self.sync_interval)
+            self.publish(self._state_message())
+
+    def publish(self, message):
+        """Send message to every follower; one that has fallen too far behind is cut off and resyncs"""
+        if self.role != 'leader' or not self.followers:
+            return
+        frame = self._encode(message)
+        with self.followers_lock:
+            followers = list(self.followers.items())
+        for conn, outgoing in followers:
+            try:
+                outgoing.put_nowait(frame)
+            except queue.Full:
+                self.followers_dropped += 1
+                logger.warning("Cluster follower fell behind, disconnecting it")
+                self._drop(conn)
+
+    def _on_batch(self, records):
+        if self.role == 'leader':
+            self.publish({'type': 'batch', 'records': records})
+
+    def _sync_message(self):
+        snap = self.storage.snapshot
+        return {
+            'type': 'sync',
+            'stream_id': snap.stream_id,
+            'records': list(reversed(snap.records)),
+            'platform_counts': snap.platform_counts,
+            'country_counts': snap.country_counts,
+            'state': self._state_message()
+        }
+
+    def _state_message(self):
+        scraper = self.scraper
+        return {
+            'type': 'state',
+            'theme': self.storage.theme,
+            'ranges': self.storage.range_counts.counts(),
+            'logged_in': scraper.logged_in,
+            'active': scraper.active,
+            'fetch_count': scraper.fetch_count,
+            'last_fetch': scraper.last_successful_fetch.isoformat() if scraper.last_successful_fetch else None
+        }
+
+    # Follower side
+    def _follow(self):
+        while self.role == 'follower':
+            try:
+                conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                conn.connect(self.socket_path)
+            except OSError:
+                time.sleep(1)
+                continue
+            self.leader_conn = conn
+            for message in self._frames(conn):
+                self.frames_received += 1
+                try:
+                    self._apply(message)
+                except Exception as e:
+                    logger.error(f"Error applying cluster {message.get('type')} frame: {e}")
+            self.leader_conn = None
+            if self.role == 'follower':
+                logger.warning("Lost the cluster leader, reconnecting")
+                time.sleep(1)
+
+    def _apply(self, message):
+        kind = message['type']
+        storage = self.storage
+        if kind == 'batch':
+            records = [SMSRecord.from_dict(item) for item in message['records']]
+            added = storage.add_sms_batch([r for r in records if r.seq > storage.last_seq], keep_seq=True)
+            self.broadcaster.publish(added, 'slideInRight')
+        elif kind == 'sync':
+            records = [SMSRecord.from_dict(item) for item in message['records']]
+            oldest = records[0].seq if records else storage.last_seq + 1
+            if message['stream_id'] == storage.snapshot.stream_id and oldest <= storage.last_seq + 1:
+                # Same stream and no gap: just catch up on what we missed
+                added = storage.add_sms_batch([r for r in records if r.seq > storage.last_seq], keep_seq=True)
+                self.broadcaster.publish(added, 'slideInRight')
+            else:
+                storage.load_replica(message['stream_id'], records,
+                                     message['platform_counts'], message['country_counts'])
+            logger.info(f"Synced with cluster leader at seq {storage.last_seq}")
+            self._apply(message['state'])
+        elif kind == 'state':
+            storage.set_theme(message['theme'])
+            storage.range_counts.clear()
+            for range_text, count in message['ranges'].items():
+                storage.range_counts.add(range_text, count)
+            self.scraper.logged_in = message['logged_in']
+            self.scraper.active = message['active']
+            self.scraper.fetch_count = message['fetch_count']
+            if message['last_fetch']:
+                self.scraper.last_successful_fetch = datetime.fromisoformat(message['last_fetch'])
+        elif kind == 'clear':
+            storage.clear()
+            socketio.emit('clear_animation', {'action': 'clear'})
+
+    # Control actions
+    def control(self, name, **params):
+        """Run a control action here, or hand it to the leader when this worker follows
+
+        Returns the action's result, or None when it was forwarded.
+        """
+        if self.role == 'follower':
+            conn = self.leader_conn
+            if conn is None:
+                raise RuntimeError("Cluster leader unavailable")
+            with self.send_lock:
+                conn.sendall(self._encode({'type': 'command', 'name': name, 'params': params}))
+            return None
+        result = self.actions[name](**params)
+        self.publish({'type': 'clear'} if name == 'clear' else self._state_message())
+        return result
+
+    # Framing
+    def _encode(self, message):
+        body = encode_payload(message)
+        return self.FRAME_HEADER.pack(len(body)) + body
+
+    def _frames(self, conn):
+        """Yield decoded messages until the connection closes"""
+        stream = conn.makefile('rb')
+        try:
+            while True:
+                header = stream.read(self.FRAME_HEADER.size)
+                if len(header) < self.FRAME_HEADER.size:
+                    return
+                body = stream.read(self.FRAME_HEADER.unpack(header)[0])
+                yield SocketJSON.loads(body)
+        except (OSError, ValueError):
+            return
+        finally:
+            stream.close()
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        conn.close()
+
+    def stats(self):
+        return {
+            'role': self.role,
+            'pid': os.getpid(),
+            'followers': len(self.followers),
+            'frames_sent': self.frames_sent,
+            'frames_received': self.frames_received,
+            'followers_dropped': self.followers_dropped
+        }
+
+cluster = ClusterCoordinator(
+    os.environ.get('IVAS_CLUSTER_DIR') or None,
+    data_storage, ivas_scraper, sms_broadcaster,
+    sync_interval=float(os.environ.get('IVAS_CLUSTER_SYNC_INTERVAL', 2))
+)
+
+class ResponseCache:
+    """Pre-serialized JSON bodies keyed by endpoint and data version, served with strong ETags"""
+    def __init__(self):
+        self.entries = {}  # name -> (key, body, etag)
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def etag(body):
+        return hashlib.blake2b(body, digest_size=12).hexdigest()
+
+    def body(self, name, key, build):
+        """(JSON bytes, ETag) for key, calling build() only when the key changed"""
+        entry = self.entries.get(name)
+        if entry is None or entry[0] != key:
+            body = encode_json(build())
+            entry = (key, body, self.etag(body))
+            self.entries[name] = entry
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry[1], entry[2]
+
+    def respond(self, name, key, build):
+        """Serve the cached body for key, calling build() only when the key changed"""
+        return self.send(*self.body(name, key, build))
+
+    def send(self, body, etag=None):
+        """JSON response with a strong ETag; 304 when the client already holds this body"""
+        etag = etag or self.etag(body)
+        if etag in request.if_none_match:
+            self.not_modified += 1
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def stats(self):
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'not_modified': self.not_modified
+        }
+
+response_cache = ResponseCache()
+
+# Digits masked off a phone number to get its portal range, e.g. 2348012345678 -> 2348012345XXX
+RANGE_MASK_DIGITS = 3
+INTERARRIVAL_BINS = [0, 1, 2, 5, 10, 30, 60, 300, 3600, float('inf')]  # last bin is open-ended
+
+
+def history_frame(records):
+    """Columnar frame of (seq, platform code, country code, range, epoch) for SMS records"""
+    if not load_dataframe_libraries():
+        raise RuntimeError("pandas and numpy are required for analytics queries")
+    frame = pd.DataFrame({
+        'seq': np.fromiter((record.seq for record in records), dtype=np.int64),
+        'platform': np.fromiter((record.platform_idx for record in records), dtype=np.int32),
+        'country': np.fromiter((record.country_idx for record in records), dtype=np.int32),
+        'phone_number': [record.phone_number for record in records],
+        'epoch': np.fromiter((record.epoch for record in records), dtype=np.int64)
+    })
+    return with_ranges(frame)
+
+
+def with_ranges(frame):
+    phone = frame.pop('phone_number').astype(str)
+    frame['range'] = (phone.str[:-RANGE_MASK_DIGITS] + 'X' * RANGE_MASK_DIGITS).astype('category')
+    return frame
+
+
+def window(frame, now, span, platform=None, country=None):
+    """Rows from the last span seconds, optionally filtered to one platform and/or country"""
+    mask = frame['epoch'].to_numpy() >= now - span
+    if platform is not None:
+        mask &= frame['platform'].to_numpy() == PLATFORM_TABLE.codes.get(platform, -1)
+    if country is not None:
+        mask &= frame['country'].to_numpy() == COUNTRY_TABLE.codes.get(country, -1)
+    return frame[mask]
+
+
+def query_counts(frame, now, step=300, span=6 * 3600, platform=None, country=None):
+    """SMS per platform x country x step-wide interval"""
+    rows = window(frame, now, span, platform, country)
+    bucket = rows['epoch'] // step * step
+    grouped = rows.groupby([bucket, rows['platform'], rows['country']]).size()
+    return [
+        {
+            'timestamp': int(timestamp),
+            'platform': PLATFORM_TABLE.decode(int(platform_idx)),
+            'country': COUNTRY_TABLE.decode(int(country_idx)),
+            'count': int(count)
+        }
+        for (timestamp, platform_idx, country_idx), count in grouped.items()
+    ]
+
+
+def query_interarrival(frame, now, span=6 * 3600, platform=None, country=None,
+                       percentiles=(50, 90, 95, 99)):
+    """Distribution of seconds between consecutive SMS"""
+    epochs = np.sort(window(frame, now, span, platform, country)['epoch'].to_numpy())
+    gaps = np.diff(epochs)
+    if not len(gaps):
+        return {'samples': 0, 'mean': None, 'percentiles': {}, 'histogram': []}
+    counts, _ = np.histogram(gaps, bins=INTERARRIVAL_BINS)
+    return {
+        'samples': int(len(gaps)),
+        'mean': round(float(gaps.mean()), 3),
+        'percentiles': {
+            f"p{p}": float(value) for p, value in zip(percentiles, np.percentile(gaps, percentiles))
+        },
+        'histogram': [
+            {'min_seconds': INTERARRIVAL_BINS[i],
+             'max_seconds': INTERARRIVAL_BINS[i + 1] if i + 2 < len(INTERARRIVAL_BINS) else None,
+             'count': int(count)}
+            for i, count in enumerate(counts)
+            if count
+        ]
+    }
+
+
+def query_ranges(frame, now, span=6 * 3600, platform=None, country=None, limit=20):
+    """Per-range totals and throughput (SMS per minute) over the window"""
+    rows = window(frame, now, span, platform, country)
+    grouped = rows.groupby('range', observed=True)['epoch'].agg(['size', 'min', 'max'])
+    top = grouped.nlargest(limit, 'size')
+    minutes = span / 60
+    return [
+        {
+            'range': range_text,
+            'count': int(row['size']),
+            'per_minute': round(float(row['size']) / minutes, 4),
+            'first_seen': int(row['min']),
+            'last_seen': int(row['max'])
+        }
+        for range_text, row in top.iterrows()
+    ]
+
+
+ANALYTICS_QUERIES = {
+    'counts': query_counts,
+    'interarrival': query_interarrival,
+    'ranges': query_ranges
+}
+
+
+class HistoryAnalytics:
+    """Vectorized queries over the stored SMS history, cached by query and data version"""
+    def __init__(self, storage, cache_size=64):
+        self.storage = storage
+        self.cache_size = cache_size
+        self.results = OrderedDict()  # (query, params, data key) -> JSON bytes
+        self.frame = None        # rows read from the store so far
+        self.query_frame = None  # frame plus records not flushed yet
+        self.frame_generation = None
+        self.frame_key = None
+        self.frame_pruned = 0  # store.rows_pruned when the frame was last trimmed
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def data_key(self):
+        store = self.storage.store
+        return (self.storage.generation, self.storage.snapshot.version,
+                store.rows_written if store is not None else 0)
+
+    @staticmethod
+    def _append(frame, new_rows):
+        # Empty frames carry a differently typed empty category list
+        if not len(new_rows):
+            return frame
+        if not len(frame):
+            return new_rows
+        ranges = union_categoricals([frame['range'], new_rows['range']])
+        frame = pd.concat([frame, new_rows], ignore_index=True)
+        frame['range'] = ranges
+        return frame
+
+    def load_frame(self, key):
+        """History as a DataFrame; with a store only rows added since the last load are read"""
+        if self.frame_key == key:
+            return self.query_frame
+        store = self.storage.store
+        snap = self.storage.snapshot
+        if store is None:
+            self.frame = self.query_frame = history_frame(snap.records)
+        else:
+            if self.frame_generation != self.storage.generation:
+                self.frame = None
+            if self.frame is not None and store.rows_pruned != self.frame_pruned:
+                # The store dropped rows past its retention window; drop them here too
+                keep = self.frame['epoch'].to_numpy() >= time.time() - store.retention
+                self.frame = self.frame[keep].reset_index(drop=True)
+            self.frame_pruned = store.rows_pruned
+            after = int(self.frame['seq'].iat[-1]) if self.frame is not None and len(self.frame) else 0
+            new_rows = store.history_frame(after)
+            self.frame = new_rows if self.frame is None else self._append(self.frame, new_rows)
+            # Records newer than the disk rows are still queued for the writer
+            after = int(self.frame['seq'].iat[-1]) if len(self.frame) else 0
+            pending = list(itertools.takewhile(lambda record: record.seq > after, snap.records))
+            self.query_frame = self._append(self.frame, history_frame(pending[::-1])) if pending else self.frame
+        self.frame_generation = self.storage.generation
+        self.frame_key = key
+        return self.query_frame
+
+    def query(self, name, **params):
+        """JSON bytes for one query, reused until the stored data changes"""
+        if not load_dataframe_libraries():
+            raise RuntimeError("pandas and numpy are required for analytics queries")
+        if name not in ANALYTICS_QUERIES:
+            raise ValueError(f"Unknown query '{name}', expected one of {', '.join(ANALYTICS_QUERIES)}")
+        with self.lock:
+            key = self.data_key()
+            # Windows end at the current step so cached results stay valid within it
+            now = int(time.time())
+            now -= now % params.get('step', 60)
+            cache_key = (name, tuple(sorted(params.items())), key, now)
+            body = self.results.get(cache_key)
+            if body is not None:
+                self.results.move_to_end(cache_key)
+                self.hits += 1
+                return body
+            self.misses += 1
+            frame = self.load_frame(key)
+            started = time.perf_counter()
+            result = ANALYTICS_QUERIES[name](frame, now, **params)
+            body = encode_json({
+                'success': True,
+                'query': name,
+                'params': params,
+                'rows_scanned': len(frame),
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+                'result': result
+            })
+            self.results[cache_key] = body
+            while len(self.results) > self.cache_size:
+                self.results.popitem(last=False)
+            return body
+
+    def stats(self):
+        return {
+            'available': DATAFRAME_AVAILABLE,
+            'loaded': pd is not None,
+            'frame_rows': len(self.frame) if self.frame is not None else 0,
+            'cached_results': len(self.results),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+history_analytics = HistoryAnalytics(data_storage)
+
+def create_metrics():
+    """Register the hot-path histograms and the counters/gauges read at scrape time"""
+    registry = MetricsRegistry()
+    dedup = data_storage.dedup_index
+    registry.histogram('ivas_fetch_seconds', 'Upstream live test SMS page fetch latency',
+                       ivas_scraper.fetch_latency)
+    registry.histogram('ivas_decompress_seconds', 'Response decompression and decoding time',
+                       ivas_scraper.decompress_latency)
+    registry.histogram('ivas_parse_row_seconds', 'Page and row parse time per scanned table row',
+                       ivas_scraper.parse_row_latency)
+    registry.histogram('ivas_add_sms_seconds', 'Time spent in add_sms per record, duplicates included',
+                       data_storage.add_latency)
+    registry.histogram('ivas_emit_seconds', 'Socket.IO sms_batch broadcast fan-out time',
+                       sms_broadcaster.emit_duration)
+    registry.histogram('ivas_emit_latency_seconds', 'Time from upstream response to sms_batch emit',
+                       ivas_scraper.emit_latency)
+    registry.counter('ivas_polls_total', 'Upstream polls by outcome',
+                     ivas_scraper.poll_counts, label='outcome')
+    registry.counter('ivas_sms_ingested_total', 'SMS stored after deduplication', lambda: dedup.misses)
+    registry.counter('ivas_sms_duplicates_total', 'SMS dropped as duplicates', lambda: dedup.hits)
+    registry.gauge('ivas_dedup_hit_ratio', 'Share of dedup lookups that were duplicates',
+                   lambda: round(dedup.hits / max(1, dedup.hits + dedup.misses), 6))
+    registry.counter('ivas_socket_batches_total', 'sms_batch events broadcast', lambda: sms_broadcaster.batches_sent)
+    registry.counter('ivas_socket_records_total', 'SMS records broadcast', lambda: sms_broadcaster.records_sent)
+    registry.gauge('ivas_connected_clients', 'Connected realtime clients by transport',
+                   lambda: {'socketio': sms_broadcaster.clients, 'sse': sse_hub.clients}, label='transport')
+    registry.gauge('ivas_storage_entries', 'Entries held by each bounded in-memory structure', lambda: {
+        'live_sms': len(data_storage.live_sms_data),
+        'history': len(data_storage.history),
+        'dedup_index': len(dedup),
+        'platform_counts': len(data_storage.platform_counts),
+        'country_counts': len(data_storage.country_counts),
+        'range_counts': len(data_storage.range_counts)
+    }, label='structure')
+    registry.gauge('ivas_dedup_index_bytes', 'Approximate memory held by the dedup index', dedup.memory_usage)
+    registry.gauge('ivas_store_pending_batches', 'Batches queued for the SQLite writer',
+                   lambda: data_storage.store.queue.qsize() if data_storage.store is not None else 0)
+    stages = ivas_scraper.pipeline.stages
+    registry.gauge('ivas_pipeline_queue_depth', 'Items waiting in each pipeline stage queue',
+                   lambda: {stage.name: stage.queue.qsize() for stage in stages}, label='stage')
+    registry.histogram('ivas_pipeline_wait_seconds', 'Time items spend queued before a stage picks them up',
+                       {stage.name: stage.wait_latency for stage in stages}, label='stage')
+    registry.histogram('ivas_pipeline_stage_seconds', 'Time each pipeline stage spends per item',
+                       {stage.name: stage.handler_latency for stage in stages}, label='stage')
+    registry.counter('ivas_pipeline_errors_total', 'Items a pipeline stage failed to handle',
+                     lambda: {stage.name: stage.errors for stage in stages}, label='stage')
+    registry.gauge('ivas_cluster_followers', 'Follower workers connected to this leader',
+                   lambda: len(cluster.followers))
+    registry.gauge('ivas_snapshot_version', 'Version of the published storage snapshot',
+                   lambda: data_storage.snapshot.version)
+    return registry
+
+metrics = create_metrics()
+
 
 # Flask Routes
 @app.route('/')
@@ -664,18 +3426,55 @@ def dashboard():
 @app.route('/api/status')
 def api_status():
     """Get system status"""
-    return jsonify({
+    snap = data_storage.snapshot
+    # Data sections are cached per snapshot; the runtime counters change between
+    # snapshots, so they are encoded fresh and spliced in on every request
+    cached, _ = response_cache.body('status', (snap.version, data_storage.theme), lambda: _build_status(snap))
+    live = encode_json(_build_status_counters())
+    return response_cache.send(cached[:-1] + b',' + live[1:])
+
+def _build_status(snap):
+    """Status sections derived from one snapshot"""
+    return {
         'status': 'online',
+        'total_sms': snap.total,
+        'platform_counts': snap.platform_counts,
+        'unique_countries': len(snap.country_counts),
+        'theme': data_storage.theme,
+        'analytics': snap.analytics,
+        'snapshot_version': snap.version
+    }
+
+def _build_status_counters():
+    """Status sections read from live scraper, broadcaster and store counters"""
+    return {
         'logged_in': ivas_scraper.logged_in,
         'last_fetch': ivas_scraper.last_successful_fetch.isoformat() if ivas_scraper.last_successful_fetch else None,
-        'total_sms': len(data_storage.live_sms_data),
-        'platform_counts': dict(data_storage.platform_counts),
-        'unique_countries': len(data_storage.country_counts),
         'monitoring_active': ivas_scraper.active,
-        'theme': data_storage.theme,
-        'analytics': data_storage.analytics,
-        'fetch_count': ivas_scraper.fetch_count
-    })
+        'fetch_count': ivas_scraper.fetch_count,
+        'poll_stats': ivas_scraper.poll_counts(),
+        'polling': {
+            **ivas_scraper.scheduler.stats(),
+            'emit_latency': ivas_scraper.emit_latency.snapshot()
+        },
+        'broadcast': sms_broadcaster.stats(),
+        'pipeline': ivas_scraper.pipeline.stats(),
+        'cluster': cluster.stats(),
+        'sse': sse_hub.stats(),
+        'history_analytics': history_analytics.stats(),
+        'dedup_index': data_storage.dedup_index.stats(),
+        'encoded_records': encoded_records.stats(),
+        'sketches': {
+            'countries': data_storage.country_counts.stats(),
+            'ranges': data_storage.range_counts.stats()
+        },
+        'store': data_storage.store.stats() if data_storage.store is not None else None
+    }
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), content_type=MetricsRegistry.CONTENT_TYPE)
 
 @app.route('/api/live-sms')
 def get_live_sms():
@@ -683,80 +3482,229 @@ def get_live_sms():
     try:
         platform_filter = request.args.get('platform', 'all')
         country_filter = request.args.get('country', 'all')
-        limit = int(request.args.get('limit', 50))
+        limit = min(max(int(request.args.get('limit', 50)), 1), data_storage.live_sms_data.maxlen)
+        snap = data_storage.snapshot
         
-        sms_list = []
-        for sms in list(data_storage.live_sms_data)[:1000]:
-            if platform_filter != 'all' and sms.get('platform') != platform_filter:
-                continue
-            if country_filter != 'all' and sms.get('country') != country_filter:
-                continue
-            sms_list.append(sms)
-            if len(sms_list) >= limit:
-                break
-                
-        return jsonify({
+        sms_list = snap.query(platform_filter, country_filter, limit)
+        
+        # Records are spliced in from their cached encodings
+        body = encode_payload({
             'success': True,
             'data': sms_list,
-            'total': len(data_storage.live_sms_data),
+            'total': snap.total,
             'filtered': len(sms_list),
-            'last_update': data_storage.last_update_time.isoformat() if data_storage.last_update_time else None,
+            'last_update': snap.last_update_time.isoformat() if snap.last_update_time else None,
+            'last_seq': snap.last_seq,
+            'stream_id': snap.stream_id,
             'theme': data_storage.theme,
             'colors': COLOR_THEMES[data_storage.theme]
         })
+        return Response(body, mimetype='application/json')
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid limit: {e}'}), 400
     except Exception as e:
         logger.error(f"Error in get_live_sms: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/statistics')
-def get_statistics():
-    """Get comprehensive statistics"""
+@app.route('/api/history')
+def get_history():
+    """Page through stored SMS older than the live window"""
     try:
-        total_sms = sum(data_storage.platform_counts.values())
-        
-        stats = {}
-        for platform in ['facebook', 'whatsapp', 'instagram']:
-            count = data_storage.platform_counts[platform]
-            percentage = (count / total_sms * 100) if total_sms > 0 else 0
-            stats[platform] = {
-                'count': count,
-                'percentage': round(percentage, 2),
-                'color': PLATFORM_COLORS[platform],
-                'gradient': PLATFORM_GRADIENTS[platform]
-            }
-            
-        top_countries = data_storage.get_top_countries(10)
-        platform_percentages = data_storage.get_platform_percentages()
+        before_seq = request.args.get('before_seq', type=int)
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+        sms_list = data_storage.query_history(
+            before_seq,
+            request.args.get('platform', 'all'),
+            request.args.get('country', 'all'),
+            limit
+        )
+        body = encode_payload({
+            'success': True,
+            'data': sms_list,
+            'count': len(sms_list),
+            'next_before_seq': sms_list[-1].seq if sms_list else None,
+            'persistent': data_storage.store is not None
+        })
+        return Response(body, mimetype='application/json')
         
+    except Exception as e:
+        logger.error(f"Error in get_history: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/top-ranges')
+def get_top_ranges():
+    """Most frequently seen portal ranges, from the bounded heavy-hitter sketch"""
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), data_storage.range_counts.capacity)
+        ranges = [
+            {'range': range_text, 'count': count, 'max_error': error}
+            for range_text, count, error in data_storage.range_counts.top(limit)
+        ]
         return jsonify({
             'success': True,
-            'platform_stats': stats,
-            'top_countries': top_countries,
-            'total_sms': total_sms,
-            'unique_countries': len(data_storage.country_counts),
-            'hourly_stats': data_storage.get_hourly_stats(6),
-            'connection_status': data_storage.connection_status,
-            'platform_percentages': platform_percentages,
-            'analytics': data_storage.analytics,
-            'theme': data_storage.theme,
-            'theme_colors': COLOR_THEMES[data_storage.theme]
+            'ranges': ranges,
+            'sketch': data_storage.range_counts.stats()
         })
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid limit: {e}'}), 400
+    except Exception as e:
+        logger.error(f"Error in get_top_ranges: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+def parse_duration(value, default):
+    """Seconds from '300', '5m', '6h' or '1d'"""
+    if not value:
+        return default
+    value = value.strip().lower()
+    if value[-1] in DURATION_UNITS:
+        return int(float(value[:-1]) * DURATION_UNITS[value[-1]])
+    return int(float(value))
+
+@app.route('/api/timeseries')
+def get_timeseries():
+    """SMS counts per time bucket, e.g. ?platform=whatsapp&country=Nigeria&step=5m&span=6h"""
+    try:
+        group_by = request.args.get('group_by')
+        if group_by not in (None, 'platform', 'country'):
+            return jsonify({'success': False, 'error': 'group_by must be platform or country'}), 400
+        series = data_storage.timeseries(
+            step=parse_duration(request.args.get('step'), 300),
+            span=parse_duration(request.args.get('span'), 6 * 3600),
+            platform=request.args.get('platform', 'all'),
+            country=request.args.get('country', 'all'),
+            group_by=group_by
+        )
+        return jsonify({'success': True, **series})
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid duration: {e}'}), 400
+    except Exception as e:
+        logger.error(f"Error in get_timeseries: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/analytics/query')
+def analytics_query():
+    """Vectorized history queries: ?type=counts|interarrival|ranges&step=5m&span=6h&platform=&country="""
+    try:
+        name = request.args.get('type', 'counts')
+        span = parse_duration(request.args.get('span'), 6 * 3600)
+        if span <= 0:
+            raise ValueError(f"span must be positive, got {request.args.get('span')!r}")
+        params = {'span': span}
+        if name == 'counts':
+            params['step'] = max(parse_duration(request.args.get('step'), 300), 1)
+        if name == 'ranges':
+            params['limit'] = min(max(int(request.args.get('limit', 20)), 1), 500)
+        for field in ('platform', 'country'):
+            value = request.args.get(field, 'all')
+            if value != 'all':
+                params[field] = value
+        return Response(history_analytics.query(name, **params), mimetype='application/json')
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid query: {e}'}), 400
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    except Exception as e:
+        logger.error(f"Error in analytics_query: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/statistics')
+def get_statistics():
+    """Get comprehensive statistics"""
+    try:
+        snap = data_storage.snapshot
+        key = (snap.version, data_storage.theme, data_storage.connection_status)
+        return response_cache.respond('statistics', key, lambda: _build_statistics(snap))
+        
     except Exception as e:
         logger.error(f"Error in get_statistics: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _build_statistics(snap):
+    """Statistics payload for one snapshot"""
+    total_sms = sum(snap.platform_counts.values())
+    
+    stats = {}
+    # Configured platforms first, then any only known from restored or replicated counts
+    for platform in dict.fromkeys([*data_storage.platforms, *snap.platform_counts]):
+        count = snap.platform_counts.get(platform, 0)
+        percentage = (count / total_sms * 100) if total_sms > 0 else 0
+        color = PLATFORM_COLORS.get(platform, DEFAULT_PLATFORM_COLOR)
+        stats[platform] = {
+            'count': count,
+            'percentage': round(percentage, 2),
+            'color': color,
+            'gradient': PLATFORM_GRADIENTS.get(platform, f'linear-gradient(135deg, {color} 0%, {color} 100%)')
+        }
+        
+    return {
+        'success': True,
+        'platform_stats': stats,
+        'top_countries': snap.top_countries(10),
+        'total_sms': total_sms,
+        'unique_countries': len(snap.country_counts),
+        'hourly_stats': snap.hourly(6),
+        'connection_status': data_storage.connection_status,
+        'platform_percentages': snap.platform_percentages(),
+        'analytics': snap.analytics,
+        'theme': data_storage.theme,
+        'theme_colors': COLOR_THEMES[data_storage.theme]
+    }
+
 @app.route('/api/theme/<theme_name>')
 def set_theme(theme_name):
     """Set color theme"""
-    if data_storage.set_theme(theme_name):
+    if theme_name not in COLOR_THEMES:
+        return jsonify({'success': False, 'error': 'Invalid theme'}), 400
+    try:
+        cluster.control('theme', theme=theme_name)
         return jsonify({
             'success': True,
             'theme': theme_name,
             'colors': COLOR_THEMES[theme_name]
         })
-    return jsonify({'success': False, 'error': 'Invalid theme'}), 400
+    except Exception as e:
+        logger.error(f"Error setting theme: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# Control actions; in cluster mode they always run on the scraping worker
+def refresh_now(full_scan=False):
+    """Fetch and store the live page right away; returns (new SMS count, per-platform counts)"""
+    # The pipeline's ingester stores and broadcasts the page, as for a regular poll
+    added = ivas_scraper.fetch_live_test_sms(full_scan=full_scan, animation='bounceIn')
+    animation_data = dict.fromkeys(ivas_scraper.classifier.platforms, 0)
+    for sms in added:
+        animation_data[sms.platform] += 1
+    
+    # Emit refresh animation
+    socketio.emit('refresh_animation', {
+        'count': len(added),
+        'platform_breakdown': animation_data
+    })
+    return len(added), animation_data
+
+def clear_all():
+    data_storage.clear()
+    ivas_scraper.reset_high_water_mark()
+    logger.info("Data cleared")
+    socketio.emit('clear_animation', {'action': 'clear'})
+
+def start_scraper_monitoring():
+    if not ivas_scraper.active:
+        ivas_scraper.start_monitoring()
+
+cluster.actions.update({
+    'refresh': refresh_now,
+    'clear': clear_all,
+    'start_monitoring': start_scraper_monitoring,
+    'stop_monitoring': ivas_scraper.stop_monitoring,
+    'theme': data_storage.set_theme
+})
 
 @app.route('/api/refresh')
 def refresh_data():
@@ -764,34 +3712,25 @@ def refresh_data():
     try:
         logger.info("Manual refresh requested")
         
-        if not ivas_scraper.logged_in:
+        if not cluster.is_follower and not ivas_scraper.logged_in:
             if not ivas_scraper.login_with_cookies():
                 return jsonify({'success': False, 'error': 'Login failed'}), 401
                 
-        new_sms = ivas_scraper.fetch_live_test_sms()
-        processed = 0
-        animation_data = {'facebook': 0, 'whatsapp': 0, 'instagram': 0}
-        
-        for sms in new_sms:
-            if data_storage.add_sms(sms):
-                processed += 1
-                animation_data[sms['platform']] += 1
-                socketio.emit('new_sms', {
-                    **sms,
-                    'animation': f"bounceIn-{sms['platform']}"
-                })
-                
-        # Emit refresh animation
-        socketio.emit('refresh_animation', {
-            'count': processed,
-            'platform_breakdown': animation_data
-        })
+        full_scan = request.args.get('full', '').lower() in ('1', 'true', 'yes')
+        result = cluster.control('refresh', full_scan=full_scan)
+        if result is None:
+            return jsonify({
+                'success': True,
+                'message': 'Refresh requested from the scraping worker',
+                'forwarded': True
+            })
+        processed, animation_data = result
                 
         return jsonify({
             'success': True,
             'message': f'Refreshed {processed} new SMS',
             'count': processed,
-            'total_sms': len(data_storage.live_sms_data),
+            'total_sms': data_storage.snapshot.total,
             'animations': animation_data
         })
         
@@ -803,9 +3742,7 @@ def refresh_data():
 def clear_data():
     """Clear all stored data"""
     try:
-        data_storage.clear()
-        logger.info("Data cleared")
-        socketio.emit('clear_animation', {'action': 'clear'})
+        cluster.control('clear')
         return jsonify({
             'success': True,
             'message': 'All data cleared'
@@ -818,8 +3755,7 @@ def clear_data():
 def start_monitoring():
     """Start real-time monitoring"""
     try:
-        if not ivas_scraper.active:
-            ivas_scraper.start_monitoring()
+        cluster.control('start_monitoring')
             
         socketio.emit('monitoring_started', {
             'active': True,
@@ -839,7 +3775,7 @@ def start_monitoring():
 def stop_monitoring():
     """Stop real-time monitoring"""
     try:
-        ivas_scraper.stop_monitoring()
+        cluster.control('stop_monitoring')
         socketio.emit('monitoring_stopped', {
             'active': False,
             'message': 'Real-time monitoring stopped'
@@ -856,41 +3792,62 @@ def stop_monitoring():
 @app.route('/api/sms-stream')
 def sms_stream():
     """Server-Sent Events stream for real-time SMS"""
-    def generate():
-        last_id = 0
-        while True:
-            if data_storage.last_update_time:
-                current_time = datetime.now()
-                time_diff = (current_time - data_storage.last_update_time).total_seconds()
-                
-                if time_diff < 60:
-                    for sms in list(data_storage.live_sms_data)[:10]:
-                        yield f"data: {json.dumps(sms)}\n\n"
-                        
-            time.sleep(5)
-            
-    return Response(generate(), mimetype="text/event-stream")
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    return Response(sse_hub.stream(last_event_id),
+                    mimetype="text/event-stream",
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 # WebSocket Handlers
 @socketio.on('connect')
-def handle_connect():
+def handle_connect(auth=None):
     """Handle client WebSocket connection"""
     client_id = request.sid
     logger.info(f"Client connected: {client_id}")
+    sms_broadcaster.client_connected()
+    snap = data_storage.snapshot
     
     emit('connection_status', {
         'status': 'connected',
         'logged_in': ivas_scraper.logged_in,
-        'total_sms': len(data_storage.live_sms_data),
+        'total_sms': snap.total,
         'theme': data_storage.theme,
         'colors': COLOR_THEMES[data_storage.theme]
     })
     
-    recent_sms = list(data_storage.live_sms_data)[:50]
+    # Reconnecting clients only get what they missed since their last sequence
+    auth = auth if isinstance(auth, dict) else {}
+    last_seq = auth.get('last_seq')
+    if last_seq is not None:
+        if auth.get('stream_id') != snap.stream_id:
+            missed = None
+        else:
+            try:
+                missed = snap.records_since(int(last_seq), RESUME_MAX_GAP)
+            except (TypeError, ValueError):
+                missed = None
+                
+        if missed is None:
+            emit('resume_gap', {
+                'reason': 'gap too large, full reload',
+                'last_seq': snap.last_seq,
+                'stream_id': snap.stream_id
+            })
+        else:
+            emit('resume_data', {
+                'sms_list': missed,
+                'last_seq': snap.last_seq,
+                'stream_id': snap.stream_id,
+                'platform_counts': snap.platform_counts
+            })
+        return
+    
+    recent_sms = snap.query(limit=50)
     emit('initial_data', {
         'sms_list': recent_sms,
-        'platform_counts': dict(data_storage.platform_counts),
-        'last_update': data_storage.last_update_time.isoformat() if data_storage.last_update_time else None,
+        'platform_counts': snap.platform_counts,
+        'last_update': snap.last_update_time.isoformat() if snap.last_update_time else None,
+        'last_seq': snap.last_seq,
+        'stream_id': snap.stream_id,
         'theme': data_storage.theme,
         'colors': COLOR_THEMES[data_storage.theme]
     })
@@ -899,13 +3856,15 @@ def handle_connect():
 def handle_disconnect():
     """Handle client WebSocket disconnection"""
     logger.info(f"Client disconnected: {request.sid}")
+    sms_broadcaster.client_disconnected()
 
 @socketio.on('request_update')
 def handle_update_request():
     """Handle update request from client"""
+    snap = data_storage.snapshot
     emit('data_update', {
-        'total_sms': len(data_storage.live_sms_data),
-        'platform_counts': dict(data_storage.platform_counts),
+        'total_sms': snap.total,
+        'platform_counts': snap.platform_counts,
         'last_update': datetime.now().isoformat(),
         'theme': data_storage.theme,
         'colors': COLOR_THEMES[data_storage.theme]
@@ -917,13 +3876,12 @@ def handle_filter_sms(data):
     platform = data.get('platform', 'all')
     country = data.get('country', 'all')
     
-    filtered_sms = []
-    for sms in list(data_storage.live_sms_data)[:100]:
-        if platform != 'all' and sms.get('platform') != platform:
-            continue
-        if country != 'all' and sms.get('country') != country:
-            continue
-        filtered_sms.append(sms)
+    try:
+        limit = min(max(int(data.get('limit', 100)), 1), 500)
+    except (TypeError, ValueError):
+        limit = 100
+
+    filtered_sms = data_storage.snapshot.query(platform, country, limit)
         
     emit('filtered_data', {
         'sms_list': filtered_sms,
@@ -936,24 +3894,39 @@ def handle_filter_sms(data):
 def handle_change_theme(data):
     """Handle theme change request"""
     theme = data.get('theme', 'neon')
-    if data_storage.set_theme(theme):
+    if theme in COLOR_THEMES:
+        cluster.control('theme', theme=theme)
         emit('theme_changed', {
             'theme': theme,
             'colors': COLOR_THEMES[theme]
         })
 
 # Initialize and start
+# Serve the restored (or empty) state right away and log in / fetch in the background
+FAST_START = os.environ.get('IVAS_FAST_START', '1').lower() not in ('0', 'false', 'no')
+
 def initialize_system():
     """Initialize the system"""
     logger.info("Initializing IVAS SMS Analytics System...")
+    start = start_scraping_in_background if FAST_START else start_scraping
     
+    if cluster.enabled:
+        # Only the worker holding the leader lock scrapes; the rest mirror it
+        cluster.start(on_leader=start)
+    else:
+        start()
+        
+def start_scraping_in_background():
+    threading.Thread(target=start_scraping, name='ivas-startup', daemon=True).start()
+    
+def start_scraping():
+    """Log in, load the current page and start monitoring"""
     if ivas_scraper.login_with_cookies():
         logger.info("Successfully logged into IVAS")
         
+        # Stored and broadcast by the pipeline; with fast start, dashboards may already be connected
         initial_sms = ivas_scraper.fetch_live_test_sms()
         if initial_sms:
-            for sms in initial_sms:
-                data_storage.add_sms(sms)
             logger.info(f"Loaded {len(initial_sms)} initial SMS records")
             
         ivas_scraper.start_monitoring()
@@ -965,12 +3938,14 @@ if __name__ == '__main__':
     initialize_system()
     
     logger.info("Starting IVAS SMS Analytics Dashboard...")
-    logger.info(f"Dashboard URL: http://localhost:5000")
+    port = int(os.environ.get('IVAS_PORT', 5000))
+    logger.info(f"Dashboard URL: http://localhost:{port}")
     
     socketio.run(app, 
                  debug=True, 
-                 port=5000, 
+                 port=port, 
                  host='0.0.0.0',
                  allow_unsafe_werkzeug=True,
-
+                 # The reloader re-imports everything in a child process before serving
+                 use_reloader=not FAST_START,
                  log_output=True)
@@ -0,0 +1 @@
+"""Benchmarks for the IVAS SMS analytics dashboard"""
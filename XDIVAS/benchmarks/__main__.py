@@ -0,0 +1,129 @@
+"""Run the benchmark suites and emit comparable JSON
+
+Usage:
+    python -m benchmarks [--suite parsing,ingestion] [--quick] [--output results.json]
+    python -m benchmarks --compare baseline.json [--output current.json]
+    python -m benchmarks --diff baseline.json current.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# Benchmarks must not read or extend the dashboard's on-disk history
+os.environ.setdefault('IVAS_DB_PATH', '')
+
+REGRESSION_THRESHOLD = 0.10
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(suite_names, quick=False):
+    from benchmarks.suite import SUITES
+
+    results = {}
+    for name in suite_names:
+        start = time.perf_counter()
+        results[name] = SUITES[name](quick=quick)
+        print(f"{name}: {len(results[name])} rows in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'quick': quick
+        },
+        'results': results
+    }
+
+
+def lower_is_better(metric):
+    return not metric.endswith('_per_second')
+
+
+def diff(baseline, current):
+    """Rows of (suite, name, metric, before, after, relative change, verdict)"""
+    changes = []
+    for suite, rows in current['results'].items():
+        before_rows = {row['name']: row for row in baseline.get('results', {}).get(suite, [])}
+        for row in rows:
+            before = before_rows.get(row['name'])
+            if before is None:
+                continue
+            for metric, value in row.items():
+                if metric == 'name' or not isinstance(value, (int, float)) or not before.get(metric):
+                    continue
+                if not (metric.endswith(('_ms', '_us')) or metric.endswith('_per_second')):
+                    continue
+                change = (value - before[metric]) / before[metric]
+                worse = change > 0 if lower_is_better(metric) else change < 0
+                verdict = 'regressed' if worse and abs(change) > REGRESSION_THRESHOLD else (
+                    'improved' if not worse and abs(change) > REGRESSION_THRESHOLD else 'same')
+                changes.append((suite, row['name'], metric, before[metric], value, change, verdict))
+    return changes
+
+
+def print_diff(changes):
+    for suite, name, metric, before, after, change, verdict in changes:
+        print(f"{suite:>13} {name:<42} {metric:<18} {before:>12.4f} -> {after:>12.4f} "
+              f"{change:+7.1%}  {verdict}")
+    regressions = sum(1 for change in changes if change[-1] == 'regressed')
+    print(f"{len(changes)} metrics compared, {regressions} regressed by more than {REGRESSION_THRESHOLD:.0%}")
+    return regressions
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    from benchmarks.suite import SUITES
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.splitlines()[0])
+    parser.add_argument('--suite', default=','.join(SUITES),
+                        help=f"comma-separated suites (default: all of {', '.join(SUITES)})")
+    parser.add_argument('--quick', action='store_true', help='fewer iterations, for smoke runs')
+    parser.add_argument('--output', help='write results JSON here instead of stdout')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare this run against a saved results file')
+    parser.add_argument('--diff', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='compare two saved results files without running anything')
+    args = parser.parse_args(argv)
+
+    if args.diff:
+        return 1 if print_diff(diff(load(args.diff[0]), load(args.diff[1]))) else 0
+
+    suite_names = [name.strip() for name in args.suite.split(',') if name.strip()]
+    unknown = [name for name in suite_names if name not in SUITES]
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(unknown)}")
+
+    current = run(suite_names, quick=args.quick)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+    elif not args.compare:
+        json.dump(current, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        return 1 if print_diff(diff(load(args.compare), current)) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
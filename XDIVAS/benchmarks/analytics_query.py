@@ -0,0 +1,106 @@
+"""Benchmark the vectorized /api/analytics/query paths against equivalent dict loops
+
+Usage: python -m benchmarks.analytics_query [records]
+"""
+import bisect
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+
+from app import (COUNTRIES, INTERARRIVAL_BINS, RANGE_MASK_DIGITS, SMSRecord,
+                 history_frame, query_counts, query_interarrival, query_ranges)
+from benchmarks.common import COUNTRY_SAMPLE
+
+PLATFORMS = ('facebook', 'whatsapp', 'instagram')
+STEP = 300
+SPAN = 6 * 3600
+
+
+def synthetic_records(count, seed=42):
+    """SMSRecords spread over the last SPAN seconds with bursty arrivals"""
+    rng = random.Random(seed)
+    now = int(time.time())
+    epoch = now - SPAN
+    records = []
+    for seq in range(1, count + 1):
+        epoch = min(now, epoch + (0 if rng.random() < 0.6 else rng.randint(0, 2)))
+        country_code = rng.choice(COUNTRY_SAMPLE)
+        phone = f"{rng.randint(20, 999)}{rng.randint(10 ** 6, 10 ** 6 + 2000)}{rng.randint(100, 999)}"
+        records.append(SMSRecord(rng.choice(PLATFORMS), COUNTRIES.get(country_code, 'Unknown'),
+                                 country_code, 'WhatsApp', phone, '', '', '', epoch, seq))
+    return records, now
+
+
+def loop_counts(rows, now, step=STEP, span=SPAN):
+    counts = Counter()
+    for row in rows:
+        if row['epoch'] >= now - span:
+            counts[(row['epoch'] // step * step, row['platform'], row['country'])] += 1
+    return counts
+
+
+def loop_interarrival(rows, now, span=SPAN):
+    epochs = sorted(row['epoch'] for row in rows if row['epoch'] >= now - span)
+    gaps = sorted(b - a for a, b in zip(epochs, epochs[1:]))
+    histogram = Counter(bisect.bisect_right(INTERARRIVAL_BINS, gap) - 1 for gap in gaps)
+    percentiles = {p: gaps[min(len(gaps) - 1, int(len(gaps) * p / 100))] for p in (50, 90, 95, 99)}
+    return sum(gaps) / len(gaps), percentiles, histogram
+
+
+def loop_ranges(rows, now, span=SPAN, limit=20):
+    stats = defaultdict(lambda: [0, None, None])
+    for row in rows:
+        if row['epoch'] >= now - span:
+            phone = row['phone_number']
+            entry = stats[phone[:-RANGE_MASK_DIGITS] + 'X' * RANGE_MASK_DIGITS]
+            entry[0] += 1
+            entry[1] = row['epoch'] if entry[1] is None else min(entry[1], row['epoch'])
+            entry[2] = row['epoch'] if entry[2] is None else max(entry[2], row['epoch'])
+    return sorted(stats.items(), key=lambda item: -item[1][0])[:limit]
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    args = argv or sys.argv[1:]
+    count = int(args[0]) if args else 1_000_000
+    records, now = synthetic_records(count)
+    rows = [{'platform': r.platform, 'country': r.country, 'phone_number': r.phone_number,
+             'epoch': r.epoch} for r in records]
+    build_time, frame = timed(history_frame, records)
+    print(f"{count} records, frame built in {build_time * 1000:.0f} ms")
+
+    results = []
+    checks = (
+        ('counts', loop_counts, query_counts,
+         lambda loop, vec: loop == Counter({(p['timestamp'], p['platform'], p['country']): p['count'] for p in vec})),
+        ('interarrival', loop_interarrival, query_interarrival,
+         lambda loop, vec: abs(loop[0] - vec['mean']) < 1e-3
+            and sum(loop[2].values()) == sum(b['count'] for b in vec['histogram'])),
+        ('ranges', loop_ranges, query_ranges,
+         lambda loop, vec: [v[0] for _, v in loop] == [r['count'] for r in vec]
+            and all({k: v[0] for k, v in loop}.get(r['range'], r['count']) == r['count'] for r in vec)),
+    )
+    for name, loop_func, vector_func, check in checks:
+        loop_time, loop_result = timed(loop_func, rows, now)
+        vector_time, vector_result = timed(vector_func, frame, now)
+        results.append({
+            'query': name,
+            'dict_loop_ms': round(loop_time * 1000, 1),
+            'vectorized_ms': round(vector_time * 1000, 1),
+            'speedup': round(loop_time / vector_time, 2),
+            'matches': bool(check(loop_result, vector_result))
+        })
+    for row in results:
+        print(f"{row['query']:>12}: dict loop {row['dict_loop_ms']:8.1f} ms  "
+              f"vectorized {row['vectorized_ms']:7.1f} ms  x{row['speedup']}  matches={row['matches']}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
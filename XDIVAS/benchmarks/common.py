@@ -0,0 +1,49 @@
+"""Shared helpers for generating realistic benchmark data"""
+import hashlib
+import random
+from datetime import datetime, timedelta
+
+SENDERS = ['WhatsApp', 'Facebook', 'Instagram', 'FB', 'Meta', 'IG', 'WA']
+SENDER_PLATFORMS = {
+    'WhatsApp': 'whatsapp', 'WA': 'whatsapp',
+    'Facebook': 'facebook', 'FB': 'facebook', 'Meta': 'facebook',
+    'Instagram': 'instagram', 'IG': 'instagram'
+}
+MESSAGES = [
+    '{code} is your Facebook code',
+    'Your WhatsApp code: {code}. Don\'t share this code with others',
+    'Use {code} to verify your Instagram account.',
+    'FB-{code} is your confirmation code',
+    '<#> Your WhatsApp Business code {code}',
+]
+COUNTRY_SAMPLE = ['NG', 'IN', 'PK', 'BD', 'ID', 'PH', 'EG', 'KE', 'PE', 'TG',
+                  'MM', 'NP', 'ET', 'GH', 'CI', 'BJ', 'US', 'GB', 'BR', 'VN']
+
+
+def synthetic_sms_dicts(count, seed=42, countries=None):
+    """Scraper-format SMS dicts with freshly allocated strings"""
+    from app import COUNTRIES
+
+    rng = random.Random(seed)
+    countries = countries or COUNTRY_SAMPLE
+    start = datetime.now() - timedelta(seconds=count)
+    records = []
+    for i in range(count):
+        country_code = rng.choice(countries)
+        sid = rng.choice(SENDERS)
+        message = rng.choice(MESSAGES).format(code=rng.randint(100000, 999999))
+        phone = f"+{rng.randint(20, 999)}{rng.randint(10 ** 8, 10 ** 9 - 1)}"
+        moment = start + timedelta(seconds=i)
+        records.append({
+            'platform': SENDER_PLATFORMS[sid],
+            'country': COUNTRIES.get(country_code, 'Unknown'),
+            'country_code': ''.join(country_code),
+            'sid': ''.join(sid),
+            'phone_number': phone,
+            'message': message,
+            'time': moment.strftime("%H:%M:%S"),
+            'timestamp': moment.isoformat(),
+            'raw_text': f"{country_code} {phone}",
+            'id': hashlib.md5(f"{sid}{message}{i}".encode()).hexdigest()[:8]
+        })
+    return records
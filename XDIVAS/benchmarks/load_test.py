@@ -0,0 +1,96 @@
+"""End-to-end load test: replay portal -> scraper -> storage -> Socket.IO clients
+
+Starts benchmarks.replay_server in-process, points the scraper at it, connects
+simulated Socket.IO clients and runs the real monitoring loop for a while.
+Reports sustained rows/sec, rows lost to table scroll-off, fetch outcomes and
+the scraper's emit latency (response received -> sms_batch emitted).
+
+Usage: python -m benchmarks.load_test [--duration 30] [--clients 20] [--rate 20]
+                                      [--burst-every 10 --burst-size 100] [--encoding br]
+                                      [--latency 0.05] [--error-rate 0.02] [--poll-interval 1]
+"""
+import json
+import os
+import sys
+import time
+
+from benchmarks.replay_server import build_parser, replay_from_args, serve
+
+
+def build_load_parser():
+    parser = build_parser()
+    parser.description = 'End-to-end load test against the local replay portal'
+    parser.add_argument('--duration', type=float, default=30, help='seconds to run the monitoring loop')
+    parser.add_argument('--clients', type=int, default=20, help='simulated Socket.IO clients')
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='minimum scraper poll interval')
+    parser.add_argument('--output', help='write the JSON report here as well')
+    return parser
+
+
+def main(argv=None):
+    args = build_load_parser().parse_args(argv)
+    replay = replay_from_args(args)
+    server, base_url = serve(replay, args.host, 0)
+
+    # The dashboard reads these at import time
+    os.environ['IVAS_BASE_URL'] = base_url
+    os.environ.setdefault('IVAS_DB_PATH', '')
+    os.environ['IVAS_POLL_MIN_INTERVAL'] = str(args.poll_interval)
+    os.environ.setdefault('IVAS_POLL_MAX_INTERVAL', str(max(args.poll_interval * 4, 5)))
+    from app import app, data_storage, ivas_scraper, sms_broadcaster, socketio
+
+    clients = [socketio.test_client(app) for _ in range(args.clients)]
+    for client in clients:
+        client.get_received()
+    ivas_scraper.scheduler.interval = args.poll_interval
+    start_seq = data_storage.last_seq
+
+    started = time.monotonic()
+    ivas_scraper.start_monitoring()
+    time.sleep(args.duration)
+    ivas_scraper.stop_monitoring()
+    elapsed = time.monotonic() - started
+    sms_broadcaster.flush()
+
+    ingested = data_storage.last_seq - start_seq
+    delivered = [
+        sum(len(event['args'][0]['sms_list']) for event in client.get_received() if event['name'] == 'sms_batch')
+        for client in clients
+    ]
+    for client in clients:
+        client.disconnect()
+    server.shutdown()
+
+    report = {
+        'config': {key: value for key, value in vars(args).items() if key != 'output'},
+        'elapsed_s': round(elapsed, 2),
+        'portal': {
+            'rows_generated': replay.generated,
+            'bursts': replay.bursts,
+            **replay.stats
+        },
+        'rows_ingested': ingested,
+        'rows_per_second': round(ingested / elapsed, 2),
+        'rows_missed': max(0, replay.generated - ingested),
+        'fetches': ivas_scraper.fetch_count,
+        'poll_stats': ivas_scraper.poll_counts(),
+        'polling': ivas_scraper.scheduler.stats(),
+        'emit_latency': ivas_scraper.emit_latency.snapshot(),
+        'broadcast': sms_broadcaster.stats(),
+        'pipeline': ivas_scraper.pipeline.stats(),
+        'clients': {
+            'count': len(clients),
+            'min_rows_received': min(delivered, default=0),
+            'max_rows_received': max(delivered, default=0)
+        }
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
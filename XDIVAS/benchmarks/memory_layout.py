@@ -0,0 +1,85 @@
+"""Compare memory used by dict-per-SMS storage against SMSRecord storage
+
+Also prices the JSON encodings: one cached bytes object per stored record
+(encoded eagerly on ingest) against the bounded EncodedRecordCache.
+
+Usage: python -m benchmarks.memory_layout [count ...]
+"""
+import gc
+import sys
+import tracemalloc
+from collections import deque
+
+from app import EncodedRecordCache, SMSRecord, encode_json, encoded_records
+from benchmarks.common import synthetic_sms_dicts
+
+
+def measure(build):
+    """Bytes retained by the object returned from build()"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    retained = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, retained
+
+
+def compare(count):
+    """Return per-layout memory for count records"""
+    def dict_layout():
+        return deque(synthetic_sms_dicts(count), maxlen=count)
+
+    def record_layout():
+        store = deque(maxlen=count)
+        for sms in synthetic_sms_dicts(count):
+            store.append(SMSRecord.from_dict(sms))
+        return store
+
+    def eager_layout():
+        store = record_layout()
+        return store, [encode_json(record.to_dict()) for record in store]
+
+    def cached_layout():
+        # Every record served once, as a burst of batches would
+        store = record_layout()
+        cache = EncodedRecordCache(encoded_records.capacity)
+        for record in store:
+            cache.get(record)
+        return store, cache
+
+    dict_bytes, _ = measure(dict_layout)
+    record_bytes, _ = measure(record_layout)
+    eager_bytes, _ = measure(eager_layout)
+    cached_bytes, _ = measure(cached_layout)
+    return {
+        'count': count,
+        'dict_bytes': dict_bytes,
+        'record_bytes': record_bytes,
+        'eager_encoded_bytes': eager_bytes,
+        'cached_encoded_bytes': cached_bytes,
+        'encoded_cache_capacity': encoded_records.capacity,
+        'dict_bytes_per_sms': round(dict_bytes / count, 1),
+        'record_bytes_per_sms': round(record_bytes / count, 1),
+        'eager_encoded_bytes_per_sms': round(eager_bytes / count, 1),
+        'cached_encoded_bytes_per_sms': round(cached_bytes / count, 1),
+        'ratio': round(dict_bytes / record_bytes, 2) if record_bytes else None
+    }
+
+
+def main(argv=None):
+    counts = [int(arg) for arg in (argv or sys.argv[1:])] or [2000, 100000]
+    results = [compare(count) for count in counts]
+    for row in results:
+        print(f"{row['count']:>8} SMS: dict {row['dict_bytes'] / 1e6:8.2f} MB "
+              f"({row['dict_bytes_per_sms']} B/sms)  record {row['record_bytes'] / 1e6:8.2f} MB "
+              f"({row['record_bytes_per_sms']} B/sms)  x{row['ratio']}")
+        print(f"{'':>13} + encodings: eager {row['eager_encoded_bytes'] / 1e6:8.2f} MB "
+              f"({row['eager_encoded_bytes_per_sms']} B/sms)  LRU[{row['encoded_cache_capacity']}] "
+              f"{row['cached_encoded_bytes'] / 1e6:8.2f} MB ({row['cached_encoded_bytes_per_sms']} B/sms)")
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark the LiveTestSMS parser backends against saved portal fixtures
+
+Usage: python -m benchmarks.parser_backends [rows ...]
+"""
+import sys
+import time
+
+from app import LxmlPageParser, SoupPageParser, ivas_scraper
+from benchmarks.portal_pages import FIXTURE_ROWS, load_fixture
+
+VOLATILE_FIELDS = ('time', 'timestamp', 'id')
+
+
+def stable_records(page):
+    """Parsed SMS dicts without fields that depend on the wall clock"""
+    return [
+        {key: value for key, value in sms.items() if key not in VOLATILE_FIELDS}
+        for sms in ivas_scraper.parse_rows(page.rows)
+    ]
+
+
+def time_parser(parser, html_content, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        page = parser.parse(html_content)
+    return (time.perf_counter() - start) / repeat, page
+
+
+def compare(row_count, repeat=None):
+    """Time both backends on one fixture and check their output matches"""
+    html_content = load_fixture(row_count)
+    repeat = repeat or max(3, 2000 // row_count)
+    soup_time, soup_page = time_parser(SoupPageParser(), html_content, repeat)
+    lxml_time, lxml_page = time_parser(LxmlPageParser(), html_content, repeat)
+    identical = soup_page == lxml_page and stable_records(soup_page) == stable_records(lxml_page)
+    return {
+        'rows': row_count,
+        'page_bytes': len(html_content),
+        'soup_ms': round(soup_time * 1000, 3),
+        'lxml_ms': round(lxml_time * 1000, 3),
+        'speedup': round(soup_time / lxml_time, 2),
+        'identical': identical
+    }
+
+
+def main(argv=None):
+    row_counts = [int(arg) for arg in (argv or sys.argv[1:])] or FIXTURE_ROWS
+    results = [compare(row_count) for row_count in row_counts]
+    for row in results:
+        print(f"{row['rows']:>5} rows ({row['page_bytes'] / 1024:6.1f} KB): soup {row['soup_ms']:8.2f} ms  "
+              f"lxml {row['lxml_ms']:7.2f} ms  x{row['speedup']}  identical={row['identical']}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
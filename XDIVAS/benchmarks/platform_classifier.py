@@ -0,0 +1,97 @@
+"""Micro-benchmark the compiled platform classifier against the legacy per-pattern scan
+
+Usage: python -m benchmarks.platform_classifier [rows]
+"""
+import re
+import sys
+import time
+
+from app import PlatformClassifier, SoupPageParser
+from benchmarks.portal_pages import load_fixture
+
+# Rows that exercise priority and overlapping-match edge cases
+EDGE_CASE_ROWS = [
+    ('NG +2348012345678', 'WhatsApp', 'Your code wa.meta 1234'),
+    ('IN +919812345678', 'INFO', 'sign in with this code 4411'),
+    ('PK +923001234567', 'Instagram', 'whats new on insta'),
+    ('BD +8801712345678', '', ''),
+    ('EG +201001234567', 'Verify', 'Use 228-119 for WHATS APP'),
+    ('KE +254712345678', 'IG', 'Welcome back to Facebook'),
+]
+
+
+def legacy_detect_platform(sid, message, raw_text=""):
+    """The original detect_platform implementation"""
+    combined_text = (sid + " " + message + " " + raw_text).lower()
+    facebook_patterns = [
+        r'facebook', r'fb\.com', r'fb\.me', r'meta', r'face',
+        r'verify facebook', r'facebook code', r'fb code',
+        r'facebook login', r'fb login'
+    ]
+    whatsapp_patterns = [
+        r'whatsapp', r'wa\.me', r'whats app', r'whats',
+        r'verify whatsapp', r'whatsapp code', r'wa code',
+        r'whatsapp login'
+    ]
+    instagram_patterns = [
+        r'instagram', r'ig', r'insta',
+        r'verify instagram', r'instagram code', r'ig code',
+        r'instagram login'
+    ]
+    for pattern in facebook_patterns:
+        if re.search(pattern, combined_text, re.IGNORECASE):
+            return 'facebook'
+    for pattern in whatsapp_patterns:
+        if re.search(pattern, combined_text, re.IGNORECASE):
+            return 'whatsapp'
+    for pattern in instagram_patterns:
+        if re.search(pattern, combined_text, re.IGNORECASE):
+            return 'instagram'
+    return 'facebook'
+
+
+def recorded_rows(row_count):
+    return SoupPageParser().parse(load_fixture(row_count)).rows + EDGE_CASE_ROWS
+
+
+def main(argv=None):
+    argv = argv or sys.argv[1:]
+    rows = recorded_rows(int(argv[0]) if argv else 1000)
+    classifier = PlatformClassifier()
+
+    expected = [legacy_detect_platform(sid, message, first_col) for first_col, sid, message in rows]
+    mismatches = [
+        (row, want, got)
+        for row, want, got in zip(rows, expected, classifier.classify_batch(rows))
+        if want != got
+    ]
+
+    repeat = max(1, 20000 // len(rows))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for first_col, sid, message in rows:
+            legacy_detect_platform(sid, message, first_col)
+    legacy = (time.perf_counter() - start) / (repeat * len(rows))
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        classifier.classify_batch(rows)
+    compiled = (time.perf_counter() - start) / (repeat * len(rows))
+
+    result = {
+        'rows': len(rows),
+        'legacy_us_per_row': round(legacy * 1e6, 3),
+        'compiled_us_per_row': round(compiled * 1e6, 3),
+        'speedup': round(legacy / compiled, 2),
+        'mismatches': len(mismatches)
+    }
+    print(f"{result['rows']} rows: legacy {result['legacy_us_per_row']} us/row  "
+          f"compiled {result['compiled_us_per_row']} us/row  x{result['speedup']}  "
+          f"mismatches={result['mismatches']}")
+    for row, want, got in mismatches[:10]:
+        print(f"  {row!r}: legacy={want} compiled={got}")
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Recorded-style IVAS portal pages used as benchmark fixtures
+
+Usage: python -m benchmarks.portal_pages [rows ...]   (rewrites fixture files)
+"""
+import os
+import random
+import sys
+from html import escape
+
+from benchmarks.common import COUNTRY_SAMPLE, MESSAGES, SENDERS
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIXTURE_ROWS = (10, 100, 1000)
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8">
+    <meta name="csrf-token" content="pDq0SLJjOoD8yNnMFWBm8WXJ2P3qKz1VbcN7e9Rk">
+    <title>Live Test SMS | iVAS SMS</title>
+    <link rel="stylesheet" href="/assets/css/app.css">
+    <script>window.Laravel = {{"csrfToken": "pDq0SLJjOoD8yNnMFWBm8WXJ2P3qKz1VbcN7e9Rk"}};</script>
+</head>
+<body class="layout-fixed sidebar-mini">
+<div class="wrapper">
+    <nav class="main-header navbar navbar-expand navbar-white">
+        <ul class="navbar-nav ml-auto">
+            <li class="nav-item"><a class="nav-link" href="/portal/profile">Riyad Mahfuz</a></li>
+            <li class="nav-item"><form method="POST" action="/logout"><input type="hidden" name="_token" value="pDq0SLJjOoD8yNnMFWBm8WXJ2P3qKz1VbcN7e9Rk"><button class="btn btn-link">Logout</button></form></li>
+        </ul>
+    </nav>
+    <aside class="main-sidebar">
+        <ul class="nav nav-sidebar flex-column">
+{sidebar}
+        </ul>
+    </aside>
+    <div class="content-wrapper">
+        <section class="content">
+            <div class="card">
+                <div class="card-header"><h3 class="card-title">Top Ranges</h3></div>
+                <div class="card-body">
+{ranges}
+                </div>
+            </div>
+            <div class="card">
+                <div class="card-header"><h3 class="card-title">Live Test SMS</h3></div>
+                <div class="card-body table-responsive p-0">
+                    <table id="LiveTestSMS" class="table table-hover text-nowrap">
+                        <thead><tr><th>Number</th><th>SID</th><th>Message</th></tr></thead>
+                        <tbody>
+{rows}
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+        </section>
+    </div>
+    <footer class="main-footer"><strong>Copyright &copy; iVAS SMS.</strong> All rights reserved.</footer>
+</div>
+<script src="/assets/js/app.js"></script>
+<script>$(function () {{ $('#LiveTestSMS').DataTable({{"paging": false, "ordering": false}}); }});</script>
+</body>
+</html>
+"""
+
+ROW_TEMPLATE = """                            <tr>
+                                <td><div class="d-flex align-items-center"><span class="flag-icon flag-icon-{flag}"></span> <div><h6 class="mb-0">{country_code} RANGE {range_id}</h6><small class="text-muted">{phone}</small></div></div></td>
+                                <td><span class="badge badge-info">{sid}</span></td>
+                                <td><p class="mb-0 text-wrap">{message}</p></td>
+                            </tr>"""
+
+
+def render_sidebar():
+    return '\n'.join(
+        f'            <li class="nav-item"><a class="nav-link" href="/portal/section/{i}"><i class="fas fa-circle"></i><p>Section {i}</p></a></li>'
+        for i in range(40)
+    )
+
+
+def render_ranges(rng, count=12):
+    return '\n'.join(
+        f'                    <div class="range-item"><span class="range-name">{rng.choice(COUNTRY_SAMPLE)} RANGE {rng.randint(1000, 9999)}</span> '
+        f'<p class="text-muted">Number +{rng.randint(20, 999)} {rng.randint(100, 999)} XXX</p></div>'
+        for _ in range(count)
+    )
+
+
+def render_row(rng):
+    """One random LiveTestSMS table row"""
+    country_code = rng.choice(COUNTRY_SAMPLE)
+    code = rng.randint(100000, 999999)
+    return ROW_TEMPLATE.format(
+        flag=country_code.lower(),
+        country_code=country_code,
+        range_id=rng.randint(1000, 9999),
+        phone=f"+{rng.randint(20, 999)} {rng.randint(100, 999)} {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        sid=escape(rng.choice(SENDERS)),
+        message=escape(rng.choice(MESSAGES).format(code=f"{code // 1000}-{code % 1000:03d}"))
+    )
+
+
+def render_page(ranges, rows):
+    """Full LiveTestSMS page around pre-rendered range items and table rows (newest first)"""
+    return PAGE_TEMPLATE.format(sidebar=render_sidebar(), ranges=ranges, rows='\n'.join(rows))
+
+
+def render_live_test_sms_page(row_count, seed=7):
+    """Render a LiveTestSMS page with row_count rows, newest first"""
+    rng = random.Random(seed)
+    ranges = render_ranges(rng)
+    return render_page(ranges, [render_row(rng) for _ in range(row_count)])
+
+
+def fixture_path(row_count):
+    return os.path.join(FIXTURE_DIR, f'live_test_sms_{row_count}.html')
+
+
+def load_fixture(row_count):
+    """Read a saved fixture page, rendering it if it was never written"""
+    path = fixture_path(row_count)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    return render_live_test_sms_page(row_count)
+
+
+def write_fixtures(row_counts=FIXTURE_ROWS):
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for row_count in row_counts:
+        with open(fixture_path(row_count), 'w', encoding='utf-8') as f:
+            f.write(render_live_test_sms_page(row_count))
+        print(f"Wrote {fixture_path(row_count)}")
+
+
+if __name__ == '__main__':
+    write_fixtures([int(arg) for arg in sys.argv[1:]] or FIXTURE_ROWS)
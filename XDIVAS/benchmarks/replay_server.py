@@ -0,0 +1,230 @@
+"""Local stand-in for the IVAS portal, for soak and load testing the scraper
+
+Serves /portal, /login and /portal/live/test_sms from recorded pages (or the
+synthetic benchmark templates) and keeps adding LiveTestSMS rows at a steady
+rate with optional bursts. Responses can be gzip/brotli encoded, delayed, or
+replaced by injected errors. Point the dashboard at it with IVAS_BASE_URL.
+
+Usage:
+    python -m benchmarks.replay_server [--port 8765] [--rate 5] [--burst-every 30 --burst-size 50]
+                                       [--encoding gzip|br|identity] [--latency 0.1] [--error-rate 0.05]
+                                       [--recording DIR]
+    python -m benchmarks.replay_server --record DIR    (save the live portal pages, uses cookies.json)
+"""
+import argparse
+import gzip
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+
+import brotli
+from flask import Flask, Response, request
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from benchmarks.portal_pages import render_page, render_ranges, render_row
+
+RECORDED_PAGES = {'portal': 'portal.html', 'login': 'login.html', 'live_test_sms': 'live_test_sms.html'}
+TABLE_BODY_PATTERN = re.compile(r'(<table[^>]*id="LiveTestSMS".*?<tbody[^>]*>)(.*?)(</tbody>)', re.S | re.I)
+TOKEN = 'replayTokenReplayTokenReplayTokenReplay0'
+
+PORTAL_PAGE = f"""<!DOCTYPE html>
+<html><head><meta name="csrf-token" content="{TOKEN}"><title>Dashboard | iVAS SMS</title></head>
+<body><nav><a href="/portal/profile">Riyad Mahfuz</a>
+<form method="POST" action="/logout"><input type="hidden" name="_token" value="{TOKEN}"><button>Logout</button></form></nav>
+<input type="hidden" name="_session" value="replay-session"></body></html>
+"""
+
+LOGIN_PAGE = f"""<!DOCTYPE html>
+<html><head><title>Login | iVAS SMS</title></head>
+<body><form method="POST" action="/login"><input type="hidden" name="_token" value="{TOKEN}">
+<input name="email"><input name="password" type="password"><button>Login</button></form></body></html>
+"""
+
+
+class PortalReplay:
+    """State of the fake portal: a rolling LiveTestSMS table plus fault injection settings"""
+    def __init__(self, rate=5.0, burst_every=0, burst_size=0, table_rows=100, encoding='gzip',
+                 latency=0.0, jitter=0.0, error_rate=0.0, recording_dir=None, seed=1):
+        self.rate = rate
+        self.burst_every = burst_every
+        self.burst_size = burst_size
+        self.encoding = encoding
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.rows = deque(maxlen=table_rows)  # rendered rows, newest first
+        self.ranges = render_ranges(self.rng)
+        self.pages = self._load_recording(recording_dir)
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.generated = 0
+        self.bursts = 0
+        self.stats = Counter()
+
+    @staticmethod
+    def _load_recording(recording_dir):
+        pages = {}
+        for name, filename in RECORDED_PAGES.items():
+            path = os.path.join(recording_dir, filename) if recording_dir else None
+            if path and os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    pages[name] = f.read()
+        return pages
+
+    def advance(self, now=None):
+        """Append every row that is due by now: the steady rate plus any bursts"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            elapsed = now - self.started
+            target = int(elapsed * self.rate)
+            if self.burst_every and self.burst_size:
+                self.bursts = int(elapsed // self.burst_every)
+                target += self.bursts * self.burst_size
+            new_rows = max(0, target - self.generated)
+            # Rows beyond the table size would scroll off before anyone sees them
+            for _ in range(min(new_rows, self.rows.maxlen)):
+                self.rows.appendleft(render_row(self.rng))
+            self.generated += new_rows
+            return new_rows
+
+    def live_test_sms_page(self):
+        with self.lock:
+            rows = list(self.rows)
+        recorded = self.pages.get('live_test_sms')
+        if recorded and TABLE_BODY_PATTERN.search(recorded):
+            body = '\n'.join(rows)
+            return TABLE_BODY_PATTERN.sub(lambda m: m.group(1) + body + m.group(3), recorded, count=1)
+        return render_page(self.ranges, rows)
+
+    def respond(self, html):
+        """Apply latency, error injection, conditional GET and content encoding"""
+        self.stats['requests'] += 1
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.stats['errors_injected'] += 1
+            return Response('injected error', status=self.rng.choice((500, 502, 503)))
+
+        body = html.encode('utf-8')
+        etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+        if etag in request.if_none_match:
+            self.stats['not_modified'] += 1
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        accepted = request.headers.get('Accept-Encoding', '')
+        encoding = self.encoding if self.encoding in accepted else 'identity'
+        if encoding == 'gzip':
+            body = gzip.compress(body, compresslevel=6)
+        elif encoding == 'br':
+            body = brotli.compress(body, quality=5)
+        response = Response(body, mimetype='text/html')
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        self.stats['bytes_sent'] += len(body)
+        return response
+
+    def create_app(self):
+        app = Flask('ivas_replay')
+
+        @app.route('/portal')
+        def portal():
+            return self.respond(self.pages.get('portal', PORTAL_PAGE))
+
+        @app.route('/login')
+        def login():
+            return self.respond(self.pages.get('login', LOGIN_PAGE))
+
+        @app.route('/portal/live/test_sms')
+        def live_test_sms():
+            self.advance()
+            return self.respond(self.live_test_sms_page())
+
+        @app.route('/replay/stats')
+        def replay_stats():
+            return {
+                'rows_generated': self.generated,
+                'bursts': self.bursts,
+                'table_rows': len(self.rows),
+                **self.stats
+            }
+
+        return app
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """No per-request access log lines mixed into benchmark output"""
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def serve(replay, host='127.0.0.1', port=0):
+    """Start the replay portal in a background thread; returns (server, base_url)"""
+    server = make_server(host, port, replay.create_app(), threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, name='ivas-replay', daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def record(directory):
+    """Save the live portal pages (using the dashboard's cookies) for later replay"""
+    from app import ivas_scraper
+
+    os.makedirs(directory, exist_ok=True)
+    paths = {'portal': '/portal', 'login': '/login', 'live_test_sms': '/portal/live/test_sms'}
+    for name, path in paths.items():
+        response = ivas_scraper.scraper.get(f"{ivas_scraper.base_url}{path}", timeout=15)
+        with open(os.path.join(directory, RECORDED_PAGES[name]), 'w', encoding='utf-8') as f:
+            f.write(ivas_scraper.decompress_response(response))
+        print(f"{path}: HTTP {response.status_code} -> {RECORDED_PAGES[name]}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Local IVAS portal stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rate', type=float, default=5.0, help='new rows per second')
+    parser.add_argument('--burst-every', type=float, default=0, help='seconds between bursts')
+    parser.add_argument('--burst-size', type=int, default=0, help='rows added per burst')
+    parser.add_argument('--table-rows', type=int, default=100, help='rows kept in the LiveTestSMS table')
+    parser.add_argument('--encoding', choices=('gzip', 'br', 'identity'), default='gzip')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random latency, up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of responses replaced by 5xx')
+    parser.add_argument('--recording', help='directory of recorded pages to replay')
+    parser.add_argument('--record', metavar='DIR', help='record the live portal into DIR and exit')
+    return parser
+
+
+def replay_from_args(args):
+    return PortalReplay(
+        rate=args.rate, burst_every=args.burst_every, burst_size=args.burst_size,
+        table_rows=args.table_rows, encoding=args.encoding, latency=args.latency,
+        jitter=args.jitter, error_rate=args.error_rate, recording_dir=args.recording
+    )
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.record:
+        record(args.record)
+        return
+    replay = replay_from_args(args)
+    server = make_server(args.host, args.port, replay.create_app(), threaded=True)
+    print(f"IVAS replay portal on http://{args.host}:{server.server_port} "
+          f"(set IVAS_BASE_URL to this address)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
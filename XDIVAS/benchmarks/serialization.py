@@ -0,0 +1,73 @@
+"""Benchmark per-request SMS serialization against the cached per-record encodings
+
+Usage: python -m benchmarks.serialization [limit ...]
+"""
+import json
+import sys
+import time
+
+from app import EnhancedDataStorage, JSON_ENCODERS, SocketJSON, encode_payload
+from benchmarks.common import synthetic_sms_dicts
+
+DEFAULT_LIMITS = (10, 50, 100, 500)
+
+
+def live_sms_payload(records):
+    return {
+        'success': True,
+        'data': records,
+        'total': 2000,
+        'filtered': len(records),
+        'last_seq': 2000,
+        'stream_id': 'benchmark'
+    }
+
+
+def per_request(records):
+    """What every request used to do: build the dicts, then encode them all"""
+    return json.dumps(live_sms_payload([record.to_dict() for record in records])).encode('utf-8')
+
+
+def cached(records):
+    return encode_payload(live_sms_payload(records))
+
+
+def time_call(func, records, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = func(records)
+    return (time.perf_counter() - start) / repeat, body
+
+
+def compare(storage, limit, repeat=None):
+    """Time one /api/live-sms sized response both ways and check the JSON matches"""
+    records = storage.query_sms(limit=limit)
+    repeat = repeat or max(20, 20000 // limit)
+    old_time, old_body = time_call(per_request, records, repeat)
+    new_time, new_body = time_call(cached, records, repeat)
+    socket_time, _ = time_call(lambda rows: SocketJSON.dumps(['sms_batch', {'sms_list': rows}]), records, repeat)
+    return {
+        'limit': limit,
+        'per_request_us': round(old_time * 1e6, 1),
+        'cached_us': round(new_time * 1e6, 1),
+        'socket_packet_us': round(socket_time * 1e6, 1),
+        'speedup': round(old_time / new_time, 2),
+        'identical': json.loads(old_body) == json.loads(new_body)
+    }
+
+
+def main(argv=None):
+    limits = [int(arg) for arg in (argv or sys.argv[1:])] or DEFAULT_LIMITS
+    storage = EnhancedDataStorage(max_sms=max(limits))
+    storage.add_sms_batch(synthetic_sms_dicts(max(limits)))
+    print(f"encoders available: {', '.join(JSON_ENCODERS)}")
+    results = [compare(storage, limit) for limit in limits]
+    for row in results:
+        print(f"{row['limit']:>5} records: per-request {row['per_request_us']:9.1f} us  "
+              f"cached {row['cached_us']:8.1f} us  socket packet {row['socket_packet_us']:8.1f} us  "
+              f"x{row['speedup']}  identical={row['identical']}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""Benchmark suites run by `python -m benchmarks`
+
+Every suite takes `quick` and returns a list of rows: a `name` plus numeric
+metrics. Metric names end in `_ms`/`_us` (lower is better) or `_per_second`
+(higher is better) so runs can be compared mechanically.
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from benchmarks.common import synthetic_sms_dicts
+from benchmarks.portal_pages import FIXTURE_ROWS, load_fixture
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def latency_row(name, samples, **extra):
+    """Summarize per-call durations (seconds) as milliseconds"""
+    return {
+        'name': name,
+        'mean_ms': round(statistics.fmean(samples) * 1000, 4),
+        'p50_ms': round(percentile(samples, 0.5) * 1000, 4),
+        'p95_ms': round(percentile(samples, 0.95) * 1000, 4),
+        **extra
+    }
+
+
+def parsing(quick=False):
+    """Recorded LiveTestSMS pages through both parser backends and row parsing"""
+    from app import LxmlPageParser, SoupPageParser, ivas_scraper
+
+    rows = []
+    for row_count in FIXTURE_ROWS:
+        html_content = load_fixture(row_count)
+        repeat = max(2, (200 if quick else 2000) // row_count)
+        for name, parser in (('soup', SoupPageParser()), ('lxml', LxmlPageParser())):
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                page = parser.parse(html_content)
+                samples.append(time.perf_counter() - start)
+            rows.append(latency_row(f'{name}/{row_count}_rows', samples))
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ivas_scraper.parse_rows(page.rows)
+            samples.append(time.perf_counter() - start)
+        rows.append(latency_row(f'parse_rows/{row_count}_rows', samples))
+    return rows
+
+
+def ingestion(quick=False, batch_size=50):
+    """add_sms_batch throughput into an in-memory store at several max_sms sizes"""
+    from app import EnhancedDataStorage
+
+    rows = []
+    for max_sms in ((500, 2000) if quick else (500, 2000, 10000)):
+        data = synthetic_sms_dicts(max(max_sms * 2, 5000), seed=max_sms)
+        storage = EnhancedDataStorage(max_sms=max_sms)
+        samples = []
+        for i in range(0, len(data), batch_size):
+            batch = data[i:i + batch_size]
+            start = time.perf_counter()
+            storage.add_sms_batch(batch)
+            samples.append(time.perf_counter() - start)
+        rows.append(latency_row(
+            f'max_sms_{max_sms}', samples,
+            sms_per_second=round(len(data) / sum(samples), 1)
+        ))
+    return rows
+
+
+ENDPOINTS = (
+    '/api/status',
+    '/api/live-sms?limit=50',
+    '/api/live-sms?platform=whatsapp&limit=50',
+    '/api/statistics',
+    '/api/timeseries?step=5m&span=6h',
+    '/api/top-ranges',
+)
+
+
+def endpoints(quick=False):
+    """Request latency through the Flask test client against a filled store"""
+    from app import app, data_storage
+
+    data_storage.add_sms_batch(synthetic_sms_dicts(data_storage.live_sms_data.maxlen, seed=11))
+    client = app.test_client()
+    rows = []
+    for path in ENDPOINTS:
+        client.get(path)
+        samples = []
+        for _ in range(50 if quick else 300):
+            start = time.perf_counter()
+            response = client.get(path)
+            samples.append(time.perf_counter() - start)
+        rows.append(latency_row(path, samples, bytes=len(response.data)))
+    return rows
+
+
+def fanout(quick=False, batch_size=20):
+    """One sms_batch broadcast to N simulated Socket.IO clients"""
+    from app import app, data_storage, sms_broadcaster, socketio
+
+    data_storage.add_sms_batch(synthetic_sms_dicts(batch_size, seed=23))
+    records = data_storage.query_sms(limit=batch_size)
+    rows = []
+    for client_count in ((1, 10, 50) if quick else (1, 10, 100)):
+        clients = [socketio.test_client(app) for _ in range(client_count)]
+        for client in clients:
+            client.get_received()
+        samples = []
+        for _ in range(5 if quick else 20):
+            start = time.perf_counter()
+            sms_broadcaster.publish(records, 'benchmark')
+            sms_broadcaster.flush()
+            samples.append(time.perf_counter() - start)
+        delivered = sum(
+            1 for client in clients for event in client.get_received() if event['name'] == 'sms_batch'
+        )
+        for client in clients:
+            client.disconnect()
+        rows.append(latency_row(f'{client_count}_clients', samples, events_delivered=delivered))
+    return rows
+
+
+def serialization(quick=False):
+    """Cached per-record JSON fragments against per-request encoding"""
+    from app import EnhancedDataStorage
+    from benchmarks.serialization import compare
+
+    storage = EnhancedDataStorage(max_sms=500)
+    storage.add_sms_batch(synthetic_sms_dicts(500))
+    rows = []
+    for limit in (10, 50, 500):
+        result = compare(storage, limit, repeat=50 if quick else None)
+        rows.append({
+            'name': f'{limit}_records',
+            'per_request_us': result['per_request_us'],
+            'cached_us': result['cached_us'],
+            'socket_packet_us': result['socket_packet_us']
+        })
+    return rows
+
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_PROBE = "import time; started = time.perf_counter(); import app; print(time.perf_counter() - started)"
+SERVER = ("import app; app.initialize_system(); app.socketio.run(app.app, host='127.0.0.1', port={port}, "
+          "allow_unsafe_werkzeug=True, log_output=False)")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def first_byte(port, started, timeout=60):
+    """Seconds from started until /api/status answers"""
+    while time.perf_counter() - started < timeout:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/status", timeout=1) as response:
+                response.read(1)
+                return time.perf_counter() - started
+        except OSError:
+            time.sleep(0.01)
+    raise TimeoutError(f"dashboard on port {port} did not answer within {timeout}s")
+
+
+def startup(quick=False, portal_latency=1.0):
+    """Fresh-interpreter import time, and time to first byte with and without fast start"""
+    from benchmarks.replay_server import PortalReplay, serve
+
+    env = dict(os.environ, IVAS_DB_PATH='')
+    samples = []
+    for _ in range(3 if quick else 10):
+        probe = subprocess.run([sys.executable, '-c', IMPORT_PROBE], env=env, cwd=APP_DIR,
+                               capture_output=True, text=True, check=True)
+        samples.append(float(probe.stdout.split()[-1]))
+    rows = [latency_row('import_app', samples)]
+
+    # A slow portal is what makes a blocking startup visible
+    server, base_url = serve(PortalReplay(latency=portal_latency))
+    for name, fast_start in (('fast_start', '1'), ('blocking', '0')):
+        samples = []
+        for _ in range(2 if quick else 5):
+            port = free_port()
+            started = time.perf_counter()
+            process = subprocess.Popen(
+                [sys.executable, '-c', SERVER.format(port=port)], cwd=APP_DIR,
+                env=dict(env, IVAS_BASE_URL=base_url, IVAS_FAST_START=fast_start),
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                samples.append(first_byte(port, started))
+            finally:
+                process.terminate()
+                process.wait(timeout=10)
+        rows.append(latency_row(f'first_byte/{name}', samples))
+    server.shutdown()
+    return rows
+
+
+SUITES = {
+    'parsing': parsing,
+    'ingestion': ingestion,
+    'endpoints': endpoints,
+    'fanout': fanout,
+    'serialization': serialization,
+    'startup': startup,
+}
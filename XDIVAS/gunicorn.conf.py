@@ -0,0 +1,18 @@
+# Multi-worker deployment: gunicorn -c gunicorn.conf.py app:app
+# One worker wins the leader lock and scrapes; the others mirror it over the cluster socket.
+# Clients connect over WebSocket first. The long-polling fallback needs every request of a
+# session on the same worker: behind a sticky load balancer set IVAS_STICKY_SESSIONS=1,
+# otherwise multi-worker deployments serve WebSocket only.
+import os
+
+bind = f"0.0.0.0:{os.environ.get('IVAS_PORT', 5000)}"
+# One worker unless asked for more; scale out with IVAS_WORKERS
+workers = int(os.environ.get('IVAS_WORKERS', 1))
+if workers > 1:
+    os.environ.setdefault('IVAS_CLUSTER_DIR', '/tmp/ivas-cluster')
+threads = int(os.environ.get('IVAS_WORKER_THREADS', 100))
+
+
+def post_worker_init(worker):
+    from app import initialize_system
+    initialize_system()
@@ -0,0 +1,31 @@
+"""Shared fixtures for the IVAS dashboard tests"""
+import os
+import sys
+
+import pytest
+
+# The dashboard reads its configuration at import time; keep tests in memory
+os.environ['IVAS_DB_PATH'] = ''
+os.environ.setdefault('IVAS_BROADCAST_WINDOW', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as ivas_app  # noqa: E402
+from benchmarks.common import synthetic_sms_dicts  # noqa: E402
+
+
+@pytest.fixture
+def storage():
+    """A fresh in-memory store"""
+    return ivas_app.EnhancedDataStorage(max_sms=100)
+
+
+@pytest.fixture
+def sms_dicts():
+    return synthetic_sms_dicts(20)
+
+
+@pytest.fixture
+def client():
+    ivas_app.app.config['TESTING'] = True
+    with ivas_app.app.test_client() as test_client:
+        yield test_client
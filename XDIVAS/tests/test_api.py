@@ -0,0 +1,123 @@
+import json
+
+from app import (SMSRecord, _stdlib_dumps, app, data_storage, history_frame, ivas_scraper,
+                 query_interarrival, response_cache, socketio)
+
+
+def test_statistics_etag_and_not_modified(client, sms_dicts):
+    data_storage.add_sms_batch(sms_dicts)
+    first = client.get('/api/statistics')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    again = client.get('/api/statistics', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+
+
+def test_statistics_etag_changes_with_data(client, sms_dicts):
+    data_storage.clear()
+    etag = client.get('/api/statistics').headers['ETag']
+    data_storage.add_sms_batch(sms_dicts)
+    changed = client.get('/api/statistics', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.get_json()['total_sms'] == len(sms_dicts)
+
+
+def test_response_cache_reuses_body_until_key_changes(client):
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {'value': len(builds)}
+
+    with client.application.test_request_context('/'):
+        first = response_cache.respond('test', 1, build)
+        second = response_cache.respond('test', 1, build)
+        third = response_cache.respond('test', 2, build)
+    assert len(builds) == 2
+    assert first.get_data() == second.get_data() != third.get_data()
+    assert first.headers['ETag'] == second.headers['ETag'] != third.headers['ETag']
+
+
+def test_filter_sms_limit_is_validated_and_capped(sms_dicts):
+    data_storage.clear()
+    data_storage.add_sms_batch(sms_dicts)
+    socket_client = socketio.test_client(app)
+    socket_client.get_received()
+    for limit, expected in ((-5, 1), (0, 1), ('abc', len(sms_dicts)), (None, len(sms_dicts)), (10 ** 9, len(sms_dicts))):
+        socket_client.emit('filter_sms', {'platform': 'all', 'country': 'all', 'limit': limit})
+        events = [event for event in socket_client.get_received() if event['name'] == 'filtered_data']
+        assert events[-1]['args'][0]['count'] == expected
+    socket_client.disconnect()
+
+
+def test_statistics_include_configured_platforms(client, monkeypatch):
+    monkeypatch.setattr(data_storage, 'platforms', [*data_storage.platforms, 'telegram'])
+    response_cache.entries.pop('statistics', None)
+    stats = client.get('/api/statistics').get_json()['platform_stats']
+    assert stats['telegram']['count'] == 0
+    assert stats['telegram']['color']
+
+
+def test_live_sms_limit_is_clamped(client, sms_dicts):
+    data_storage.clear()
+    data_storage.add_sms_batch(sms_dicts)
+    for limit, expected in (('-3', 1), ('0', 1), ('5', 5), ('100000', len(sms_dicts))):
+        body = client.get(f'/api/live-sms?limit={limit}').get_json()
+        assert body['filtered'] == expected
+    assert client.get('/api/live-sms?limit=abc').status_code == 400
+    assert client.get('/api/history?limit=-1').get_json()['count'] == 1
+
+
+def test_status_reports_counters_that_change_without_new_data(client):
+    first = client.get('/api/status')
+    assert first.status_code == 200
+    assert client.get('/api/status', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    ivas_scraper.count_poll('unchanged_body')
+    fresh = client.get('/api/status', headers={'If-None-Match': first.headers['ETag']})
+    assert fresh.status_code == 200
+    body = fresh.get_json()
+    assert body['poll_stats']['unchanged_body'] == first.get_json()['poll_stats']['unchanged_body'] + 1
+    assert body['snapshot_version'] == data_storage.snapshot.version
+
+
+def test_timeseries_rejects_too_many_points(client):
+    assert client.get('/api/timeseries?step=1h&span=1d').status_code == 200
+    response = client.get('/api/timeseries?step=1m&span=30d')
+    assert response.status_code == 400
+    assert 'points' in response.get_json()['error']
+
+
+def test_interarrival_open_ended_bin_is_strict_json():
+    records = [SMSRecord('whatsapp', 'Nigeria', 'NG', 'SID', f"+{seq}", 'code', '', str(seq), epoch, seq)
+               for seq, epoch in enumerate((1000, 1001, 9000), start=1)]
+    result = query_interarrival(history_frame(records), now=9001, span=10000)
+    assert result['histogram'][-1] == {'min_seconds': 3600, 'max_seconds': None, 'count': 1}
+    assert json.loads(_stdlib_dumps(result)) == result
+
+
+def test_top_ranges_limit_is_validated(client):
+    data_storage.range_counts.clear()
+    for range_text in ('NG +234', 'NG +234', 'IN +91'):
+        data_storage.range_counts.add(range_text)
+    assert [r['range'] for r in client.get('/api/top-ranges?limit=-4').get_json()['ranges']] == ['NG +234']
+    assert len(client.get('/api/top-ranges?limit=10').get_json()['ranges']) == 2
+    response = client.get('/api/top-ranges?limit=abc')
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Invalid limit')
+
+
+def test_analytics_query_parameters_are_validated(client, sms_dicts):
+    data_storage.clear()
+    data_storage.add_sms_batch(sms_dicts)
+    for query in ('type=ranges&span=0', 'type=ranges&span=-1h', 'type=counts&span=abc',
+                  'type=ranges&limit=abc', 'type=nope'):
+        response = client.get(f'/api/analytics/query?{query}')
+        assert response.status_code == 400, query
+        assert response.get_json()['error'].startswith('Invalid query')
+    ranges = client.get('/api/analytics/query?type=ranges&limit=-3&span=1d').get_json()
+    assert len(ranges['result']) == 1
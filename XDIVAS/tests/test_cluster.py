@@ -0,0 +1,49 @@
+import socket
+
+from app import ClusterCoordinator, EnhancedDataStorage, IVASRealTimeScraper, SocketBroadcaster, socketio
+
+
+def make_coordinator(storage):
+    return ClusterCoordinator(None, storage, IVASRealTimeScraper(), SocketBroadcaster(socketio, flush_window=0))
+
+
+def relay(coordinator, *messages):
+    """Send messages through a socket pair and decode them on the other end"""
+    sender, receiver = socket.socketpair()
+    with sender:
+        for message in messages:
+            sender.sendall(coordinator._encode(message))
+        sender.sendall(coordinator.FRAME_HEADER.pack(100) + b'{"truncated"')
+    with receiver:
+        return list(coordinator._frames(receiver))
+
+
+def test_frames_round_trip_and_stop_at_a_truncated_frame(storage, sms_dicts):
+    records = storage.add_sms_batch(sms_dicts[:3])
+    coordinator = make_coordinator(storage)
+    decoded = relay(coordinator, {'type': 'batch', 'records': records}, {'type': 'clear'})
+    assert [message['type'] for message in decoded] == ['batch', 'clear']
+    assert [item['seq'] for item in decoded[0]['records']] == [record.seq for record in records]
+    assert decoded[0]['records'][0]['message'] == records[0].message
+
+
+def test_follower_mirrors_the_leader_from_sync_and_batch_frames(storage, sms_dicts):
+    leader = make_coordinator(storage)
+    storage.add_sms_batch(sms_dicts[:10])
+    storage.range_counts.add('NG +234', 4)
+    follower_storage = EnhancedDataStorage(max_sms=100)
+    follower = make_coordinator(follower_storage)
+
+    [sync] = relay(leader, leader._sync_message())
+    follower._apply(sync)
+    assert follower_storage.stream_id == storage.stream_id
+    assert [r.seq for r in follower_storage.snapshot.records] == [r.seq for r in storage.snapshot.records]
+    assert follower_storage.snapshot.platform_counts == storage.snapshot.platform_counts
+    assert follower_storage.range_counts.counts() == {'NG +234': 4}
+
+    added = storage.add_sms_batch(sms_dicts[10:12])
+    [batch] = relay(leader, {'type': 'batch', 'records': added})
+    follower._apply(batch)
+    follower._apply(batch)  # a repeated frame adds nothing
+    assert follower_storage.last_seq == storage.last_seq == 12
+    assert [r.message for r in follower_storage.snapshot.records] == [r.message for r in storage.snapshot.records]
@@ -0,0 +1,147 @@
+import threading
+from collections import Counter
+
+from app import DedupIndex, IncrementalAnalytics, IVASRealTimeScraper, RingCounter, SpaceSaving, TopK
+
+
+def test_dedup_index_rejects_repeated_fingerprints():
+    index = DedupIndex(capacity=10)
+    fp = DedupIndex.fingerprint({'sid': 'WhatsApp', 'phone_number': '+2348012345678', 'message': 'code 123'})
+    assert index.add(fp)
+    assert not index.add(fp)
+    assert fp in index
+    assert (index.hits, index.misses) == (1, 1)
+
+
+def test_dedup_index_fingerprint_covers_every_key_field():
+    base = {'sid': 'WA', 'phone_number': '+1', 'message': 'hello'}
+    fingerprints = {
+        DedupIndex.fingerprint(base),
+        DedupIndex.fingerprint({**base, 'sid': 'FB'}),
+        DedupIndex.fingerprint({**base, 'phone_number': '+2'}),
+        DedupIndex.fingerprint({**base, 'message': 'hello!'})
+    }
+    assert len(fingerprints) == 4
+
+
+def test_dedup_index_evicts_oldest_at_capacity():
+    index = DedupIndex(capacity=3)
+    for fp in range(5):
+        index.add(fp)
+    assert len(index) == 3
+    assert 0 not in index and 1 not in index
+    assert index.add(0)
+
+
+def test_dedup_index_expires_entries_after_ttl(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr('app.time.monotonic', lambda: clock[0])
+    index = DedupIndex(capacity=10, ttl=60)
+    index.add(1)
+    clock[0] += 30
+    assert not index.add(1)
+    clock[0] += 61
+    assert index.add(1)
+
+
+def test_space_saving_is_exact_below_capacity():
+    sketch = SpaceSaving(capacity=4)
+    for key in 'aabbbc':
+        sketch.add(key)
+    assert sketch.counts() == {'a': 2, 'b': 3, 'c': 1}
+    assert sketch.top(1) == [('b', 3, 0)]
+    assert sketch.error_bound() == 0
+
+
+def test_space_saving_bounds_overestimate_after_evictions():
+    sketch = SpaceSaving(capacity=3)
+    stream = ['hot'] * 50 + [f"cold{i}" for i in range(30)] + ['warm'] * 20
+    exact = Counter(stream)
+    for key in stream:
+        sketch.add(key)
+    assert len(sketch) == 3
+    assert sketch.evictions > 0
+    for key, count, error in sketch.top(3):
+        assert count - error <= exact[key] <= count
+        assert error <= sketch.error_bound()
+    assert sketch.top(1)[0][0] == 'hot'
+
+
+def test_space_saving_add_with_amount():
+    sketch = SpaceSaving(capacity=2)
+    sketch.add('a', 10)
+    sketch.add('b', 3)
+    sketch.add('c', 1)
+    assert sketch['a'] == 10
+    assert sketch.total == 14
+
+
+def test_ring_counter_window_total_expires_old_buckets():
+    ring = RingCounter(slots=60, resolution=1)
+    ring.add(1000)
+    ring.add(1000)
+    ring.add(1030)
+    assert ring.window_total(1030) == 3
+    assert ring.window_total(1060) == 1
+    assert ring.window_total(1100) == 0
+
+
+def test_ring_counter_ignores_samples_older_than_window():
+    ring = RingCounter(slots=10, resolution=60)
+    ring.add(6000)
+    ring.add(6000 - 60 * 20)
+    assert ring.window_total(6000) == 1
+
+
+def test_top_k_keeps_highest_counts_in_order():
+    top = TopK(2)
+    counts = Counter()
+    for key in 'abcbcc':
+        counts[key] += 1
+        top.update(key, counts[key])
+    assert top.items() == [('c', 3), ('b', 2)]
+
+
+def test_top_k_handles_larger_increments():
+    top = TopK(3)
+    for key, count in [('a', 1), ('b', 2), ('c', 3), ('d', 1), ('a', 10), ('e', 4), ('d', 7)]:
+        top.update(key, count)
+    assert top.items() == [('a', 10), ('d', 7), ('e', 4)]
+
+
+def test_peak_hours_keep_the_same_clock_hour_on_different_days_apart():
+    engine = IncrementalAnalytics(peak_limit=3)
+    day = 86400
+    for ts in [36000] * 2 + [36000 + day] * 3 + [36000 + day + 3600]:
+        engine.record(ts)
+    assert [count for _, count in engine.top_hours()] == [3, 2, 1]
+    assert len({label for label, _ in engine.top_hours()}) == 3
+
+
+def test_peak_hours_forget_hours_outside_the_window():
+    engine = IncrementalAnalytics(peak_limit=3, peak_window_hours=3)
+    engine.add_hour(0, 50)
+    engine.add_hour(3600, 5)
+    engine.add_hour(3 * 3600, 1)
+    assert sorted(engine.hour_totals) == [3600, 3 * 3600]
+    assert [count for _, count in engine.top_hours()] == [5, 1]
+    engine.add_hour(0, 10)                      # too old to count any more
+    assert 0 not in engine.hour_totals
+
+
+def test_poll_counters_are_consistent_across_threads():
+    scraper = IVASRealTimeScraper()
+
+    def count(outcome):
+        for _ in range(2000):
+            scraper.count_poll(outcome)
+
+    threads = [threading.Thread(target=count, args=(outcome,))
+               for outcome in ('parsed', 'parsed', 'unchanged_body', 'failed')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counts = scraper.poll_counts()
+    assert counts['parsed'] == 4000 and counts['unchanged_body'] == 2000 and counts['failed'] == 2000
+    assert scraper.fetch_count == 6000
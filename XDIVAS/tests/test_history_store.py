@@ -0,0 +1,86 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import EnhancedDataStorage, HistoryAnalytics, SQLiteSMSStore, create_sms_store
+from benchmarks.common import synthetic_sms_dicts
+
+
+@pytest.fixture
+def make_storage(tmp_path):
+    stores = []
+
+    def make(**options):
+        store = SQLiteSMSStore(str(tmp_path / 'history.db'), **options)
+        stores.append(store)
+        return EnhancedDataStorage(max_sms=100, store=store)
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def test_persistence_is_opt_in(monkeypatch):
+    monkeypatch.delenv('IVAS_DB_PATH', raising=False)
+    assert create_sms_store() is None
+
+
+def test_history_includes_records_not_flushed_yet(make_storage):
+    storage = make_storage(flush_interval=0.5)
+    storage.add_sms_batch(synthetic_sms_dicts(20))
+    assert storage.store.flushed_seq == 0
+    history = storage.query_history(limit=50)
+    assert [record.seq for record in history] == list(range(20, 0, -1))
+    assert [record.seq for record in storage.query_history(before_seq=6, limit=3)] == [5, 4, 3]
+
+    storage.store.close()
+    assert storage.store.flushed_seq == 20
+    assert [record.seq for record in storage.query_history(limit=50)] == list(range(20, 0, -1))
+
+
+def test_analytics_include_records_not_flushed_yet(make_storage):
+    pytest.importorskip('pandas')
+    storage = make_storage(flush_interval=0.5)
+    storage.add_sms_batch(synthetic_sms_dicts(20))
+    analytics = HistoryAnalytics(storage)
+    assert json.loads(analytics.query('counts', span=86400, step=3600))['rows_scanned'] == 20
+    storage.store.close()
+    storage.add_sms_batch(synthetic_sms_dicts(5, seed=7))
+    assert json.loads(analytics.query('counts', span=86400, step=3600))['rows_scanned'] == 25
+
+
+def test_rows_past_retention_are_pruned(make_storage):
+    storage = make_storage(flush_interval=0, retention=3600)
+    old = synthetic_sms_dicts(5, seed=1)
+    for sms in old:
+        sms['timestamp'] = (datetime.now() - timedelta(hours=3)).isoformat()
+    storage.add_sms_batch(old + synthetic_sms_dicts(10, seed=2))
+    storage.store.close()
+    assert storage.store.rows_pruned == 5
+    assert len(storage.store.history(limit=100)) == 10
+    plan = storage.store.read_conn.execute(
+        "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM sms WHERE epoch >= ?", (int(time.time()),)
+    ).fetchall()
+    assert 'sms_epoch' in str(plan)
+
+
+def test_analytics_frame_drops_rows_the_store_pruned(make_storage):
+    pytest.importorskip('pandas')
+    storage = make_storage(flush_interval=0, retention=None)
+    old = synthetic_sms_dicts(5, seed=1)
+    for sms in old:
+        sms['timestamp'] = (datetime.now() - timedelta(hours=3)).isoformat()
+    storage.add_sms_batch(old + synthetic_sms_dicts(10, seed=2))
+    storage.store.close()
+    analytics = HistoryAnalytics(storage)
+    analytics.query('counts', span=86400, step=3600)
+    assert len(analytics.frame) == 15
+
+    storage.store.retention = 3600
+    storage.store._prune()
+    assert storage.store.rows_pruned == 5
+    storage.add_sms_batch(synthetic_sms_dicts(3, seed=3))
+    assert json.loads(analytics.query('counts', span=86400, step=3600))['rows_scanned'] == 13
+    assert len(analytics.frame) == 10
@@ -0,0 +1,59 @@
+from app import LatencyHistogram, MetricsRegistry
+
+
+def test_latency_quantile_past_the_last_bucket_is_none():
+    histogram = LatencyHistogram(buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5, 5):
+        histogram.observe(value)
+    assert histogram.quantile(0.25) == 0.1
+    assert histogram.quantile(0.5) == 1
+    assert histogram.quantile(0.95) is None
+    assert LatencyHistogram().quantile(0.5) == 0
+
+
+def test_metrics_render_spells_out_infinite_values():
+    registry = MetricsRegistry()
+    registry.gauge('ivas_test_gauge', 'Test gauge', lambda: float('inf'))
+    registry.gauge('ivas_test_labelled', 'Labelled gauge', lambda: {'a': float('-inf'), 'b': 2}, label='kind')
+    lines = registry.render().splitlines()
+    assert 'ivas_test_gauge +Inf' in lines
+    assert 'ivas_test_labelled{kind="a"} -Inf' in lines
+    assert 'ivas_test_labelled{kind="b"} 2' in lines
+
+
+def test_metrics_render_histograms_in_exposition_format():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('ivas_test_seconds', 'Test latency', LatencyHistogram(buckets=(0.1, 1)))
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value)
+    registry.histogram('ivas_stage_seconds', 'Per stage', {'parse': LatencyHistogram(buckets=(1,))}, label='stage')
+    lines = registry.render().splitlines()
+    assert lines[:2] == ['# HELP ivas_test_seconds Test latency', '# TYPE ivas_test_seconds histogram']
+    assert 'ivas_test_seconds_bucket{le="0.1"} 1' in lines
+    assert 'ivas_test_seconds_bucket{le="1"} 2' in lines
+    assert 'ivas_test_seconds_bucket{le="+Inf"} 3' in lines
+    assert 'ivas_test_seconds_sum 5.55' in lines
+    assert 'ivas_test_seconds_count 3' in lines
+    assert 'ivas_stage_seconds_bucket{stage="parse",le="+Inf"} 0' in lines
+    assert 'ivas_stage_seconds_count{stage="parse"} 0' in lines
+
+
+def test_metrics_render_counters_and_skips_failing_reads():
+    registry = MetricsRegistry()
+    registry.counter('ivas_polls_total', 'Polls', lambda: {'parsed': 3, 'failed': 1}, label='outcome')
+    registry.gauge('ivas_broken', 'Broken gauge', lambda: 1 / 0)
+    registry.gauge('ivas_clients', 'Clients', lambda: 2)
+    text = registry.render()
+    assert '# TYPE ivas_polls_total counter\n' in text
+    assert 'ivas_polls_total{outcome="parsed"} 3\nivas_polls_total{outcome="failed"} 1\n' in text
+    assert '# TYPE ivas_broken gauge\n# HELP ivas_clients' in text
+    assert text.endswith('ivas_clients 2\n')
+
+
+def test_metrics_endpoint(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type == MetricsRegistry.CONTENT_TYPE
+    text = response.get_data(as_text=True)
+    for family in ('ivas_fetch_seconds', 'ivas_polls_total', 'ivas_pipeline_queue_depth', 'ivas_snapshot_version'):
+        assert f'# TYPE {family} ' in text
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from app import LxmlPageParser, PlatformClassifier, SoupPageParser, ivas_scraper
+from benchmarks.common import SENDER_PLATFORMS, synthetic_sms_dicts
+from benchmarks.portal_pages import FIXTURE_ROWS, load_fixture
+
+VOLATILE_FIELDS = ('time', 'timestamp', 'id')
+
+
+def test_platform_classifier_honours_rule_priority():
+    classifier = PlatformClassifier()
+    assert classifier.classify('WhatsApp', 'Your code is 123') == 'whatsapp'
+    assert classifier.classify('Facebook', 'Your Instagram code') == 'facebook'
+    assert classifier.classify('IG', 'code 123') == 'instagram'
+    assert classifier.classify('Bank', 'otp 123') == 'facebook'
+
+
+def test_platform_classifier_batch_matches_single():
+    classifier = PlatformClassifier()
+    rows = [('NG +234', 'WA', 'whatsapp code'), ('IN +91', 'Insta', 'hi'), ('US +1', 'X', 'y')]
+    assert classifier.classify_batch(rows) == [classifier.classify(sid, message, first)
+                                               for first, sid, message in rows]
+
+
+def test_platform_classifier_from_file(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps({
+        'rules': [{'platform': 'telegram', 'patterns': ['telegram', r'\btg\b']},
+                  {'platform': 'whatsapp', 'patterns': ['whatsapp']}],
+        'default': 'whatsapp'
+    }))
+    classifier = PlatformClassifier.from_file(str(path))
+    assert classifier.platforms == ['telegram', 'whatsapp']
+    assert classifier.classify('TG', 'login code') == 'telegram'
+    assert classifier.classify('Bank', 'otp') == 'whatsapp'
+
+
+def stable_records(page):
+    return [
+        {key: value for key, value in sms.items() if key not in VOLATILE_FIELDS}
+        for sms in ivas_scraper.parse_rows(page.rows)
+    ]
+
+
+@pytest.mark.parametrize('row_count', FIXTURE_ROWS)
+def test_lxml_and_soup_parsers_agree(row_count):
+    html_content = load_fixture(row_count)
+    soup_page = SoupPageParser().parse(html_content)
+    lxml_page = LxmlPageParser().parse(html_content)
+    assert soup_page.table_rows and len(soup_page.rows) == row_count
+    assert lxml_page == soup_page
+    assert stable_records(lxml_page) == stable_records(soup_page)
+
+
+def test_parsers_stop_at_seen_rows():
+    html_content = load_fixture(100)
+    rows = SoupPageParser().parse(html_content).rows
+    seen = frozenset(rows[10:15])
+    for parser in (SoupPageParser(), LxmlPageParser()):
+        page = parser.parse(html_content, seen)
+        assert page.early_exit
+        assert page.rows == rows[:10]
+
+
+def test_synthetic_senders_map_to_their_platform():
+    classifier = PlatformClassifier()
+    for sid, platform in SENDER_PLATFORMS.items():
+        assert classifier.classify(sid, 'code 123') == platform
+    assert {sms['platform'] for sms in synthetic_sms_dicts(200)} == {'whatsapp', 'facebook', 'instagram'}
+    assert all(sms['platform'] == SENDER_PLATFORMS[sms['sid']] for sms in synthetic_sms_dicts(50))
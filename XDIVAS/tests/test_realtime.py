@@ -0,0 +1,128 @@
+import threading
+import time
+
+from app import SMSRecord, SSEHub, SocketBroadcaster, app, data_storage, socketio
+
+
+def received_batches(socket_client):
+    return [event['args'][0] for event in socket_client.get_received() if event['name'] == 'sms_batch']
+
+
+def test_sms_batch_lists_records_newest_first(sms_dicts):
+    data_storage.clear()
+    first = data_storage.add_sms_batch(sms_dicts[:3])
+    second = data_storage.add_sms_batch(sms_dicts[3:5])
+    broadcaster = SocketBroadcaster(socketio, flush_window=60)
+    socket_client = socketio.test_client(app)
+    socket_client.get_received()
+    broadcaster.publish(first)
+    broadcaster.publish(second)
+    broadcaster.flush()
+    [batch] = received_batches(socket_client)
+    assert [sms['seq'] for sms in batch['sms_list']] == [record.seq for record in reversed(first + second)]
+    assert batch['last_seq'] == second[-1].seq
+    socket_client.disconnect()
+
+
+def test_broadcaster_coalesces_publishes_within_the_flush_window(sms_dicts):
+    data_storage.clear()
+    first = data_storage.add_sms_batch(sms_dicts[:3])
+    second = data_storage.add_sms_batch(sms_dicts[3:5])
+    refreshed = data_storage.add_sms_batch(sms_dicts[5:6])
+    broadcaster = SocketBroadcaster(socketio, flush_window=0.05)
+    socket_client = socketio.test_client(app)
+    socket_client.get_received()
+    broadcaster.publish(first)
+    broadcaster.publish(second)
+    broadcaster.publish(refreshed, 'bounceIn')
+    broadcaster.publish([])
+    time.sleep(0.3)
+    batches = {batch['animation']: batch for batch in received_batches(socket_client)}
+    assert set(batches) == {'slideInRight', 'bounceIn'}
+    coalesced = batches['slideInRight']
+    assert coalesced['counters']['count'] == 5
+    assert sum(coalesced['counters']['delta'].values()) == 5
+    assert coalesced['counters']['total_sms'] == 6
+    assert batches['bounceIn']['last_seq'] == refreshed[0].seq
+    assert (broadcaster.batches_sent, broadcaster.records_sent) == (2, 6)
+    socket_client.disconnect()
+
+
+def test_reconnecting_client_gets_only_what_it_missed(sms_dicts):
+    data_storage.clear()
+    data_storage.add_sms_batch(sms_dicts[:10])
+    stream_id = data_storage.stream_id
+    last_seq = data_storage.last_seq
+    data_storage.add_sms_batch(sms_dicts[10:13])
+
+    socket_client = socketio.test_client(app, auth={'last_seq': last_seq, 'stream_id': stream_id})
+    events = {event['name']: event['args'][0] for event in socket_client.get_received()}
+    assert 'initial_data' not in events
+    assert [sms['seq'] for sms in events['resume_data']['sms_list']] == [last_seq + 3, last_seq + 2, last_seq + 1]
+    socket_client.disconnect()
+
+    socket_client = socketio.test_client(app, auth={'last_seq': last_seq, 'stream_id': 'another-stream'})
+    events = {event['name']: event['args'][0] for event in socket_client.get_received()}
+    assert events['resume_gap']['stream_id'] == stream_id
+    socket_client.disconnect()
+
+
+def test_sse_stream_resets_when_a_replica_replaces_the_stream(storage, sms_dicts):
+    storage.add_sms_batch(sms_dicts[:10])
+    hub = SSEHub(storage, heartbeat_interval=5)
+    stream = hub.stream(f"{storage.stream_id}-10")
+    assert next(stream) == "retry: 3000\n\n"
+    records = [SMSRecord.from_dict({**sms, 'seq': seq}) for seq, sms in enumerate(sms_dicts[10:13], start=1)]
+    timer = threading.Timer(0.1, storage.load_replica, args=('leader', records, {}, {}))
+    timer.start()
+    reset = next(stream)
+    timer.join()
+    assert reset.startswith('event: reset') and '"last_seq": 3' in reset
+    [added] = storage.add_sms_batch(sms_dicts[13:14])
+    assert added.seq == 4
+    assert next(stream).startswith(b"id: leader-4\n")
+
+
+def sse_seqs(events):
+    return [int(event.split(b'\n', 1)[0].rpartition(b'-')[2]) for event in events]
+
+
+def test_sse_stream_sends_a_backlog_then_new_records(storage, sms_dicts):
+    storage.add_sms_batch(sms_dicts[:15])
+    hub = SSEHub(storage, heartbeat_interval=5, initial_backlog=3)
+    stream = hub.stream()
+    assert next(stream) == "retry: 3000\n\n"
+    assert sse_seqs([next(stream) for _ in range(3)]) == [13, 14, 15]
+    storage.add_sms_batch(sms_dicts[15:17])
+    event = next(stream)
+    assert event.startswith(f"id: {storage.stream_id}-16\ndata: ".encode())
+    assert sse_seqs([event, next(stream)]) == [16, 17]
+    assert hub.clients == 1
+    stream.close()
+    assert hub.clients == 0
+
+
+def test_sse_stream_resumes_after_last_event_id(storage, sms_dicts):
+    storage.add_sms_batch(sms_dicts)
+    hub = SSEHub(storage, heartbeat_interval=5)
+    stream = hub.stream(f"{storage.stream_id}-17")
+    next(stream)
+    assert sse_seqs([next(stream) for _ in range(3)]) == [18, 19, 20]
+    stream.close()
+
+    # An id from another stream is treated as a gap
+    stream = hub.stream('otherstream-17')
+    next(stream)
+    assert next(stream).startswith('event: reset')
+    stream.close()
+
+
+def test_sse_stream_sends_heartbeats_while_idle(storage, sms_dicts):
+    storage.add_sms_batch(sms_dicts[:2])
+    hub = SSEHub(storage, heartbeat_interval=0.05, initial_backlog=0)
+    stream = hub.stream()
+    next(stream)
+    started = time.monotonic()
+    assert next(stream) == ": heartbeat\n\n"
+    assert time.monotonic() - started >= 0.04
+    stream.close()
@@ -0,0 +1,168 @@
+import threading
+import time
+
+import pytest
+
+from app import (AdaptivePollScheduler, FetchedPage, FetchError, IVASRealTimeScraper, MonitoringPipeline, SocketBroadcaster,
+                 SoupPageParser, socketio)
+from benchmarks.portal_pages import load_fixture
+
+
+class FailingSession:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        return type('Response', (), {'status_code': self.status_code, 'headers': {}, 'content': b''})()
+
+
+class PageSession:
+    def __init__(self, html_content):
+        self.content = html_content.encode('utf-8')
+
+    def get(self, url, **kwargs):
+        return type('Response', (), {'status_code': 200, 'headers': {'ETag': '"v1"'}, 'content': self.content,
+                                     'text': self.content.decode('utf-8')})()
+
+
+@pytest.fixture
+def scraper(storage):
+    scraper = IVASRealTimeScraper()
+    scraper.logged_in = True
+    scraper.pipeline = MonitoringPipeline(scraper, storage, SocketBroadcaster(socketio, flush_window=0))
+    yield scraper
+    scraper.pipeline.stop()
+
+
+def test_scheduler_tightens_on_new_rows_and_backs_off_when_quiet():
+    scheduler = AdaptivePollScheduler(base_interval=30, min_interval=5, max_interval=120)
+    assert scheduler.next_interval(3) == 15
+    assert scheduler.next_interval(3) == 7.5
+    assert scheduler.next_interval(3) == 5           # clamped to min_interval
+    assert scheduler.next_interval(0) == 7.5
+    for _ in range(20):
+        scheduler.next_interval(0)
+    assert scheduler.interval == 120                 # clamped to max_interval
+
+
+def test_scheduler_aims_for_target_rows_at_the_current_rate():
+    scheduler = AdaptivePollScheduler(base_interval=60, min_interval=1, max_interval=120, target_rows=10)
+    # 120 SMS/min reaches 10 rows in 5 s, sooner than halving would poll
+    assert scheduler.next_interval(4, sms_rate=120) == 5
+    assert AdaptivePollScheduler(base_interval=200).interval == 120
+    assert scheduler.stats() == {'interval': 5, 'min_interval': 1, 'max_interval': 120}
+
+
+def test_failed_fetch_raises_and_is_counted(scraper):
+    scraper._scraper = FailingSession(503)
+    with pytest.raises(FetchError):
+        scraper.fetch_page()
+    assert scraper.poll_counts()['failed'] == 1
+    assert scraper.fetch_live_test_sms() == []
+
+
+def test_page_is_only_remembered_once_it_is_stored(scraper, monkeypatch):
+    scraper._scraper = PageSession(load_fixture(10))
+
+    def broken_parse(html_content, seen_rows=()):
+        raise ValueError('broken page')
+
+    monkeypatch.setattr(scraper, 'parse_page', broken_parse)
+    assert scraper.fetch_live_test_sms() == []
+    assert scraper.etag is None and scraper.last_body_hash is None
+    monkeypatch.undo()
+
+    assert len(scraper.fetch_live_test_sms()) == 10
+    assert scraper.etag == '"v1"' and scraper.last_body_hash is not None
+    assert scraper.fetch_page() is None
+    assert scraper.poll_counts()['unchanged_body'] == 1
+
+
+def test_failed_fetches_back_off_exponentially(scraper, monkeypatch):
+    scraper._scraper = FailingSession(500)
+    delays = []
+
+    def fake_sleep(seconds):
+        delays.append(seconds)
+        if len(delays) == 4:
+            scraper.active = False
+
+    monkeypatch.setattr('app.time.sleep', fake_sleep)
+    scraper.active = True
+    scraper._monitoring_loop()
+    assert delays == [5, 10, 20, 40]
+
+
+def test_pipeline_reports_new_rows_at_parse_time(scraper):
+    scraper.pipeline.start()
+    try:
+        page = load_fixture(10)
+        ticket = scraper.pipeline.submit(FetchedPage(page, time.monotonic(), False))
+        assert ticket.parsed.result(timeout=5) == 10
+        assert len(ticket.stored.result(timeout=5)) == 10
+        # Once ingested, the same page is entirely below the high-water mark
+        ticket = scraper.pipeline.submit(FetchedPage(page, time.monotonic(), False))
+        assert ticket.parsed.result(timeout=5) == 0
+        assert ticket.stored.result(timeout=5) == []
+    finally:
+        scraper.pipeline.stop()
+
+
+def test_manual_fetch_is_stored_by_the_pipeline(scraper, storage, monkeypatch):
+    scraper._scraper = PageSession(load_fixture(10))
+    published = []
+    monkeypatch.setattr(scraper.pipeline.broadcaster, 'publish',
+                        lambda records, animation, seen_at=None: published.append((len(records), animation)))
+    added = scraper.fetch_live_test_sms(animation='bounceIn')
+    assert [record.seq for record in added] == [record.seq for record in storage.snapshot.records[::-1]]
+    assert scraper.high_water_mark
+    deadline = time.monotonic() + 5
+    while not published and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert published == [(10, 'bounceIn')]
+
+
+def test_fetcher_keeps_polling_while_a_page_is_parsed(scraper, monkeypatch):
+    release = threading.Event()
+    parse_fetched = scraper.parse_fetched
+
+    def slow_parse(fetched):
+        release.wait(5)
+        return parse_fetched(fetched)
+
+    pages = [load_fixture(10), load_fixture(100)]
+    monkeypatch.setattr(scraper, 'parse_fetched', slow_parse)
+    monkeypatch.setattr(scraper, 'fetch_page', lambda full_scan=False: FetchedPage(pages.pop(0), time.monotonic(), False))
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 2:
+            scraper.active = False
+
+    monkeypatch.setattr('app.time.sleep', fake_sleep)
+    scraper.pipeline.start()
+    scraper.active = True
+    interval = scraper.scheduler.interval
+    scraper._monitoring_loop()
+    # Both polls went out before the first page finished parsing
+    assert not pages and sleeps == [interval, interval]
+    monkeypatch.undo()
+    release.set()
+    deadline = time.monotonic() + 5
+    while scraper.scheduler.interval == interval and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert scraper.scheduler.interval < interval
+
+
+def test_page_rows_are_stored_oldest_first(scraper, storage):
+    page = load_fixture(10)
+    scraper._scraper = PageSession(page)
+    added = scraper.fetch_live_test_sms()
+    # The portal table is newest-first, and so is storage once seq follows arrival order
+    assert [record.message for record in storage.snapshot.records] == [
+        message for _, _, message in SoupPageParser().parse(page).rows
+    ]
+    assert [record.message for record in added] == [record.message for record in storage.snapshot.records[::-1]]
@@ -0,0 +1,142 @@
+import json
+
+from app import EncodedRecordCache, EnhancedDataStorage, SecondaryIndex, SMSRecord
+
+
+def make_record(platform, country, seq):
+    return SMSRecord(platform, country, 'XX', 'SID', f"+{seq}", f"message {seq}", '', str(seq), 1700000000 + seq, seq)
+
+
+def test_secondary_index_buckets_are_newest_first():
+    index = SecondaryIndex()
+    records = [make_record('whatsapp', 'Nigeria', 1), make_record('facebook', 'Nigeria', 2),
+               make_record('whatsapp', 'India', 3), make_record('whatsapp', 'Nigeria', 4)]
+    for record in records:
+        index.add(record)
+    assert [r.seq for r in index.lookup(platform='whatsapp')] == [4, 3, 1]
+    assert [r.seq for r in index.lookup(country='Nigeria')] == [4, 2, 1]
+    assert [r.seq for r in index.lookup('whatsapp', 'Nigeria')] == [4, 1]
+    assert index.lookup(platform='no-such-platform') == ()
+
+
+def test_secondary_index_evict_and_freeze():
+    index = SecondaryIndex()
+    first, second = make_record('whatsapp', 'Nigeria', 1), make_record('whatsapp', 'Nigeria', 2)
+    index.add(first)
+    frozen = index.freeze()
+    index.add(second)
+    index.evict(first)
+    refrozen = index.freeze(frozen)
+    assert [r.seq for r in frozen.lookup(platform='whatsapp')] == [1]
+    assert [r.seq for r in refrozen.lookup(platform='whatsapp')] == [2]
+
+
+def test_add_sms_batch_assigns_contiguous_sequence_numbers(storage, sms_dicts):
+    added = storage.add_sms_batch(sms_dicts)
+    assert [r.seq for r in added] == list(range(1, len(sms_dicts) + 1))
+    assert storage.add_sms_batch(sms_dicts) == []
+    assert storage.snapshot.last_seq == len(sms_dicts)
+
+
+def test_records_since_returns_missed_records_newest_first(storage, sms_dicts):
+    storage.add_sms_batch(sms_dicts[:10])
+    storage.add_sms_batch(sms_dicts[10:])
+    missed = storage.records_since(15)
+    assert [r.seq for r in missed] == [20, 19, 18, 17, 16]
+    assert storage.records_since(20) == []
+
+
+def test_records_since_asks_for_reload_on_gaps(storage, sms_dicts):
+    storage.add_sms_batch(sms_dicts)
+    assert storage.records_since(21) is None        # ahead of this stream
+    assert storage.records_since(0, max_gap=5) is None
+    small = type(storage)(max_sms=5)
+    small.add_sms_batch(sms_dicts)
+    assert small.records_since(10) is None          # older than the retained records
+
+
+def test_snapshot_query_filters(storage, sms_dicts):
+    storage.add_sms_batch(sms_dicts)
+    snap = storage.snapshot
+    whatsapp = snap.query('whatsapp', 'all', 100)
+    assert whatsapp and all(r.platform == 'whatsapp' for r in whatsapp)
+    assert [r.seq for r in snap.query(limit=3)] == [20, 19, 18]
+
+
+def test_configured_platforms_are_always_reported(sms_dicts):
+    storage = EnhancedDataStorage(max_sms=100, platforms=['telegram', 'whatsapp', 'facebook', 'instagram'])
+    assert storage.snapshot.platform_counts['telegram'] == 0
+    storage.add_sms_batch(sms_dicts)
+    assert 'telegram' in storage.snapshot.hourly(1)[0]
+    storage.clear()
+    assert storage.snapshot.platform_counts == dict.fromkeys(storage.platforms, 0)
+
+
+def test_snapshot_query_never_counts_from_the_oldest_end(storage, sms_dicts):
+    storage.add_sms_batch(sms_dicts)
+    assert storage.snapshot.query(limit=-2) == []
+    assert storage.snapshot.query('whatsapp', 'all', -2) == []
+
+
+def test_query_before_pages_through_buckets(storage, sms_dicts):
+    storage.add_sms_batch(sms_dicts)
+    snap = storage.snapshot
+    assert [r.seq for r in snap.query_before(limit=3)] == [20, 19, 18]
+    assert [r.seq for r in snap.query_before(11, limit=3)] == [10, 9, 8]
+    assert snap.query_before(1, limit=3) == [] and snap.query_before(5, limit=-1) == []
+    whatsapp = [r.seq for r in snap.query('whatsapp', 'all', 100)]
+    assert [r.seq for r in snap.query_before(whatsapp[1], 'whatsapp', 'all', 100)] == whatsapp[2:]
+    assert [r.seq for r in storage.query_history(before_seq=11, limit=3)] == [10, 9, 8]
+
+
+def test_encoded_record_cache_is_bounded_and_reused():
+    cache = EncodedRecordCache(capacity=2)
+    records = [make_record('whatsapp', 'Nigeria', seq) for seq in range(1, 4)]
+    first = cache.get(records[0])
+    assert cache.get(records[0]) is first
+    assert json.loads(first)['seq'] == 1
+    cache.get(records[1])
+    cache.get(records[2])
+    assert len(cache.entries) == 2 and records[0] not in cache.entries
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_load_replica_publishes_once_without_notifying_listeners(storage, sms_dicts):
+    storage.add_sms_batch(sms_dicts[:5])
+    calls, versions = [], []
+    storage.subscribe(calls.append)
+    before = storage.snapshot
+    original_add = storage.add_sms
+
+    def add_sms(*args, **kwargs):
+        versions.append(storage.snapshot.version)
+        return original_add(*args, **kwargs)
+
+    storage.add_sms = add_sms
+    records = [SMSRecord.from_dict({**sms, 'seq': seq}) for seq, sms in enumerate(sms_dicts[5:], start=40)]
+    added = storage.load_replica('leader', records, {'whatsapp': 99}, {'Nigeria': 7})
+    assert len(added) == len(records) and calls == []
+    assert set(versions) == {before.version}             # readers kept the old snapshot during the load
+    snap = storage.snapshot
+    assert snap.version == before.version + 1
+    assert snap.stream_id == 'leader' and snap.last_seq == added[-1].seq
+    assert snap.platform_counts['whatsapp'] == 99 and snap.country_counts == {'Nigeria': 7}
+    assert [r.seq for r in snap.query(limit=100)] == [r.seq for r in reversed(added)]
+    whatsapp = [r.seq for r in reversed(added) if r.platform == 'whatsapp']
+    assert [r.seq for r in snap.query('whatsapp', 'all', 100)] == whatsapp
+
+
+def test_timeseries_reads_the_published_rollup_without_locking(storage, sms_dicts):
+    storage.add_sms_batch(sms_dicts[:10])
+    published = storage.snapshot
+    now = max(record.epoch for record in published.records)
+    with storage.rollup.lock:  # a writer holding the lock must not block readers
+        series = storage.timeseries(step=86400, span=30 * 86400)
+    assert sum(point['count'] for point in series['points']) == 10
+    storage.add_sms_batch(sms_dicts[10:])
+    old = published.rollup.series(step=86400, span=30 * 86400, now=now)
+    new = storage.snapshot.rollup.series(step=86400, span=30 * 86400, now=now)
+    assert sum(point['count'] for point in old['points']) == 10
+    assert sum(point['count'] for point in new['points']) == 20
+    storage.clear()
+    assert sum(point['count'] for point in storage.timeseries(step=86400, span=30 * 86400)['points']) == 0